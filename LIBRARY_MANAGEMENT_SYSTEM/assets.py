@@ -0,0 +1,105 @@
+# ====================================== UI Asset Cache ======================================
+import hashlib
+import os
+import threading
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+try:
+    from PIL import Image, ImageTk
+    HAS_PIL = True
+except Exception:
+    HAS_PIL = False
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "library_ui")
+
+
+class AssetCache:
+    """Resized images for the UI, decoded once per (file, mtime, size).
+
+    A resize is looked up in memory first, then in cache_dir as a small PNG
+    keyed by the source path and modification time, and only then decoded from
+    the original and resized with LANCZOS. Editing the source file changes its
+    mtime, so stale entries are simply never hit again. PhotoImages are kept
+    too, so a logout/login cycle reuses the exact objects Tk already has.
+    Pass cache_dir=None to keep everything in memory.
+    """
+
+    def __init__(self, cache_dir : Optional[str] = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.images : Dict[tuple, object] = {}
+        self.photos : Dict[tuple, object] = {}
+        # candidate-name tuple -> first existing path (or None)
+        self.found : Dict[Tuple[str, ...], Optional[str]] = {}
+        self.lock = threading.Lock()
+
+    def find(self, candidates : Sequence[str]) -> Optional[str]:
+        """First existing file among candidates; probed once per candidate list."""
+        key = tuple(candidates)
+        if key not in self.found:
+            self.found[key] = next((name for name in key if os.path.exists(name)), None)
+        return self.found[key]
+
+    def _key(self, path : Optional[str], size : Tuple[int, int]) -> tuple:
+        if path is None:
+            return (None, 0, size)
+        return (os.path.abspath(path), os.stat(path).st_mtime_ns, size)
+
+    def _disk_path(self, key : tuple) -> Optional[str]:
+        if self.cache_dir is None or key[0] is None:
+            return None
+        digest = hashlib.sha1(f"{key[0]}:{key[1]}".encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{digest}_{key[2][0]}x{key[2][1]}.png")
+
+    def image(self, path : Optional[str], size : Tuple[int, int], generate : Callable = None):
+        """PIL image of path resized to size. With path=None the image comes from generate()."""
+        key = self._key(path, size)
+        with self.lock:
+            img = self.images.get(key)
+        if img is not None:
+            return img
+        disk = self._disk_path(key)
+        if disk is not None and os.path.exists(disk):
+            img = Image.open(disk)
+            img.load()
+        else:
+            src = Image.open(path) if path is not None else generate()
+            img = src.resize(size, getattr(Image, "Resampling", Image).LANCZOS)
+            if disk is not None:
+                try:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    tmp = f"{disk}.{os.getpid()}.tmp"
+                    img.save(tmp, "PNG")
+                    os.replace(tmp, disk)
+                except OSError:
+                    # a read-only or full disk just means no disk cache
+                    pass
+        with self.lock:
+            self.images[key] = img
+        return img
+
+    def photo(self, path : Optional[str], size : Tuple[int, int], generate : Callable = None):
+        """Tk PhotoImage for image(); must be called on the Tk thread."""
+        key = self._key(path, size)
+        photo = self.photos.get(key)
+        if photo is None:
+            photo = self.photos[key] = ImageTk.PhotoImage(self.image(path, size, generate))
+        return photo
+
+    def show_when_mapped(self, label, path : Optional[str], size : Callable[[], Tuple[int, int]],
+                         generate : Callable = None):
+        """Put the image on label the first time label is actually displayed.
+
+        size is a callable so it can read the final widget geometry at that point;
+        until then nothing is opened or decoded.
+        """
+        def on_map(event=None):
+            label.unbind("<Map>", binding)
+            try:
+                photo = self.photo(path, size(), generate)
+            except Exception:
+                return
+            label.configure(image=photo)
+            label.image = photo
+        binding = label.bind("<Map>", on_map, add="+")
+
+# ====================================== End of UI Asset Cache ======================================
@@ -0,0 +1,143 @@
+# ====================================== Background Tasks ======================================
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Set
+
+
+class TaskCancelled(Exception):
+    """Raised inside a worker at its next cancellation point once the task is cancelled."""
+
+
+class Task:
+    """Handle for one piece of work running on the pool.
+
+    The worker function receives its Task as the first argument and may call
+    progress(...) to report back to the Tk thread; every progress() and check()
+    call is also a cancellation point, up to commit().
+    """
+
+    def __init__(self, runner, name : str, on_done=None, on_error=None, on_progress=None, on_cancel=None):
+        self.runner = runner
+        self.name = name
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancel = on_cancel
+        self.cancelled = threading.Event()
+        self.committed = False
+        self._lock = threading.Lock()
+        self.future = None
+
+    def cancel(self):
+        with self._lock:
+            if self.committed:
+                return
+            self.cancelled.set()
+        # a task that never started will not post anything itself
+        if self.future is not None and self.future.cancel():
+            self.runner.events.put((self, "cancelled", None))
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise TaskCancelled(self.name)
+
+    def commit(self):
+        """Last cancellation point, called before work that cannot be taken back (writing
+        a file): from here on cancel() is ignored and the task reports done or an error."""
+        with self._lock:
+            self.check()
+            self.committed = True
+
+    def progress(self, *values):
+        self.check()
+        self.runner.events.put((self, "progress", values))
+
+
+class BackgroundRunner:
+    """A small thread pool whose results are delivered on the Tk main loop.
+
+    Workers never touch widgets: they post events to a queue that is drained
+    from root.after(), so every callback (on_done, on_error, on_progress,
+    on_cancel) runs on the Tk thread. Threads rather than processes are used
+    because the work reads and swaps the in-memory library the UI holds.
+    """
+
+    def __init__(self, root, workers : int = 2, poll_ms : int = 50):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="library-ui")
+        self.events = queue.SimpleQueue()
+        self.active : Set[Task] = set()
+        self._polling = False
+
+    def submit(self, fn : Callable, *args, name : str = None, on_done=None, on_error=None,
+               on_progress=None, on_cancel=None) -> Task:
+        """Run fn(task, *args) on the pool and return its Task."""
+        task = Task(self, name or getattr(fn, "__name__", "task"), on_done, on_error, on_progress, on_cancel)
+        self.active.add(task)
+        task.future = self.pool.submit(self._run, task, fn, args)
+        self._schedule()
+        return task
+
+    def cancel_all(self):
+        for task in list(self.active):
+            task.cancel()
+
+    def shutdown(self):
+        self.cancel_all()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, task : Task, fn : Callable, args : tuple):
+        try:
+            task.check()
+            result = fn(task, *args)
+            task.check()
+        except TaskCancelled:
+            self.events.put((task, "cancelled", None))
+        except Exception as e:
+            self.events.put((task, "error", e))
+        else:
+            self.events.put((task, "done", result))
+
+    def _schedule(self):
+        if not self._polling:
+            self._polling = True
+            try:
+                self.root.after(self.poll_ms, self._poll)
+            except Exception:
+                # the window is gone; nobody is left to deliver results to
+                self._polling = False
+
+    def _poll(self):
+        self._polling = False
+        # only the most recent progress report per task is worth drawing
+        latest : Dict[Task, tuple] = {}
+        while True:
+            try:
+                task, kind, value = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                latest[task] = value
+                continue
+            latest.pop(task, None)
+            if task not in self.active:
+                continue
+            self.active.discard(task)
+            # a result that lands after cancel() was asked for is dropped like any other stale one
+            if kind == "cancelled" or task.cancelled.is_set():
+                if task.on_cancel is not None:
+                    task.on_cancel()
+            elif kind == "done":
+                if task.on_done is not None:
+                    task.on_done(value)
+            elif task.on_error is not None:
+                task.on_error(value)
+        for task, values in latest.items():
+            if task in self.active and task.on_progress is not None and not task.cancelled.is_set():
+                task.on_progress(*values)
+        if self.active:
+            self._schedule()
+
+# ====================================== End of Background Tasks ======================================
@@ -0,0 +1,109 @@
+# ====================================== Concurrency Stress Benchmark ======================================
+# Many desk-terminal sessions borrow and return books on one shared library.
+# Checks that no copy is ever borrowed twice and reports throughput.
+# Usage: python bench_concurrency.py [--threads 32] [--books 1000] [--ops 5000]
+import argparse
+import contextlib
+import io
+import random
+import threading
+import time
+
+from library_management_system import LibraryManagementSystem, User, PrintedBook
+
+
+def build_library(n_books : int, n_users : int) -> LibraryManagementSystem:
+    lib = LibraryManagementSystem()
+    admin = User("ADMIN", "Admin", role="Admin")
+    lib.add_user(admin)
+    lib.Login(admin)
+    for i in range(n_books):
+        lib.add_book(PrintedBook(f"B{i}", f"Title {i}", f"Author {i % 50}", 100))
+    for i in range(n_users):
+        lib.add_user(User(f"U{i}", f"Member {i}"))
+    return lib
+
+
+def race_same_copy(lib : LibraryManagementSystem, n_threads : int) -> int:
+    """Let every thread try to borrow one ISBN at the same instant; exactly one may win."""
+    barrier = threading.Barrier(n_threads)
+    wins = []
+
+    def attempt(session):
+        barrier.wait()
+        try:
+            session.borrow_book("B0")
+            wins.append(session.user.user_id)
+        except ValueError:
+            pass
+
+    threads = [threading.Thread(target=attempt, args=(lib.open_session(lib.users[f"U{i}"]),))
+               for i in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    lib.return_book("B0")
+    return len(wins)
+
+
+def stress(lib : LibraryManagementSystem, n_threads : int, n_books : int, ops : int):
+    """Each thread borrows random books and returns the ones it holds."""
+    held = {}
+    borrows = [0] * n_threads
+    rejected = [0] * n_threads
+
+    def worker(idx, session):
+        rnd = random.Random(idx)
+        mine = held.setdefault(idx, [])
+        for _ in range(ops):
+            if mine and rnd.random() < 0.5:
+                session.return_book(mine.pop())
+            else:
+                isbn = f"B{rnd.randrange(n_books)}"
+                try:
+                    session.borrow_book(isbn)
+                    mine.append(isbn)
+                    borrows[idx] += 1
+                except ValueError:
+                    rejected[idx] += 1
+
+    threads = [threading.Thread(target=worker, args=(i, lib.open_session(lib.users[f"U{i}"])))
+               for i in range(n_threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    # every book a thread still holds must be borrowed, and nothing else
+    held_isbns = [isbn for mine in held.values() for isbn in mine]
+    assert len(held_isbns) == len(set(held_isbns)), "a copy was borrowed twice"
+    borrowed = {b.isbn for b in lib.fetch_all_books() if b.borrowed}
+    assert borrowed == set(held_isbns), "borrowed flags disagree with the sessions"
+    return elapsed, sum(borrows), sum(rejected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress the concurrent borrow/return engine.")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--ops", type=int, default=5000, help="operations per thread")
+    args = parser.parse_args()
+
+    lib = build_library(args.books, args.threads)
+    # borrow/return print a line each; keep the terminal quiet while measuring
+    with contextlib.redirect_stdout(io.StringIO()):
+        winners = race_same_copy(lib, args.threads)
+        elapsed, borrows, rejected = stress(lib, args.threads, args.books, args.ops)
+    total = args.threads * args.ops
+    print(f"same-copy race: {winners} winner(s) out of {args.threads} threads")
+    print(f"{total} ops on {args.threads} threads in {elapsed:.2f}s -> {total / elapsed:,.0f} ops/s")
+    print(f"borrows: {borrows}, rejected (already borrowed): {rejected}")
+
+
+if __name__ == "__main__":
+    main()
+
+# ====================================== End of Concurrency Stress Benchmark ======================================
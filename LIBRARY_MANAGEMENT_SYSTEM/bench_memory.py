@@ -0,0 +1,88 @@
+# ====================================== Memory Benchmark ======================================
+# Compares the memory used by a catalogue stored as
+#   dict     - the original layout, one __dict__ per book
+#   slots    - the __slots__ Book/PrintedBook/EBook classes in a plain dict
+#   columnar - ColumnarBookStore with Book views
+# Usage: python bench_memory.py [--sizes 100000 1000000]
+import argparse
+import gc
+import time
+import tracemalloc
+
+from library_management_system import PrintedBook, EBook
+from columnar_store import ColumnarBookStore
+
+
+class DictBook:
+    def __init__(self, isbn, title, author):
+        self.isbn = isbn
+        self.title = title
+        self.author = author
+        self.copies = 1
+        self.available = 1
+        self.free = None
+
+
+class DictPrintedBook(DictBook):
+    def __init__(self, isbn, title, author, pages):
+        super().__init__(isbn, title, author)
+        self.pages = pages
+
+
+class DictEBook(DictBook):
+    def __init__(self, isbn, title, author, file_size):
+        super().__init__(isbn, title, author)
+        self.file_size = file_size
+
+
+LAYOUTS = {
+    "dict": (dict, DictPrintedBook, DictEBook),
+    "slots": (dict, PrintedBook, EBook),
+    "columnar": (ColumnarBookStore, PrintedBook, EBook),
+}
+
+
+def build_catalogue(layout : str, n : int):
+    store_cls, printed_cls, ebook_cls = LAYOUTS[layout]
+    books = store_cls()
+    for i in range(n):
+        isbn = f"978{i:010d}"
+        title = f"Title number {i}"
+        author = f"Author {i % 5000}"
+        if i % 2:
+            books[isbn] = printed_cls(isbn, title, author, 100 + i % 900)
+        else:
+            books[isbn] = ebook_cls(isbn, title, author, 0.5 + (i % 100) / 10)
+    return books
+
+
+def measure(layout : str, n : int):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    books = build_catalogue(layout, n)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del books
+    gc.collect()
+    return current, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory used by the book storage layouts.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--layouts", nargs="+", default=list(LAYOUTS), choices=list(LAYOUTS))
+    args = parser.parse_args()
+
+    print(f"{'books':>9} | {'layout':<8} | {'retained MB':>11} | {'peak MB':>8} | {'bytes/book':>10} | {'build s':>7}")
+    for n in args.sizes:
+        for layout in args.layouts:
+            current, peak, elapsed = measure(layout, n)
+            print(f"{n:>9} | {layout:<8} | {current / 2**20:>11.1f} | {peak / 2**20:>8.1f} | {current / n:>10.0f} | {elapsed:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
+
+# ====================================== End of Memory Benchmark ======================================
@@ -0,0 +1,228 @@
+# ====================================== Benchmark Suite ======================================
+# Times the LibraryManagementSystem hot paths on synthetic catalogues and writes
+# machine-readable results so runs can be compared.
+# Usage:
+#   python bench_suite.py --sizes 1000 100000 1000000 --output results.json
+#   python bench_suite.py --sizes 100000 --compare results.json      # flag regressions
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from library_management_system import LibraryManagementSystem, User, PrintedBook, EBook
+
+OPERATIONS = ("bulk_add", "add_book", "search_books", "borrow_return", "show_all_books", "show_page", "save_data",
+              "load_data", "load_data_streaming", "save_snapshot", "load_snapshot")
+
+WORDS = ("river", "shadow", "garden", "empire", "silent", "winter", "code", "python", "history", "ocean",
+         "light", "stone", "machine", "secret", "journey", "dragon", "city", "mind", "star", "glass")
+
+
+def synthetic_books(n : int, seed : int = 42, prefix : str = "978"):
+    """Mixed PrintedBook/EBook catalogue with word-based titles and a realistic spread of authors."""
+    rnd = random.Random(seed)
+    authors = [f"{rnd.choice(WORDS).title()} {rnd.choice(WORDS).title()}son" for _ in range(max(10, n // 20))]
+    for i in range(n):
+        isbn = f"{prefix}{i:010d}"
+        title = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(2, 5))).title()
+        author = rnd.choice(authors)
+        if rnd.random() < 0.6:
+            yield PrintedBook(isbn, title, author, rnd.randint(50, 1200))
+        else:
+            yield EBook(isbn, title, author, round(rnd.uniform(0.2, 40.0), 1))
+
+
+def new_library(layout : str) -> LibraryManagementSystem:
+    lib = LibraryManagementSystem(columnar=(layout == "columnar"))
+    admin = User("U1", "Admin", role="Admin")
+    lib.add_user(admin)
+    lib.add_user(User("U2", "Member"))
+    lib.Login(admin)
+    return lib
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def measure(fn : Callable[[], object], repeat : int = 1, trace_memory : bool = False) -> Dict:
+    """Run fn repeat times and return timing statistics (seconds per call) and memory use."""
+    if trace_memory:
+        tracemalloc.start()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    result = {
+        "calls": repeat,
+        "total_s": sum(times),
+        "mean_s": statistics.fmean(times),
+        "min_s": min(times),
+        "p50_s": statistics.median(times),
+        "p99_s": sorted(times)[min(len(times) - 1, int(len(times) * 0.99))],
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    if trace_memory:
+        result["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        tracemalloc.stop()
+    return result
+
+
+def run_size(n : int, ops : List[str], layout : str, repeat : int, trace_memory : bool, workdir : str) -> Dict:
+    results = {}
+    quiet = open(os.devnull, "w")
+    lib = new_library(layout)
+    books = list(synthetic_books(n))
+
+    def build():
+        lib.add_books(books)
+        # count the deferred index build as part of the bulk load
+        lib.search_index.flush()
+
+    # the catalogue is always built; "bulk_add" only decides whether that build is reported
+    stats = measure(build, 1, trace_memory)
+    if "bulk_add" in ops:
+        stats["books_per_s"] = n / stats["total_s"]
+        results["bulk_add"] = stats
+
+    rnd = random.Random(7)
+    if "add_book" in ops:
+        extra = iter(list(synthetic_books(repeat, seed=1, prefix="979")))
+        results["add_book"] = measure(lambda: lib.add_book(next(extra)), repeat, trace_memory)
+
+    if "search_books" in ops:
+        keywords = [rnd.choice(WORDS)[:rnd.randint(2, 6)] for _ in range(repeat)]
+        sizes = []
+        it = iter(keywords)
+        results["search_books"] = measure(lambda: sizes.append(len(lib.search_books(next(it)))), repeat, trace_memory)
+        results["search_books"]["mean_results"] = statistics.fmean(sizes)
+
+    if "borrow_return" in ops:
+        isbns = [books[rnd.randrange(n)].isbn for _ in range(repeat)]
+        it = iter(isbns)
+
+        def borrow_return():
+            isbn = next(it)
+            lib.borrow_book(isbn, "U2")
+            lib.return_book(isbn)
+        with contextlib.redirect_stdout(quiet):
+            results["borrow_return"] = measure(borrow_return, repeat, trace_memory)
+
+    if "show_all_books" in ops:
+        with contextlib.redirect_stdout(quiet):
+            results["show_all_books"] = measure(lib.show_all_books, 1, trace_memory)
+
+    if "show_page" in ops:
+        # one sorted, filtered page once the table view exists (the first call builds it)
+        def show_page():
+            lib.show_all_books(page_size=50, kind="EBook", sort="title", more=lambda: False)
+        with contextlib.redirect_stdout(quiet):
+            show_page()
+            results["show_page"] = measure(show_page, repeat, trace_memory)
+
+    path = os.path.join(workdir, f"bench_{n}.json")
+    if {"save_data", "load_data", "load_data_streaming"} & set(ops):
+        results_save = measure(lambda: lib.save_data(path), 1, trace_memory)
+        results_save["file_mb"] = round(os.path.getsize(path) / 2**20, 2)
+        if "save_data" in ops:
+            results["save_data"] = results_save
+    snap = os.path.join(workdir, f"bench_{n}.snap")
+    if {"save_snapshot", "load_snapshot"} & set(ops):
+        results_snap = measure(lambda: lib.save_data(snap), 1, trace_memory)
+        results_snap["file_mb"] = round(os.path.getsize(snap) / 2**20, 2)
+        if "save_snapshot" in ops:
+            results["save_snapshot"] = results_snap
+    del lib
+
+    if "load_data" in ops:
+        results["load_data"] = measure(lambda: LibraryManagementSystem().load_data(path), 1, trace_memory)
+    if "load_data_streaming" in ops:
+        results["load_data_streaming"] = measure(
+            lambda: LibraryManagementSystem().load_data(path, streaming=True), 1, trace_memory)
+    if "load_snapshot" in ops:
+        # opening is lazy, so time it together with the first lookup
+        def load_snapshot():
+            snapshot_lib = LibraryManagementSystem()
+            snapshot_lib.load_data(snap)
+            return snapshot_lib.books[books[n // 2].isbn]
+        results["load_snapshot"] = measure(load_snapshot, 1, trace_memory)
+    for leftover in (path, snap):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    quiet.close()
+    return results
+
+
+def compare(current : Dict, previous : Dict, threshold : float) -> List[str]:
+    """Return one line per operation whose mean time grew by more than threshold (e.g. 0.2 = 20%)."""
+    regressions = []
+    for size, ops in current["results"].items():
+        for op, stats in ops.items():
+            old = previous.get("results", {}).get(size, {}).get(op)
+            if not old or not old.get("mean_s"):
+                continue
+            ratio = stats["mean_s"] / old["mean_s"]
+            if ratio > 1 + threshold:
+                regressions.append(f"{op} @ {size} books: {old['mean_s']:.6f}s -> {stats['mean_s']:.6f}s ({ratio:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LibraryManagementSystem operations.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="catalogue sizes (1k-10M books)")
+    parser.add_argument("--ops", nargs="+", default=list(OPERATIONS), choices=OPERATIONS)
+    parser.add_argument("--layout", choices=("dict", "columnar"), default="dict")
+    parser.add_argument("--repeat", type=int, default=200, help="calls per point operation")
+    parser.add_argument("--trace-memory", action="store_true", help="record tracemalloc peaks (slow)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="previous results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before flagging")
+    args = parser.parse_args()
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "layout": args.layout,
+        "repeat": args.repeat,
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in args.sizes:
+            results = run_size(n, args.ops, args.layout, args.repeat, args.trace_memory, workdir)
+            report["results"][str(n)] = results
+            for op, stats in results.items():
+                print(f"{n:>9} books | {op:<20} | mean {stats['mean_s'] * 1000:>10.3f} ms"
+                      f" | p99 {stats['p99_s'] * 1000:>10.3f} ms | rss {stats['peak_rss_mb']:>8.1f} MB")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        regressions = compare(report, previous, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
+
+# ====================================== End of Benchmark Suite ======================================
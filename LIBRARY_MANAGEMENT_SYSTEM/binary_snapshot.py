@@ -0,0 +1,243 @@
+# ====================================== Binary Snapshot ======================================
+# Compact binary alternative to library_data.json that is opened with mmap and read lazily.
+#   lib.save_data("library.snap")      # the .snap extension selects this format
+#   lib.load_data("library.snap")      # starts at once; books are decoded when first used
+# Convert either way (the source is recognised by its contents, the target by its extension):
+#   python binary_snapshot.py library_data.json library.snap
+#   python binary_snapshot.py library.snap library_data.json
+#
+# Layout (little-endian):
+#   header   HEADER: magic, version, book count and the offsets of the sections below
+#   records  count fixed-size RECORDs sorted by ISBN, so an ISBN is found by binary search
+#   order    count uint32 record numbers in catalogue order, so iteration keeps the JSON order
+#   strings  UTF-8 string table the records point into; equal strings (authors!) are stored once
+#   meta     JSON {"users": {...}, "loans": {...}}, read eagerly (small next to the catalogue)
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import namedtuple
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, Iterator, Set
+
+from library_management_system import Book, PrintedBook, EBook, set_availability
+
+MAGIC = b"LIBSNAP\x00"
+VERSION = 1
+SNAPSHOT_SUFFIX = ".snap"
+HEADER = struct.Struct("<8sHHQQQQQQ")
+# isbn, title, author, free list (JSON) as (offset, length) into the string table, then the numbers
+RECORD = struct.Struct("<QIQIQIQIBiiid")
+KIND_BOOK, KIND_PRINTED, KIND_EBOOK = 0, 1, 2
+
+# what the search indexes need from a row, without building a Book
+IndexRow = namedtuple("IndexRow", "isbn title author")
+
+
+def is_snapshot(filename : str) -> bool:
+    """True if filename is an existing binary snapshot (checked by its magic bytes)."""
+    try:
+        with open(filename, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def write_snapshot(filename : str, books : Iterable[Book], users : dict, loans : dict):
+    """Write books (in catalogue order), users and loans (as saved dicts) to filename."""
+    strings = bytearray()
+    offsets : Dict[str, int] = {}
+
+    def intern(text : str):
+        data = text.encode("utf-8")
+        offset = offsets.get(text)
+        if offset is None:
+            offset = offsets[text] = len(strings)
+            strings.extend(data)
+        return offset, len(data)
+
+    rows = []
+    for book in books:
+        if isinstance(book, PrintedBook):
+            kind, pages, file_size = KIND_PRINTED, book.pages, 0.0
+        elif isinstance(book, EBook):
+            kind, pages, file_size = KIND_EBOOK, 0, book.file_size
+        else:
+            kind, pages, file_size = KIND_BOOK, 0, 0.0
+        free = (0, 0) if book.free is None else intern(json.dumps(book.free, separators=(",", ":")))
+        rows.append((book.isbn, (*intern(book.isbn), *intern(book.title), *intern(book.author), *free,
+                                 kind, book.copies, book.available, pages, file_size)))
+    by_isbn = sorted(range(len(rows)), key=lambda i: rows[i][0])
+    # record number of every row in catalogue order
+    order = array("I", bytes(4 * len(rows)))
+    for record, i in enumerate(by_isbn):
+        order[i] = record
+    if sys.byteorder == "big":
+        order.byteswap()
+    meta = json.dumps({"users": users, "loans": loans}).encode("utf-8")
+
+    records_off = HEADER.size
+    order_off = records_off + RECORD.size * len(rows)
+    strings_off = order_off + 4 * len(rows)
+    meta_off = strings_off + len(strings)
+    tmp = filename + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(rows), records_off, order_off, strings_off, meta_off, len(meta)))
+        f.write(b"".join(RECORD.pack(*rows[i][1]) for i in by_isbn))
+        f.write(order.tobytes())
+        f.write(strings)
+        f.write(meta)
+    os.replace(tmp, filename)
+
+
+class SnapshotBookMap(MutableMapping):
+    """Dict-like ISBN -> Book mapping over a memory-mapped snapshot.
+
+    Opening only reads the header. A Book is decoded from its record the first
+    time its ISBN is looked up and is then kept, so changes made to it (a
+    borrowed copy, added copies) stick; books added or removed afterwards are
+    tracked in memory next to the file, which is never written to.
+    """
+
+    def __init__(self, filename : str):
+        self.filename = filename
+        self.file = open(filename, "rb")
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.count, self.records_off, self.order_off, self.strings_off, meta_off, meta_len = \
+            HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{filename} is not a version {VERSION} library snapshot.")
+        self.meta_span = (meta_off, meta_len)
+        # books decoded from the file or stored since it was opened
+        self.loaded : Dict[str, Book] = {}
+        # snapshot ISBNs deleted since opening, and ISBNs stored since (in insertion order)
+        self.removed : Set[str] = set()
+        self.added : Dict[str, None] = {}
+
+    def close(self):
+        self.mm.close()
+        self.file.close()
+
+    def meta(self) -> dict:
+        """The users and loans saved with the snapshot."""
+        offset, length = self.meta_span
+        return json.loads(self.mm[offset:offset + length])
+
+    def _string(self, offset : int, length : int) -> str:
+        start = self.strings_off + offset
+        return self.mm[start:start + length].decode("utf-8")
+
+    def _record(self, record : int) -> tuple:
+        return RECORD.unpack_from(self.mm, self.records_off + record * RECORD.size)
+
+    def _isbn_at(self, record : int) -> str:
+        offset, length = struct.unpack_from("<QI", self.mm, self.records_off + record * RECORD.size)
+        return self._string(offset, length)
+
+    def _order(self) -> array:
+        # a copy (4 bytes a book), so no view into the map outlives an unfinished iteration
+        order = array("I", self.mm[self.order_off:self.order_off + 4 * self.count])
+        if sys.byteorder == "big":
+            order.byteswap()
+        return order
+
+    def _find(self, isbn : str) -> int:
+        """Record number of isbn in the file, or -1."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._isbn_at(mid) < isbn:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self.count and self._isbn_at(lo) == isbn else -1
+
+    def _book(self, record : int) -> Book:
+        (isbn_off, isbn_len, title_off, title_len, author_off, author_len, free_off, free_len,
+         kind, copies, available, pages, file_size) = self._record(record)
+        isbn = self._string(isbn_off, isbn_len)
+        title = self._string(title_off, title_len)
+        author = self._string(author_off, author_len)
+        if kind == KIND_PRINTED:
+            book = PrintedBook(isbn, title, author, pages, copies)
+        elif kind == KIND_EBOOK:
+            book = EBook(isbn, title, author, file_size, copies)
+        else:
+            book = Book(isbn, title, author, copies)
+        set_availability(book, available, json.loads(self._string(free_off, free_len)) if free_len else None)
+        return book
+
+    def _in_file(self, isbn : str) -> bool:
+        return isbn not in self.removed and self._find(isbn) >= 0
+
+    def __getitem__(self, isbn : str) -> Book:
+        book = self.loaded.get(isbn)
+        if book is not None:
+            return book
+        record = self._find(isbn) if isbn not in self.removed else -1
+        if record < 0:
+            raise KeyError(isbn)
+        # two threads may decode the same row at once; both must end up with the same Book
+        return self.loaded.setdefault(isbn, self._book(record))
+
+    def __setitem__(self, isbn : str, book : Book):
+        if isbn not in self.loaded and not self._in_file(isbn):
+            self.added[isbn] = None
+        self.loaded[isbn] = book
+
+    def __delitem__(self, isbn : str):
+        if isbn in self.added:
+            del self.added[isbn]
+        elif self._in_file(isbn):
+            self.removed.add(isbn)
+        else:
+            raise KeyError(isbn)
+        self.loaded.pop(isbn, None)
+
+    def __contains__(self, isbn) -> bool:
+        return isbn in self.loaded or self._in_file(isbn)
+
+    def __iter__(self) -> Iterator[str]:
+        for record in self._order():
+            isbn = self._isbn_at(record)
+            if isbn not in self.removed:
+                yield isbn
+        yield from list(self.added)
+
+    def __len__(self) -> int:
+        return self.count - len(self.removed) + len(self.added)
+
+    def index_rows(self) -> Iterator:
+        """isbn/title/author of every book for the search indexes, without building Books."""
+        for record in self._order():
+            fields = self._record(record)
+            isbn = self._string(fields[0], fields[1])
+            book = self.loaded.get(isbn)
+            if book is not None:
+                yield book
+            elif isbn not in self.removed:
+                yield IndexRow(isbn, self._string(fields[2], fields[3]), self._string(fields[4], fields[5]))
+        yield from [self.loaded[isbn] for isbn in self.added]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a library file between JSON and the binary snapshot format.")
+    parser.add_argument("source", help="file to read (JSON or snapshot, detected from its contents)")
+    parser.add_argument("target", help=f"file to write (a {SNAPSHOT_SUFFIX} name writes a snapshot, anything else JSON)")
+    args = parser.parse_args()
+
+    from library_management_system import LibraryManagementSystem
+    lib = LibraryManagementSystem()
+    lib.load_data(args.source, streaming=not is_snapshot(args.source))
+    lib.save_data(args.target)
+    print(f"Wrote {len(lib.books)} books, {len(lib.users)} users and {len(lib.loans.loans)} loans to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
+
+# ====================================== End of Binary Snapshot ======================================
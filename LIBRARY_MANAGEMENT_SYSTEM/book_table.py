@@ -0,0 +1,163 @@
+# ====================================== Virtual Book Table ======================================
+import tkinter as tk
+from tkinter import ttk
+from typing import Dict, List
+from library_management_system import PrintedBook, EBook
+
+COLUMNS = ("ISBN", "Title", "Author", "Kind", "Extra", "Available")
+
+
+def book_row(b) -> tuple:
+    """Values shown in one table row for a book."""
+    kind = "Printed" if isinstance(b, PrintedBook) else "EBook" if isinstance(b, EBook) else "Book"
+    extra = f"{b.pages} pages" if isinstance(b, PrintedBook) else f"{b.file_size} MB" if isinstance(b, EBook) else "-"
+    return (b.isbn, b.title, b.author, kind, extra, f"{b.available}/{b.copies}")
+
+
+class VirtualBookTable:
+    """A Treeview that only ever holds the rows currently in view.
+
+    The table keeps the ordered list of ISBNs and an offset into it; the
+    scrollbar, mouse wheel and arrow keys move the offset and the visible
+    page is fetched from the library on demand. Single-book changes
+    (borrow/return/add/remove) touch at most one visible row.
+    """
+
+    def __init__(self, parent, lib, height : int = 18):
+        self.lib = lib
+        self.height = height
+        self.isbns : List[str] = []
+        self.offset = 0
+        # isbn -> Treeview item id for the rows currently shown
+        self.items : Dict[str, str] = {}
+
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=COLUMNS, show="headings", height=height)
+        for col in COLUMNS:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=140 if col == "Title" else 100)
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        # the scrollbar drives our offset rather than the Treeview, which only holds one page
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky='ns')
+        self.frame.columnconfigure(0, weight=1)
+        self.frame.rowconfigure(0, weight=1)
+
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll_by(-3) or "break")
+        self.tree.bind("<Button-5>", lambda e: self.scroll_by(3) or "break")
+        self.tree.bind("<Prior>", lambda e: self.scroll_by(-self.height) or "break")
+        self.tree.bind("<Next>", lambda e: self.scroll_by(self.height) or "break")
+        self.tree.bind("<Configure>", self._on_resize)
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def grid_forget(self):
+        self.frame.grid_forget()
+
+    # ---- data ----
+
+    def reload(self, isbns : List[str] = None):
+        """Take a fresh ISBN list (all books by default) and redraw the current page."""
+        self.isbns = list(self.lib.books) if isbns is None else list(isbns)
+        self.offset = min(self.offset, self._max_offset())
+        self.render()
+
+    def clear(self):
+        self.isbns = []
+        self.offset = 0
+        self.render()
+
+    def refresh_row(self, isbn : str):
+        """Redraw one book's row if it is on screen (e.g. after a borrow or return)."""
+        item = self.items.get(isbn)
+        if item is None:
+            return
+        book = self.lib.books.get(isbn)
+        if book is None:
+            self.remove_book(isbn)
+        else:
+            self.tree.item(item, values=book_row(book))
+
+    def insert_book(self, isbn : str):
+        """Append a newly added book; only redraws if the end of the list is on screen."""
+        self.isbns.append(isbn)
+        if len(self.isbns) - 1 < self.offset + self.height:
+            self.render()
+        else:
+            self._update_scrollbar()
+
+    def remove_book(self, isbn : str):
+        try:
+            pos = self.isbns.index(isbn)
+        except ValueError:
+            return
+        del self.isbns[pos]
+        offset = min(self.offset, self._max_offset())
+        # the page shifts if the row was on or above it, or if the page had to move up
+        if pos < self.offset + self.height or offset != self.offset:
+            self.offset = offset
+            self.render()
+        else:
+            self._update_scrollbar()
+
+    # ---- view ----
+
+    def render(self):
+        """Fetch the visible page from the library and show only those rows."""
+        for item in self.tree.get_children():
+            self.tree.delete(item)
+        self.items.clear()
+        books = self.lib.books
+        for isbn in self.isbns[self.offset:self.offset + self.height]:
+            book = books.get(isbn)
+            if book is not None:
+                self.items[isbn] = self.tree.insert("", "end", values=book_row(book))
+        self._update_scrollbar()
+
+    def scroll_to(self, offset : int):
+        offset = max(0, min(int(offset), self._max_offset()))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def scroll_by(self, rows : int):
+        self.scroll_to(self.offset + rows)
+
+    def _max_offset(self) -> int:
+        return max(0, len(self.isbns) - self.height)
+
+    def _update_scrollbar(self):
+        total = len(self.isbns)
+        if total <= self.height:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self.height) / total)
+
+    def _on_scrollbar(self, action, amount=None, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * len(self.isbns))
+        elif action == "scroll":
+            step = self.height if unit == "pages" else 1
+            self.scroll_by(int(amount) * step)
+
+    def _on_wheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas
+        delta = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll_by(-3 * delta)
+        return "break"
+
+    def _on_resize(self, event):
+        # grow or shrink the page to the rows that fit in the new height
+        try:
+            row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        except (tk.TclError, ValueError):
+            row_height = 20
+        rows = max(1, (event.height - row_height) // row_height)
+        if rows != self.height:
+            self.height = rows
+            self.offset = min(self.offset, self._max_offset())
+            self.render()
+
+# ====================================== End of Virtual Book Table ======================================
@@ -0,0 +1,244 @@
+# ====================================== Columnar Book Store ======================================
+from array import array
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List
+
+from library_management_system import Book, PrintedBook, EBook
+
+KIND_BOOK, KIND_PRINTED, KIND_EBOOK = 0, 1, 2
+
+
+def _stale():
+    raise RuntimeError("This book was removed from the store; look it up again.")
+
+
+class _RowView:
+    """Book attributes read from and written to the columns of a ColumnarBookStore.
+
+    A view is only valid while its ISBN stays in the store: rows are reused after
+    removal, so every access compares the row's generation with the view's and a
+    view of a removed book raises RuntimeError instead of reading whichever book
+    took its row. The check is written out in each accessor; a helper call would
+    cost as much again as the column read.
+    """
+    __slots__ = ()
+
+    def __init__(self, store, row : int, generation : int):
+        self._store = store
+        self._row = row
+        self._gen = generation
+
+    @property
+    def isbn(self):
+        store, row = self._store, self._row
+        if store.generations[row] != self._gen:
+            _stale()
+        return store.isbns[row]
+
+    @property
+    def title(self):
+        store, row = self._store, self._row
+        if store.generations[row] != self._gen:
+            _stale()
+        return store.titles[row]
+
+    @title.setter
+    def title(self, value):
+        store, row = self._store, self._row
+        if store.generations[row] != self._gen:
+            _stale()
+        store.titles[row] = value
+
+    @property
+    def author(self):
+        store, row = self._store, self._row
+        if store.generations[row] != self._gen:
+            _stale()
+        return store.authors[row]
+
+    @author.setter
+    def author(self, value):
+        store, row = self._store, self._row
+        if store.generations[row] != self._gen:
+            _stale()
+        store.authors[row] = store.intern_author(value)
+
+    @property
+    def copies(self):
+        store, row = self._store, self._row
+        if store.generations[row] != self._gen:
+            _stale()
+        return store.copies[row]
+
+    @copies.setter
+    def copies(self, value):
+        store, row = self._store, self._row
+        if store.generations[row] != self._gen:
+            _stale()
+        store.copies[row] = value
+
+    @property
+    def available(self):
+        store, row = self._store, self._row
+        if store.generations[row] != self._gen:
+            _stale()
+        return store.available[row]
+
+    @available.setter
+    def available(self, value):
+        store, row = self._store, self._row
+        if store.generations[row] != self._gen:
+            _stale()
+        store.available[row] = value
+
+    @property
+    def free(self):
+        store, row = self._store, self._row
+        if store.generations[row] != self._gen:
+            _stale()
+        return store.free_copies.get(row)
+
+    @free.setter
+    def free(self, value):
+        store, row = self._store, self._row
+        if store.generations[row] != self._gen:
+            _stale()
+        if value is None:
+            store.free_copies.pop(row, None)
+        else:
+            store.free_copies[row] = value
+
+
+class BookView(_RowView, Book):
+    __slots__ = ("_store", "_row", "_gen")
+
+
+class PrintedBookView(_RowView, PrintedBook):
+    __slots__ = ("_store", "_row", "_gen")
+
+    @property
+    def pages(self):
+        store, row = self._store, self._row
+        if store.generations[row] != self._gen:
+            _stale()
+        return store.pages[row]
+
+    @pages.setter
+    def pages(self, value):
+        store, row = self._store, self._row
+        if store.generations[row] != self._gen:
+            _stale()
+        store.pages[row] = value
+
+
+class EBookView(_RowView, EBook):
+    __slots__ = ("_store", "_row", "_gen")
+
+    @property
+    def file_size(self):
+        store, row = self._store, self._row
+        if store.generations[row] != self._gen:
+            _stale()
+        return store.file_sizes[row]
+
+    @file_size.setter
+    def file_size(self, value):
+        store, row = self._store, self._row
+        if store.generations[row] != self._gen:
+            _stale()
+        store.file_sizes[row] = value
+
+
+VIEW_CLASSES = {KIND_BOOK: BookView, KIND_PRINTED: PrintedBookView, KIND_EBOOK: EBookView}
+
+
+class ColumnarBookStore(MutableMapping):
+    """Dict-like ISBN -> Book mapping that stores books column by column.
+
+    ISBNs map to row ids; titles and authors live in plain lists (authors are
+    interned, since many books share one), copy counts and pages/file sizes in
+    typed arrays, and copy free-lists only for the rows that have copies out
+    (a title with every copy on the shelf needs none). Reading an entry returns a
+    lightweight PrintedBook/EBook/Book view whose attributes write through.
+    """
+
+    def __init__(self):
+        self.rows : Dict[str, int] = {}
+        self.isbns : List[str] = []
+        self.titles : List[str] = []
+        self.authors : List[str] = []
+        self.kinds = bytearray()
+        self.copies = array("i")
+        self.available = array("i")
+        self.free_copies : Dict[int, List[int]] = {}
+        self.pages = array("i")
+        self.file_sizes = array("d")
+        self.free_rows : List[int] = []
+        # bumped when a row is freed, so views handed out for its old book go stale
+        self.generations = array("I")
+        self._authors : Dict[str, str] = {}
+
+    def intern_author(self, author : str) -> str:
+        return self._authors.setdefault(author, author)
+
+    def _new_row(self) -> int:
+        if self.free_rows:
+            return self.free_rows.pop()
+        row = len(self.isbns)
+        self.isbns.append(None)
+        self.titles.append(None)
+        self.authors.append(None)
+        self.kinds.append(KIND_BOOK)
+        self.copies.append(1)
+        self.available.append(1)
+        self.pages.append(0)
+        self.file_sizes.append(0.0)
+        self.generations.append(0)
+        return row
+
+    def __getitem__(self, isbn : str) -> Book:
+        row = self.rows[isbn]
+        return VIEW_CLASSES[self.kinds[row]](self, row, self.generations[row])
+
+    def __setitem__(self, isbn : str, book : Book):
+        row = self.rows.get(isbn)
+        if row is None:
+            row = self._new_row()
+            self.rows[isbn] = row
+        if isinstance(book, PrintedBook):
+            self.kinds[row] = KIND_PRINTED
+            self.pages[row] = book.pages
+        elif isinstance(book, EBook):
+            self.kinds[row] = KIND_EBOOK
+            self.file_sizes[row] = book.file_size
+        else:
+            self.kinds[row] = KIND_BOOK
+        self.isbns[row] = isbn
+        self.titles[row] = book.title
+        self.authors[row] = self.intern_author(book.author)
+        self.copies[row] = book.copies
+        self.available[row] = book.available
+        if book.free is None:
+            self.free_copies.pop(row, None)
+        else:
+            self.free_copies[row] = list(book.free)
+
+    def __delitem__(self, isbn : str):
+        row = self.rows.pop(isbn)
+        self.isbns[row] = None
+        self.titles[row] = None
+        self.authors[row] = None
+        self.free_copies.pop(row, None)
+        self.generations[row] += 1
+        self.free_rows.append(row)
+
+    def __contains__(self, isbn) -> bool:
+        return isbn in self.rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+# ====================================== End of Columnar Book Store ======================================
@@ -0,0 +1,62 @@
+# ====================================== Concurrency Helpers ======================================
+import threading
+from typing import List
+
+
+class LockStripes:
+    """A fixed pool of locks; a key always maps to the same lock, so operations on
+    different ISBNs usually proceed in parallel while the same ISBN is serialised."""
+
+    def __init__(self, stripes : int = 64):
+        self.locks = [threading.Lock() for _ in range(stripes)]
+
+    def __call__(self, key) -> threading.Lock:
+        return self.locks[hash(key) % len(self.locks)]
+
+
+class LibrarySession:
+    """One desk terminal's handle on a shared LibraryManagementSystem.
+
+    Each call runs as this session's user and token (see LibraryManagementSystem.acting_as),
+    so many sessions can drive one library from different threads without
+    touching the shared current_user.
+    """
+
+    def __init__(self, lib, user, token : str = None):
+        self.lib = lib
+        self.user = user
+        self.token = token
+
+    def __repr__(self):
+        return f"Session({self.user})"
+
+    def add_book(self, book):
+        with self.lib.acting_as(self.user, self.token):
+            return self.lib.add_book(book)
+
+    def remove_book(self, isbn : str):
+        with self.lib.acting_as(self.user, self.token):
+            return self.lib.remove_book(isbn)
+
+    def add_copies(self, isbn : str, count : int = 1):
+        with self.lib.acting_as(self.user, self.token):
+            return self.lib.add_copies(isbn, count)
+
+    def borrow_book(self, isbn : str):
+        with self.lib.acting_as(self.user, self.token):
+            return self.lib.borrow_book(isbn, self.user.user_id)
+
+    def return_book(self, isbn : str):
+        with self.lib.acting_as(self.user, self.token):
+            # with several copies out, give back this member's own one
+            return self.lib.return_book(isbn, self.user.user_id)
+
+    def search_books(self, keyword : str) -> List:
+        with self.lib.acting_as(self.user, self.token):
+            return self.lib.search_books(keyword)
+
+    def fetch_all_books(self) -> List:
+        with self.lib.acting_as(self.user, self.token):
+            return self.lib.fetch_all_books()
+
+# ====================================== End of Concurrency Helpers ======================================
@@ -0,0 +1,106 @@
+# ====================================== Credentials ======================================
+# Salted scrypt password hashes and the session cache that lets one slow check at
+# login stand in for the whole session.
+#   stored = hash_password("admin123")        # "scrypt$16384$8$1$<salt>$<hash>"
+#   verify_password(stored, "admin123")       # True, ~80 ms by design
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+SCHEME = "scrypt"
+SCRYPT_N, SCRYPT_R, SCRYPT_P = 2**14, 8, 1
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+
+def _b64(raw : bytes) -> str:
+    return base64.b64encode(raw).decode("ascii")
+
+
+def _scrypt(password : str, salt : bytes, n : int, r : int, p : int) -> bytes:
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=128 * n * r * 2,
+                          dklen=HASH_BYTES)
+
+
+def hash_password(password : str) -> str:
+    """Salted scrypt hash of password, with its parameters, as one storable string."""
+    salt = os.urandom(SALT_BYTES)
+    digest = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"{SCHEME}${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(digest)}"
+
+
+def is_hashed(stored) -> bool:
+    return isinstance(stored, str) and stored.startswith(SCHEME + "$") and stored.count("$") == 5
+
+
+def verify_password(stored : str, password : str) -> bool:
+    """Check password against a stored hash in constant time. A stored value that is
+    not a hash is a legacy plaintext password and is compared as such."""
+    if not stored or password is None:
+        return False
+    if not is_hashed(stored):
+        return hmac.compare_digest(stored.encode("utf-8"), password.encode("utf-8"))
+    _, n, r, p, salt, digest = stored.split("$")
+    expected = base64.b64decode(digest)
+    return hmac.compare_digest(_scrypt(password, base64.b64decode(salt), int(n), int(r), int(p)), expected)
+
+
+class SessionCache:
+    """Bounded token -> user_id map for sessions whose password was verified once.
+
+    Lookups are a single dict access, so role checks stay cheap; the least
+    recently used session is dropped when max_sessions is reached and every
+    session expires ttl seconds after it was opened.
+    """
+
+    def __init__(self, max_sessions : int = 4096, ttl : float = 8 * 3600):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.sessions : "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def issue(self, user_id : str) -> str:
+        token = secrets.token_urlsafe(24)
+        with self.lock:
+            self.sessions[token] = (user_id, time.monotonic() + self.ttl)
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        return token
+
+    def user_for(self, token : str) -> Optional[str]:
+        """user_id of a live session, or None for an unknown, evicted or expired token."""
+        if not token:
+            return None
+        with self.lock:
+            entry = self.sessions.get(token)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self.sessions[token]
+                return None
+            self.sessions.move_to_end(token)
+            return entry[0]
+
+    def valid(self, token : str, user_id : str) -> bool:
+        return self.user_for(token) == user_id
+
+    def revoke(self, token : str):
+        with self.lock:
+            self.sessions.pop(token, None)
+
+    def revoke_user(self, user_id : str):
+        """End every session of user_id, e.g. after a password change."""
+        with self.lock:
+            for token in [t for t, (uid, _) in self.sessions.items() if uid == user_id]:
+                del self.sessions[token]
+
+    def __len__(self):
+        return len(self.sessions)
+
+# ====================================== End of Credentials ======================================
@@ -0,0 +1,143 @@
+# ====================================== Change Events ======================================
+import logging
+import threading
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from itertools import count
+from typing import Callable, Dict, Iterable, List, Tuple
+
+BOOK_ADDED = "book_added"
+BOOK_REMOVED = "book_removed"
+BOOK_UPDATED = "book_updated"
+BOOK_BORROWED = "book_borrowed"
+BOOK_RETURNED = "book_returned"
+USER_ADDED = "user_added"
+KINDS = (BOOK_ADDED, BOOK_REMOVED, BOOK_UPDATED, BOOK_BORROWED, BOOK_RETURNED, USER_ADDED)
+
+logger = logging.getLogger(__name__)
+
+# key is the ISBN (the user id for USER_ADDED); item is the Book, the Loan (None for a
+# return without a loan on record) or the User
+Event = namedtuple("Event", "version kind key item")
+
+
+class ChangeBus:
+    """Publish/subscribe stream of library changes with a version cursor.
+
+    Every change gets the next version number. Subscribers are called with a
+    list of Events: publish_many() hands a whole batch over in one call, and
+    everything published inside batch() is delivered together when the
+    outermost batch() exits. An exception raised by a subscriber is logged
+    and the others are still called. Pull-style readers keep the last
+    version they saw instead and ask since(version) for what they missed;
+    the most recent history changes are kept for that.
+
+    A run of events published together is stored as one entry and only turned
+    into Events when a subscriber or since() reads it, so a bulk import costs
+    one entry, not one object per book.
+    """
+
+    def __init__(self, history : int = 10000):
+        self.history = history
+        self.lock = threading.Lock()
+        self.version = 0
+        # (first version, kind, [(key, item), ...]) runs, oldest first
+        self.log : deque = deque()
+        self.logged = 0
+        self.subscribers : Dict[int, Tuple[Callable, frozenset]] = {}
+        self._ids = count(1)
+        # per thread: open batch() depth and the runs waiting for its end
+        self._local = threading.local()
+
+    def subscribe(self, callback : Callable[[List[Event]], None], kinds : Iterable[str] = None) -> int:
+        """Call callback(events) after every change (of the given kinds only, if set);
+        returns an id for unsubscribe()."""
+        kinds = frozenset(kinds if kinds is not None else KINDS)
+        unknown = kinds.difference(KINDS)
+        if unknown:
+            raise ValueError(f"Unknown event kind(s): {', '.join(sorted(unknown))}.")
+        with self.lock:
+            subscription = next(self._ids)
+            self.subscribers[subscription] = (callback, kinds)
+        return subscription
+
+    def unsubscribe(self, subscription : int):
+        with self.lock:
+            self.subscribers.pop(subscription, None)
+
+    def publish(self, kind : str, key : str, item = None) -> int:
+        """Record one change and return its version."""
+        return self.publish_many(kind, ((key, item),))
+
+    def publish_many(self, kind : str, changes : Iterable[Tuple[str, object]]) -> int:
+        """Record (key, item) changes of one kind as consecutive versions; returns the last."""
+        changes = list(changes)
+        if not changes:
+            return self.version
+        with self.lock:
+            run = (self.version + 1, kind, changes)
+            self.version += len(changes)
+            self.log.append(run)
+            self.logged += len(changes)
+            # drop whole runs once the rest still covers the history
+            while len(self.log) > 1 and self.logged - len(self.log[0][2]) >= self.history:
+                self.logged -= len(self.log.popleft()[2])
+            version = self.version
+        pending = getattr(self._local, "pending", None)
+        if pending is not None:
+            pending.append(run)
+        else:
+            self._deliver([run])
+        return version
+
+    @contextmanager
+    def batch(self):
+        """Hold back delivery until the outermost batch() exits, then deliver all at once."""
+        local = self._local
+        outermost = getattr(local, "pending", None) is None
+        if outermost:
+            local.pending = []
+        try:
+            yield self
+        finally:
+            if outermost:
+                runs, local.pending = local.pending, None
+                if runs:
+                    self._deliver(runs)
+
+    @staticmethod
+    def _events(runs : Iterable[tuple], after : int = 0) -> List[Event]:
+        events = []
+        for first, kind, changes in runs:
+            skip = max(0, after + 1 - first)
+            events.extend(Event(first + i, kind, key, item)
+                          for i, (key, item) in enumerate(changes[skip:], skip))
+        return events
+
+    def _deliver(self, runs : List[tuple]):
+        with self.lock:
+            subscribers = list(self.subscribers.values())
+        if not subscribers:
+            return
+        events = self._events(runs)
+        for callback, kinds in subscribers:
+            wanted = events if kinds.issuperset(run[1] for run in runs) else [e for e in events if e.kind in kinds]
+            if wanted:
+                # the change is already made; one failing listener must not fail the
+                # operation that published it, nor keep the others from hearing of it
+                try:
+                    callback(wanted)
+                except Exception:
+                    logger.exception("Change subscriber %r failed", callback)
+
+    def since(self, version : int) -> List[Event]:
+        """Events after version, oldest first. Raises LookupError when some of them
+        have already left the history; the reader has to reload everything then."""
+        with self.lock:
+            oldest = self.log[0][0] if self.log else self.version + 1
+            if version + 1 < oldest:
+                raise LookupError(f"Changes after version {version} are no longer kept; reload.")
+            runs = [run for run in self.log if run[0] + len(run[2]) - 1 > version]
+        return self._events(runs, version)
+
+# ====================================== End of Change Events ======================================
@@ -2,6 +2,11 @@ import tkinter as tk
 from tkinter import messagebox, ttk, simpledialog
 from tkinter import font as tkfont
 from library_management_system import LibraryManagementSystem, User, PrintedBook, EBook
+from book_table import VirtualBookTable
+from background import BackgroundRunner
+from live_search import LiveSearch
+from events import BOOK_ADDED, BOOK_REMOVED, BOOK_UPDATED, BOOK_BORROWED, BOOK_RETURNED
+from assets import AssetCache
 import os
 try:
     from PIL import Image, ImageTk
@@ -33,16 +38,29 @@ class LibraryUI:
         # background and icon placeholders
         self.bg_photo = None
         self.icon_photo = None
+        # resized images, kept in memory and on disk so restarts and re-logins skip the decode
+        self.assets = AssetCache()
         self.lib = LibraryManagementSystem()
+        self.live_search = LiveSearch(self.lib)
+        self._search_after = None
 
         # Add default users (admin has a password)
         self.admin = User("U1", "Ravindra", role="Admin", password="admin123")
         self.member = User("U2", "Vinod", role="member")
         self.lib.add_user(self.admin)
         self.lib.add_user(self.member)
+        # last library change the table reflects, see _sync_changes()
+        self.change_cursor = self.lib.events.version
 
-        # Current user
+        # Current user and its verified session token
         self.current_user = None
+        self.token = None
+
+        # Save/load/search/listing run on worker threads; results come back via root.after
+        self.runner = BackgroundRunner(root)
+        self.tasks = {}
+        self.data_file = "library_data.json"
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
         # --- Header Frame ---
         self.header_frame = ttk.Frame(root, padding=15)
@@ -62,23 +80,13 @@ class LibraryUI:
         self.footer_frame = tk.Frame(root, bg='black', height=1500)
         self.footer_frame.pack(side='bottom', fill='x')
         self.footer_image = None
-        # load a footer image if available
+        # load a footer image if available; it is decoded only once the footer is on screen
         try:
-            image_candidates = ["ravindra1.jpg", "logo.jpg", "library.jpg", "library.png"]
-            img_path = None
-            for name in image_candidates:
-                if os.path.exists(name):
-                    img_path = name
-                    break
+            img_path = self.assets.find(["ravindra1.jpg", "logo.jpg", "library.jpg", "library.png"])
+            logo_lbl = tk.Label(self.footer_frame, text="", bg='black')
+            logo_lbl.pack(side='left', padx=12, pady=8)
             if HAS_PIL and img_path:
-                img = Image.open(img_path)
-                img = img.resize((64, 64), getattr(Image, "Resampling", Image).LANCZOS)
-                self.footer_image = ImageTk.PhotoImage(img)
-                logo_lbl = tk.Label(self.footer_frame, image=self.footer_image, bg='black')
-                logo_lbl.pack(side='left', padx=12, pady=8)
-            else:
-                logo_lbl = tk.Label(self.footer_frame, text="", bg='black')
-                logo_lbl.pack(side='left', padx=12, pady=8)
+                self.assets.show_when_mapped(logo_lbl, img_path, lambda: (64, 64))
         except Exception:
             pass
 
@@ -97,31 +105,25 @@ class LibraryUI:
             return
 
         # Try to find an image in the project folder
-        image_candidates = ["lib.jpg", "lib.png", "library.jpg", "library.png", "library_bg.jpg", "library_bg.png"]
-        img_path = None
-        for name in image_candidates:
-            if os.path.exists(name):
-                img_path = name
-                break
+        img_path = self.assets.find(["lib.jpg", "lib.png", "library.jpg", "library.png", "library_bg.jpg", "library_bg.png"])
         if not HAS_PIL:
             return
 
-        try:
-            if img_path:
-                img = Image.open(img_path)
-            else:
-                # Create a simple placeholder image with text
-                img = Image.new('RGB', (900, 220), color=(240, 240, 230))
-                try:
-                    from PIL import ImageDraw, ImageFont
-                    draw = ImageDraw.Draw(img)
-                    font = ImageFont.load_default()
-                    text = "Library"
-                    w, h = draw.textsize(text, font=font)
-                    draw.text(((900 - w) / 2, (220 - h) / 2), text, fill=(30, 30, 30), font=font)
-                except Exception:
-                    pass
+        def placeholder():
+            # Create a simple placeholder image with text
+            img = Image.new('RGB', (900, 220), color=(240, 240, 230))
+            try:
+                from PIL import ImageDraw, ImageFont
+                draw = ImageDraw.Draw(img)
+                font = ImageFont.load_default()
+                text = "Library"
+                w, h = draw.textsize(text, font=font)
+                draw.text(((900 - w) / 2, (220 - h) / 2), text, fill=(30, 30, 30), font=font)
+            except Exception:
+                pass
+            return img
 
+        def target_size():
             # Resize to fit the main UI area width (attempt to match frame)
             try:
                 target_w = max(300, self.main_frame.winfo_width())
@@ -133,13 +135,14 @@ class LibraryUI:
                     target_w = self.root.winfo_screenwidth()
                 except Exception:
                     target_w = 900
-            target_h = 220
-            img = img.resize((target_w, target_h), getattr(Image, "Resampling", Image).LANCZOS)
-            self.bg_photo = ImageTk.PhotoImage(img)
-            bg_label = tk.Label(self.main_frame, image=self.bg_photo)
-            bg_label.image = self.bg_photo
+            return (target_w, 220)
+
+        try:
+            bg_label = tk.Label(self.main_frame)
             # span the main columns and fill horizontally
             bg_label.grid(row=1, column=0, columnspan=4, pady=6, sticky='ew')
+            # the decode and resize happen when the label is first displayed, at its real width
+            self.assets.show_when_mapped(bg_label, img_path, target_size, placeholder)
         except Exception:
             return
 
@@ -148,58 +151,45 @@ class LibraryUI:
         if not HAS_PIL:
             return
 
-        image_candidates = ["image.jpg", "login.jpg", "image.png", "login.png", "images/image.jpg", "images/login.jpg"]
-        img_path = None
-        for name in image_candidates:
-            if os.path.exists(name):
-                img_path = name
-                break
-
-        try:
-            if img_path:
-                img = Image.open(img_path)
-            else:
-                return
+        img_path = self.assets.find(["image.jpg", "login.jpg", "image.png", "login.png", "images/image.jpg", "images/login.jpg"])
+        if not img_path:
+            return
 
+        def target_size():
             # Dynamically size background to the current screen/window
             try:
                 screen_w = self.root.winfo_screenwidth()
                 screen_h = self.root.winfo_screenheight()
             except Exception:
                 screen_w, screen_h = 900, 600
-            target_w = max(300, screen_w - 200)
-            target_h = max(120, int(screen_h * 0.22))
+            return (max(300, screen_w - 200), max(120, int(screen_h * 0.22)))
 
-            img = img.resize((target_w, target_h), getattr(Image, "Resampling", Image).LANCZOS)
-            self.login_bg = ImageTk.PhotoImage(img)
-            bg_label = tk.Label(self.login_frame, image=self.login_bg)
-            bg_label.image = self.login_bg
+        try:
+            bg_label = tk.Label(self.login_frame)
             # place behind widgets and ensure it fills the login frame
             bg_label.place(relx=0.5, rely=0.5, anchor='center')
             bg_label.lower()
+            self.assets.show_when_mapped(bg_label, img_path, target_size)
         except Exception:
             return
 
     def _set_window_icon(self):
         """Set window icon if an icon file exists (prefers .ico on Windows)."""
-        icon_candidates = ["library.ico", "icon.ico", "library.png", "icon.png"]
-        for ic in icon_candidates:
-            if os.path.exists(ic):
+        ic = self.assets.find(["library.ico", "icon.ico", "library.png", "icon.png"])
+        if ic is None:
+            return
+        try:
+            if ic.lower().endswith('.ico'):
+                self.root.iconbitmap(ic)
+            elif HAS_PIL:
+                # cached, so logging in again does not decode the icon a second time
+                self.icon_photo = self.assets.photo(ic, (64, 64))
                 try:
-                    if ic.lower().endswith('.ico'):
-                        self.root.iconbitmap(ic)
-                    else:
-                        if HAS_PIL:
-                            img = Image.open(ic)
-                            img = img.resize((64, 64), getattr(Image, "Resampling", Image).LANCZOS)
-                            self.icon_photo = ImageTk.PhotoImage(img)
-                            try:
-                                self.root.iconphoto(False, self.icon_photo)
-                            except Exception:
-                                pass
+                    self.root.iconphoto(False, self.icon_photo)
                 except Exception:
                     pass
-                break
+        except Exception:
+            pass
 
     def create_login_ui(self):
         ttk.Label(self.login_frame, text="Login as User ID", font=("Segoe UI", 16)).grid(row=0, column=0, sticky="e", padx=10, pady=10)
@@ -229,11 +219,16 @@ class LibraryUI:
                 if not pwd:
                     messagebox.showerror("Error", "Admin password is required")
                     return
-                if not hasattr(user, 'password') or user.password != pwd:
-                    messagebox.showerror("Error", "Incorrect password")
-                    return
+            else:
+                pwd = None
+            # the one slow hash check; later admin actions only look up the session token
+            try:
+                self.token = self.lib.authenticate(uid, pwd)
+            except PermissionError:
+                messagebox.showerror("Error", "Incorrect password")
+                return
             self.current_user = user
-            self.lib.Login(self.current_user)
+            self.lib.Login(self.current_user, self.token)
             messagebox.showinfo("Login", f"Logged in as {self.current_user.name} ({self.current_user.role})")
             # hide login UI and footer, then show main UI
             try:
@@ -286,36 +281,193 @@ class LibraryUI:
             ttk.Button(button_frame, text="Remove Book", command=self.remove_book).grid(row=0, column=col, padx=6, pady=6, sticky='ew')
             col += 1
 
-        ttk.Button(button_frame, text="Save Data", command=self.lib.save_data).grid(row=0, column=col, padx=6, pady=6, sticky='ew')
+        ttk.Button(button_frame, text="Save Data", command=self.save_data).grid(row=0, column=col, padx=6, pady=6, sticky='ew')
         col += 1
-        ttk.Button(button_frame, text="Load Data", command=self.lib.load_data).grid(row=0, column=col, padx=6, pady=6, sticky='ew')
+        ttk.Button(button_frame, text="Load Data", command=self.load_data).grid(row=0, column=col, padx=6, pady=6, sticky='ew')
         col += 1
         ttk.Button(button_frame, text="Logout", command=self.logout).grid(row=0, column=col, padx=6, pady=6, sticky='ew')
         # Make each button column expand equally to fill the available width
         for i in range(max(1, col + 1)):
             button_frame.columnconfigure(i, weight=1)
 
-        # Treeview for displaying books
-        self.tree = ttk.Treeview(self.main_frame, columns=("ISBN", "Title", "Author", "Kind", "Extra", "Borrowed"), show="headings", height=18)
-        for col in ("ISBN", "Title", "Author", "Kind", "Extra", "Borrowed"):
-            self.tree.heading(col, text=col)
-            self.tree.column(col, width=140 if col == "Title" else 100)
-        self.tree.grid(row=3, column=0, columnspan=4, pady=10, sticky='nsew')
-        # Add vertical scrollbar
-        self.scrollbar = ttk.Scrollbar(self.main_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=self.scrollbar.set)
-        self.scrollbar.grid(row=3, column=4, sticky='ns', pady=10)
+        # Search-as-you-type box under the buttons; results go straight into the table
+        search_frame = ttk.Frame(button_frame)
+        search_frame.grid(row=1, column=0, columnspan=col + 1, padx=6, pady=6, sticky='ew')
+        ttk.Label(search_frame, text="Search:").grid(row=0, column=0, padx=(0, 6))
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(search_frame, textvariable=self.search_var, font=("Segoe UI", 11))
+        self.search_entry.grid(row=0, column=1, sticky='ew')
+        search_frame.columnconfigure(1, weight=1)
+        self.search_var.trace_add("write", self._on_search_typed)
+
+        # Virtualised table: only the rows in view exist as Treeview items
+        self.table = VirtualBookTable(self.main_frame, self.lib, height=18)
+        self.table.grid(row=3, column=0, columnspan=5, pady=10, sticky='nsew')
+        self.tree = self.table.tree
+
+        # Status bar for background work: message, progress and a cancel button
+        status_frame = ttk.Frame(self.main_frame)
+        status_frame.grid(row=4, column=0, columnspan=5, sticky='ew')
+        self.status_var = tk.StringVar(value="Ready")
+        ttk.Label(status_frame, textvariable=self.status_var).grid(row=0, column=0, padx=6, sticky='w')
+        self.progress = ttk.Progressbar(status_frame, mode='determinate', maximum=100, length=240)
+        self.progress.grid(row=0, column=1, padx=6, sticky='ew')
+        self.cancel_button = ttk.Button(status_frame, text="Cancel", command=self.cancel_tasks, state='disabled')
+        self.cancel_button.grid(row=0, column=2, padx=6)
+        status_frame.columnconfigure(1, weight=1)
 
         # Make tree expand if window resized
         self.main_frame.columnconfigure(0, weight=1)
         self.main_frame.rowconfigure(3, weight=1)
 
+    # ---- background work ----
+
+    def run_task(self, name, message, fn, *args, on_done=None, on_progress=None):
+        """Run fn(task, *args) off the Tk thread. Starting a task cancels the previous
+        one with the same name, so a stale search or listing never overwrites a newer one."""
+        old = self.tasks.get(name)
+        if old is not None:
+            old.cancel()
+
+        def finished(callback):
+            def handler(*value):
+                if self.tasks.get(name) is task:
+                    del self.tasks[name]
+                self._update_status()
+                if callback is not None:
+                    callback(*value)
+            return handler
+
+        def failed(e):
+            messagebox.showerror("Error", f"{message} failed: {e}")
+
+        def cancelled():
+            # a task superseded by a newer one of the same name stays quiet
+            if name not in self.tasks:
+                self.status_var.set(f"{message} cancelled")
+
+        task = self.runner.submit(fn, *args, name=name, on_done=finished(on_done), on_error=finished(failed),
+                                  on_progress=on_progress, on_cancel=finished(cancelled))
+        self.tasks[name] = task
+        self.status_var.set(f"{message}...")
+        self._update_status()
+        return task
+
+    def _update_status(self):
+        try:
+            if self.tasks:
+                self.cancel_button.configure(state='normal')
+                # tasks without byte-level progress just show activity
+                if "load" not in self.tasks:
+                    self.progress.configure(mode='indeterminate')
+                    self.progress.start(15)
+            else:
+                self.cancel_button.configure(state='disabled')
+                self.progress.stop()
+                self.progress.configure(mode='determinate', value=0)
+        except Exception:
+            pass
+
+    def cancel_tasks(self):
+        for task in list(self.tasks.values()):
+            task.cancel()
+
+    def _busy(self):
+        """True (after telling the user) while a load is about to replace the library."""
+        if "load" in self.tasks:
+            messagebox.showinfo("Please wait", "Library data is still loading.")
+            return True
+        return False
+
+    def close(self):
+        self.runner.shutdown()
+        self.root.destroy()
+
+    def save_data(self):
+        lib = self.lib
+
+        def save(task, filename):
+            if lib.shared is None:
+                # saved before any Load: merge into the file like every later save does,
+                # instead of overwriting what other processes keep there. Records edited
+                # here and there both are reported (SaveConflict), not given up for theirs
+                lib.open_shared(filename, theirs=False)
+            # a cancel that comes once the file is being written would be a false report
+            task.commit()
+            lib.save_data(filename)
+            return filename
+        self.run_task("save", "Saving", save, self.data_file, on_done=self._saved)
+
+    def _saved(self, filename):
+        # opening the file shared may have brought in other processes' records
+        self._sync_changes()
+        self.status_var.set(f"Saved to {filename}")
+
+    def load_data(self):
+        if "load" in self.tasks:
+            return
+        if self.lib.shared is not None:
+            # already shared: only pick up what other processes saved since, in place
+            self.run_task("load", "Loading", lambda task: self.lib.reload_changes(theirs=True),
+                          on_done=self._changes_loaded)
+            return
+        self.progress.stop()
+        self.progress.configure(mode='determinate', value=0)
+        self.run_task("load", "Loading", self._load_library, self.lib, self.data_file,
+                      on_done=self._library_loaded, on_progress=self._load_progress)
+
+    @staticmethod
+    def _load_library(task, current, filename):
+        """Worker side of the first Load Data: build a new library from what the current
+        one has, then open the file shared over it (the file wins where both have a record,
+        the rest is kept and saved with the next Save Data)."""
+        staged = LibraryManagementSystem()
+        # keep the open sessions, so the logged-in user stays verified after the swap
+        staged.sessions = current.sessions
+        with current.catalog_lock:
+            books = current.fetch_all_books()
+            users = list(current.users.values())
+            loans = list(current.loans.loans.values())
+        for user in users:
+            staged.users[user.user_id] = user
+        for book in books:
+            staged._put_book(book)
+        for loan in loans:
+            staged._open_loan(loan)
+        staged.open_shared(filename, progress=lambda loaded, read, total: task.progress(loaded, read, total))
+        task.check()
+        return staged
+
+    def _changes_loaded(self, result):
+        self._sync_changes()
+        self.status_var.set(f"Loaded {result['changed']:,} changes from {self.data_file}")
+
+    def _load_progress(self, loaded, read, total):
+        self.progress.configure(value=100 * read / total if total else 0)
+        self.status_var.set(f"Loading... {loaded:,} records")
+
+    def _library_loaded(self, staged):
+        # swap on the Tk thread; mutating actions were refused while the load ran
+        if self.current_user is not None:
+            self.current_user = staged.users.get(self.current_user.user_id, self.current_user)
+            staged.Login(self.current_user, self.token)
+        self.lib = staged
+        self.table.lib = staged
+        self.change_cursor = staged.events.version
+        self.live_search = LiveSearch(staged)
+        self.status_var.set(f"Loaded {len(staged.books):,} books from {self.data_file}")
+        if self.search_var.get().strip():
+            self._run_live_search()
+        else:
+            self.show_books()
+
     def logout(self):
         """Log out current user and return to the login screen."""
         try:
-            self.lib.current_user = None
+            self.lib.logout()
         except Exception:
             pass
+        self.token = None
 
         # Hide main UI
         try:
@@ -326,11 +478,10 @@ class LibraryUI:
             except Exception:
                 pass
 
-        # Clear treeview if present
+        # Clear the book table if present
         try:
-            if hasattr(self, 'tree'):
-                for r in self.tree.get_children():
-                    self.tree.delete(r)
+            if hasattr(self, 'table'):
+                self.table.clear()
         except Exception:
             pass
 
@@ -363,19 +514,25 @@ class LibraryUI:
         except Exception:
             pass
 
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-        for b in self.lib.fetch_all_books():
-            kind = "Printed" if isinstance(b, PrintedBook) else "EBook" if isinstance(b, EBook) else "Book"
-            extra = f"{b.pages} pages" if isinstance(b, PrintedBook) else f"{b.file_size} MB" if isinstance(b, EBook) else "-"
-            borrowed = "Yes" if getattr(b, 'borrowed', False) else "No"
-            self.tree.insert("", "end", values=(b.isbn, b.title, b.author, kind, extra, borrowed))
+        # only the visible page is fetched; scrolling pulls in further pages.
+        # Taking the ISBN order itself is done off the Tk thread.
+        lib = self.lib
+
+        def list_isbns(task):
+            with lib.catalog_lock:
+                return list(lib.books)
+
+        def shown(isbns):
+            if lib is self.lib:
+                self.table.reload(isbns)
+                self.status_var.set(f"{len(isbns):,} books")
+        self.run_task("show", "Listing books", list_isbns, on_done=shown)
 
     def show_home(self):
         """Display a simple home/welcome panel in the main area."""
         # hide tree view
         try:
-            self.tree.grid_forget()
+            self.table.grid_forget()
         except Exception:
             pass
         # remove existing home label if any
@@ -389,12 +546,68 @@ class LibraryUI:
         self.home_label.grid(row=2, column=0, columnspan=4, pady=20)
 
     def search_books(self):
-        keyword = simpledialog.askstring("Search", "Enter keyword:")
-        if keyword:
-            results = self.lib.search_books(keyword)
-            messagebox.showinfo("Search Results", "\n".join([str(b) for b in results]) if results else "No books found.")
+        """The Search Books button just moves focus to the live search box."""
+        self.search_entry.focus_set()
+        self.search_entry.select_range(0, 'end')
+
+    def _on_search_typed(self, *args):
+        # debounce: only search once typing pauses, and drop any query still running
+        if self._search_after is not None:
+            self.root.after_cancel(self._search_after)
+        task = self.tasks.get("search")
+        if task is not None:
+            task.cancel()
+        self._search_after = self.root.after(250, self._run_live_search)
+
+    def _run_live_search(self):
+        self._search_after = None
+        keyword = self.search_var.get()
+        if not keyword.strip():
+            self.show_books()
+            return
+        live = self.live_search
+
+        def found(isbns):
+            if live is self.live_search:
+                self.table.offset = 0
+                self.table.reload(isbns)
+                self.status_var.set(f"{len(isbns):,} matches for '{keyword.strip()}'")
+        self.run_task("search", "Searching", lambda task: live.search(keyword, task.check), on_done=found)
+
+    # above this many changes one reload is cheaper than patching the table row by row
+    SYNC_RELOAD = 1000
+
+    def _sync_changes(self):
+        """Bring the table and the search cache up to date with the library's changes
+        since the last sync, read from its change stream."""
+        events = self.lib.events
+        try:
+            changes = events.since(self.change_cursor)
+        except LookupError:
+            changes = None
+        self.change_cursor = changes[-1].version if changes else events.version
+        if changes == []:
+            return
+        catalogue_changed = changes is None or any(e.kind in (BOOK_ADDED, BOOK_REMOVED) for e in changes)
+        if catalogue_changed:
+            self.live_search.invalidate()
+        if self.search_var.get().strip() and catalogue_changed:
+            self._run_live_search()
+        elif changes is None or len(changes) > self.SYNC_RELOAD:
+            self.show_books()
+        else:
+            for event in changes:
+                if event.kind == BOOK_ADDED:
+                    self.table.insert_book(event.key)
+                elif event.kind == BOOK_REMOVED:
+                    self.table.remove_book(event.key)
+                elif event.kind in (BOOK_BORROWED, BOOK_RETURNED, BOOK_UPDATED):
+                    # redrawing a row that is not on screen is a no-op
+                    self.table.refresh_row(event.key)
 
     def add_book(self):
+        if self._busy():
+            return
         # Keep the window focused and prevent minimizing
         try:
             self.root.attributes('-topmost', True)
@@ -420,6 +633,12 @@ class LibraryUI:
                 return
             
             kind = kind.lower()
+            if kind not in ("printed", "ebook"):
+                messagebox.showerror("Error", "Kind must be 'printed' or 'ebook'.", parent=self.root)
+                return
+            copies = simpledialog.askinteger("Add Book", "Number of Copies:", initialvalue=1, minvalue=1, parent=self.root)
+            if not copies:
+                return
             if kind == "printed":
                 pages_str = simpledialog.askstring("Add Book", "Enter Number of Pages:", parent=self.root)
                 if not pages_str:
@@ -430,7 +649,8 @@ class LibraryUI:
                 except (ValueError, TypeError):
                     messagebox.showerror("Error", "Pages must be a valid integer.", parent=self.root)
                     return
-                self.lib.add_book(PrintedBook(isbn, title, author, pages))
+                self.lib.add_book(PrintedBook(isbn, title, author, pages, copies))
+                self._sync_changes()
             elif kind == "ebook":
                 size_str = simpledialog.askstring("Add Book", "Enter File Size (MB):", parent=self.root)
                 if not size_str:
@@ -441,10 +661,8 @@ class LibraryUI:
                 except (ValueError, TypeError):
                     messagebox.showerror("Error", "File size must be a valid number.", parent=self.root)
                     return
-                self.lib.add_book(EBook(isbn, title, author, size))
-            else:
-                messagebox.showerror("Error", "Kind must be 'printed' or 'ebook'.", parent=self.root)
-                return
+                self.lib.add_book(EBook(isbn, title, author, size, copies))
+                self._sync_changes()
             
             messagebox.showinfo("Success", "Book added successfully.", parent=self.root)
         except Exception as e:
@@ -457,11 +675,16 @@ class LibraryUI:
                 pass
 
     def remove_book(self):
+        if self._busy():
+            return
         isbn = simpledialog.askstring("Remove Book", "Enter ISBN:")
         self.lib.remove_book(isbn)
+        self._sync_changes()
         messagebox.showinfo("Success", "Book removed successfully.")
 
     def borrow_book(self):
+        if self._busy():
+            return
         isbn = simpledialog.askstring("Borrow Book", "Enter ISBN:")
         if not isbn:
             return
@@ -472,20 +695,23 @@ class LibraryUI:
             title = book.title if book else isbn
             user_name = self.current_user.name if self.current_user else "User"
             messagebox.showinfo("Success", f"Book {title} borrowed by {user_name}")
-            self.show_books()
+            self._sync_changes()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
     def return_book(self):
+        if self._busy():
+            return
         isbn = simpledialog.askstring("Return Book", "Enter ISBN:")
         if not isbn:
             return
         try:
-            self.lib.return_book(isbn)
+            # the loan of whoever is returning, not simply the oldest one for this title
+            self.lib.return_book(isbn, self.current_user.user_id)
             book = self.lib.books.get(isbn)
             title = book.title if book else isbn
             messagebox.showinfo("Success", f"{title} returned successfully.")
-            self.show_books()
+            self._sync_changes()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
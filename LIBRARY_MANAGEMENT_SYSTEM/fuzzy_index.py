@@ -0,0 +1,228 @@
+# ====================================== Fuzzy Search Index ======================================
+import heapq
+import re
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+TOKEN = re.compile(r"\w+")
+
+
+def edit_distance(a : str, b : str, limit : int) -> int:
+    """Optimal string alignment distance between a and b (Levenshtein plus swapping two
+    neighbouring letters, so "tolkein" is 1 from "tolkien"), or limit + 1 once it exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        row = [i]
+        for j, cb in enumerate(b, 1):
+            cost = previous[j - 1] + (ca != cb)
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if row[j - 1] + 1 < cost:
+                cost = row[j - 1] + 1
+            if before is not None and i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb and before[j - 2] + 1 < cost:
+                cost = before[j - 2] + 1
+            row.append(cost)
+        if min(row) > limit:
+            return limit + 1
+        before, previous = previous, row
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+def allowed_distance(token : str, max_distance : int) -> int:
+    """Typos allowed in a query word: none below 3 letters, one up to 5, then max_distance.
+    Two edits on a two-letter word would match almost every short word in the catalogue."""
+    if len(token) < 3:
+        return 0
+    if len(token) < 6:
+        return min(1, max_distance)
+    return max_distance
+
+
+class FuzzyIndex:
+    """Typo-tolerant word index over book titles and authors (symmetric-delete / SymSpell).
+
+    Each distinct word of the catalogue is stored once with the ISBNs that
+    contain it, kept in a dict used as an ordered set so they stay in indexing
+    order and the first few matches can be read without sorting. Every string
+    obtained by deleting up to max_distance letters from the word's first
+    prefix_length letters points back to it. A query
+    word generates its own deletes, so words within the edit distance are
+    found with a few dict lookups instead of comparing against the whole
+    vocabulary; only those candidates get a real edit-distance check. Memory
+    grows with the number of distinct words, not with the number of books.
+
+    Like BookSearchIndex, bulk loads can defer() batches to be indexed on the
+    next search or change.
+    """
+
+    def __init__(self, max_distance : int = 2, prefix_length : int = 7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.word_ids : Dict[str, int] = {}
+        self.words : List[str] = []
+        self.postings : List[Dict[str, None]] = []
+        # deleted form -> ids of the words it was derived from
+        self.deletes : Dict[str, List[int]] = {}
+        # isbn -> ids of its words, needed to unindex it
+        self.book_words : Dict[str, Tuple[int, ...]] = {}
+        # isbn -> indexing sequence, the tie-break between equally close matches
+        self.order : Dict[str, int] = {}
+        self._seq = 0
+        self.pending : List = []
+
+    def __len__(self):
+        self.flush()
+        return len(self.book_words)
+
+    def _deleted_forms(self, word : str, depth : int) -> Set[str]:
+        forms = {word[:self.prefix_length]}
+        edge = forms
+        for _ in range(depth):
+            edge = {w[:i] + w[i + 1:] for w in edge for i in range(len(w))} - forms
+            forms |= edge
+        return forms
+
+    def _word_id(self, word : str) -> int:
+        word_id = self.word_ids.get(word)
+        if word_id is None:
+            word_id = len(self.words)
+            self.word_ids[word] = word_id
+            self.words.append(word)
+            self.postings.append({})
+            for form in self._deleted_forms(word, self.max_distance):
+                self.deletes.setdefault(form, []).append(word_id)
+        return word_id
+
+    def _drop_word(self, word_id : int):
+        word = self.words[word_id]
+        del self.word_ids[word]
+        # ids are never reused, the slot just goes empty
+        self.words[word_id] = None
+        for form in self._deleted_forms(word, self.max_distance):
+            ids = self.deletes.get(form)
+            if ids is not None:
+                ids.remove(word_id)
+                if not ids:
+                    del self.deletes[form]
+
+    def defer(self, books : Iterable):
+        self.pending.extend(books)
+
+    def flush(self):
+        if self.pending:
+            pending, self.pending = self.pending, []
+            self.add_many(pending)
+
+    def add(self, book):
+        self.add_many((book,))
+
+    def add_many(self, books : Iterable):
+        self.flush()
+        for book in books:
+            isbn = book.isbn
+            if isbn in self.book_words:
+                # re-indexed books move to the end of their postings, so they take a new sequence
+                self.remove(isbn)
+            ids = tuple({self._word_id(w) for w in TOKEN.findall(f"{book.title} {book.author}".lower())})
+            for word_id in ids:
+                self.postings[word_id][isbn] = None
+            self.book_words[isbn] = ids
+            self.order[isbn] = self._seq
+            self._seq += 1
+
+    def remove(self, isbn : str):
+        self.flush()
+        ids = self.book_words.pop(isbn, None)
+        if ids is None:
+            return
+        del self.order[isbn]
+        for word_id in ids:
+            posting = self.postings[word_id]
+            del posting[isbn]
+            if not posting:
+                self._drop_word(word_id)
+
+    def clear(self):
+        self.__init__(self.max_distance, self.prefix_length)
+
+    def similar_words(self, word : str, max_distance : int) -> List[Tuple[int, int]]:
+        """(distance, word id) of every indexed word within max_distance of word, closest first."""
+        found = {}
+        for form in self._deleted_forms(word, max_distance):
+            for word_id in self.deletes.get(form, ()):
+                if word_id not in found:
+                    found[word_id] = edit_distance(word, self.words[word_id], max_distance)
+        return sorted((d, word_id) for word_id, d in found.items() if d <= max_distance)
+
+    def _in_order(self, postings : List[Dict[str, None]]) -> Iterator[str]:
+        """ISBNs of several postings merged in indexing order, each once."""
+        order = self.order
+        previous = None
+        for _, isbn in heapq.merge(*(((order[isbn], isbn) for isbn in posting) for posting in postings)):
+            if isbn != previous:
+                yield isbn
+                previous = isbn
+
+    def search(self, keyword : str, max_distance : int = None, limit : int = 10) -> List[Tuple[int, str]]:
+        """Best limit (score, isbn) pairs for keyword, best first.
+
+        Every word of keyword must match a word of the title or author within
+        its allowed distance; score is the sum of those distances, and ties are
+        broken by indexing order.
+        """
+        self.flush()
+        if max_distance is None:
+            max_distance = self.max_distance
+        if not 0 <= max_distance <= self.max_distance:
+            raise ValueError(f"max_distance must be between 0 and {self.max_distance}.")
+        query = list(dict.fromkeys(TOKEN.findall(keyword.lower())))
+        if not query or limit <= 0:
+            return []
+        # per query word: [(distance, postings of the words at that distance), ...] closest first
+        matches = []
+        for word in query:
+            tiers = {}
+            for d, word_id in self.similar_words(word, allowed_distance(word, max_distance)):
+                tiers.setdefault(d, []).append(self.postings[word_id])
+            if not tiers:
+                return []
+            matches.append(sorted(tiers.items()))
+        if len(matches) == 1:
+            # one word: its distance is the score, so read each tier's first books in order
+            results = []
+            seen = set()
+            for d, postings in matches[0]:
+                for isbn in self._in_order(postings):
+                    if isbn not in seen:
+                        seen.add(isbn)
+                        results.append((d, isbn))
+                        if len(results) == limit:
+                            return results
+            return results
+        # walk the rarest word's books in order and score each against the other words;
+        # once limit books reach the lowest possible score nothing later can beat them
+        matches.sort(key=lambda m: sum(len(p) for _, postings in m for p in postings))
+        lowest = sum(m[0][0] for m in matches)
+        best : List[Tuple[int, int, str]] = []
+        for isbn in self._in_order([p for _, postings in matches[0] for p in postings]):
+            score = 0
+            for m in matches:
+                for d, postings in m:
+                    if any(isbn in p for p in postings):
+                        score += d
+                        break
+                else:
+                    break
+            else:
+                # max-heap on (score, sequence) through negation
+                item = (-score, -self.order[isbn], isbn)
+                if len(best) < limit:
+                    heapq.heappush(best, item)
+                elif item > best[0]:
+                    heapq.heapreplace(best, item)
+                if len(best) == limit and -best[0][0] == lowest:
+                    break
+        return [(-score, isbn) for score, _, isbn in sorted(best, reverse=True)]
+
+# ====================================== End of Fuzzy Search Index ======================================
@@ -0,0 +1,103 @@
+# ====================================== Library Journal ======================================
+import json
+import os
+import threading
+from typing import Dict, Iterator
+
+
+def journal_path(filename: str) -> str:
+    """Journal file that belongs to a snapshot, e.g. library_data.json -> library_data.journal"""
+    return os.path.splitext(filename)[0] + ".journal"
+
+
+class LibraryJournal:
+    """Append-only write-ahead log of library changes, one compact JSON record per line."""
+
+    def __init__(self, filename: str, fsync: bool = False):
+        self.filename = filename
+        self.fsync = fsync
+        # held across appends, and by compaction across snapshot + truncate
+        self.lock = threading.RLock()
+        self.records = _repair(filename) if os.path.exists(filename) else 0
+        self.file = open(filename, "a", encoding="utf-8")
+
+    def append(self, record: Dict) -> int:
+        """Write one record and return the number of bytes appended."""
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+            if self.fsync:
+                os.fsync(self.file.fileno())
+            self.records += 1
+        return len(line)
+
+    def truncate(self):
+        """Drop every record, called once they have been folded into a snapshot."""
+        with self.lock:
+            self.file.seek(0)
+            self.file.truncate()
+            self.file.flush()
+            if self.fsync:
+                os.fsync(self.file.fileno())
+            self.records = 0
+
+    def rewrite(self, records):
+        """Replace every record by records (the same ones, edited), atomically."""
+        with self.lock:
+            self.file.close()
+            rewrite_journal(self.filename, records)
+            self.file = open(self.filename, "a", encoding="utf-8")
+            self.records = len(records)
+
+    def close(self):
+        self.file.close()
+
+
+def _repair(filename: str) -> int:
+    """Cut a torn tail left by a crash off filename, so new records start on a line of
+    their own instead of being glued to it (and skipped with it by read_journal);
+    returns the number of records kept."""
+    records = end = 0
+    with open(filename, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            if line.strip():
+                try:
+                    json.loads(line)
+                except ValueError:
+                    break
+                records += 1
+            end += len(line)
+        if f.seek(0, os.SEEK_END) == end:
+            return records
+    with open(filename, "r+b") as f:
+        f.truncate(end)
+    return records
+
+
+def rewrite_journal(filename: str, records) -> None:
+    """Write records as filename's journal, through a temporary file so a crash keeps the old one."""
+    tmp = filename + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+    os.replace(tmp, filename)
+
+
+def read_journal(filename: str) -> Iterator[Dict]:
+    """Yield journal records in order, stopping at a torn (half-written) last line."""
+    with open(filename, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                break
+
+# ====================================== End of Library Journal ======================================
@@ -1,7 +1,21 @@
 # ====================================== Library Management System ======================================
 import json 
+import os
+import threading
+import time
+from  contextlib import contextmanager, nullcontext
 from  functools import wraps 
 from typing import  List,Dict
+from concurrency import LockStripes, LibrarySession
+from search_index import BookSearchIndex
+from fuzzy_index import FuzzyIndex
+from table_renderer import BookTableView
+from events import ChangeBus, BOOK_ADDED, BOOK_REMOVED, BOOK_UPDATED, BOOK_BORROWED, BOOK_RETURNED, USER_ADDED
+from journal import LibraryJournal, journal_path, read_journal, rewrite_journal
+from streaming_loader import stream_load
+from loans import Loan, LoanLedger
+from credentials import SessionCache, hash_password, is_hashed, verify_password
+import metrics as library_metrics
 
 
 #W decorator to controlled access to certain functions 
@@ -10,156 +24,807 @@ def required_role(role:str):
     def decorator(func):
         @wraps(func)
         def wrapper(self, *args, **kwargs):
-            if not hasattr(self, "current_user") or  self.current_user.role != role:
+            user = getattr(self, "current_user", None)
+            if user is None or user.role != role:
                 raise PermissionError(f"Access denied.Only {role} can perform this action.")
+            # an account with a password needs a session opened by authenticate(); checking
+            # it is a dict lookup, the slow hash was verified once at login
+            if user.password and not self.sessions.valid(self.current_token, user.user_id):
+                raise PermissionError("Session expired or not verified. Please log in again.")
             return func(self, *args, **kwargs)
         return wrapper
     return decorator
 
 
 # Create a book class 
+# __slots__ keep books free of a per-instance __dict__, which dominates memory on big catalogues
 class Book:
-    def __init__(self,isbn : str, title : str, author : str):
+    """One title (ISBN) with copies numbered 1..copies.
+
+    available counts the copies on the shelf and free holds their ids as a
+    stack, so a borrow pops a copy id and a return pushes it back. While every
+    copy is on the shelf free is None rather than a full list, which keeps the
+    common untouched book as small as before.
+    """
+    __slots__ = ("isbn", "title", "author", "copies", "available", "free")
+
+    def __init__(self,isbn : str, title : str, author : str, copies : int = 1):
         self.isbn = isbn 
         self.title = title
         self.author = author
-        self.borrowed = False
+        self.copies = copies
+        self.available = copies
+        self.free : List[int] = None
     
     def __repr__(self):
         return f"{self.title} by {self.author} (ISBN : {self.isbn})"
+
+    # a title counts as borrowed once no copy is left on the shelf
+    @property
+    def borrowed(self) -> bool:
+        return self.available == 0
+
+    @borrowed.setter
+    def borrowed(self, value : bool):
+        self.available = 0 if value else self.copies
+        self.free = [] if value else None
+
+    def take_copy(self, copy_id : int = None) -> int:
+        """Take a copy off the shelf (a specific one when replaying) and return its id."""
+        if self.available <= 0:
+            raise ValueError("Book is already Borrowed." if self.copies == 1 else f"All {self.copies} copies are on loan.")
+        if self.free is None:
+            self.free = list(range(self.copies, 0, -1))
+        if copy_id is None:
+            copy_id = self.free.pop()
+        else:
+            self.free.remove(copy_id)
+        self.available -= 1
+        return copy_id
+
+    def put_copy(self, copy_id : int = None):
+        """Put a copy back on the shelf; copy_id None is a loan recorded before copies had ids."""
+        if self.free is None:
+            return
+        if copy_id is None:
+            copy_id = max(set(range(1, self.copies + 1)).difference(self.free), default=None)
+            if copy_id is None:
+                return
+        self.free.append(copy_id)
+        self.available += 1
+        if self.available >= self.copies:
+            self.available = self.copies
+            self.free = None
+
+    def add_copies(self, count : int):
+        first = self.copies + 1
+        self.copies += count
+        self.available += count
+        if self.free is not None:
+            self.free.extend(range(self.copies, first - 1, -1))
+
+    def to_dict(self) -> dict:
+        d = {"isbn": self.isbn, "title": self.title, "author": self.author, "borrowed": self.borrowed,
+             "copies": self.copies, "available": self.available}
+        if self.free is not None:
+            d["free"] = list(self.free)
+        return d
 class PrintedBook(Book):
-    def __init__(self, isbn : str, title : str, author : str, pages : int):
-        super().__init__(isbn, title, author)
+    __slots__ = ("pages",)
+
+    def __init__(self, isbn : str, title : str, author : str, pages : int, copies : int = 1):
+        super().__init__(isbn, title, author, copies)
         self.pages = pages
 
+    def to_dict(self) -> dict:
+        d = super().to_dict()
+        d["pages"] = self.pages
+        return d
+
 class EBook(Book):
-    def __init__(self, isbn : str, title : str, author : str, file_size : float):
-        super().__init__(isbn, title, author)
+    __slots__ = ("file_size",)
+
+    def __init__(self, isbn : str, title : str, author : str, file_size : float, copies : int = 1):
+        super().__init__(isbn, title, author, copies)
         self.file_size = file_size  # in MB
 
+    def to_dict(self) -> dict:
+        d = super().to_dict()
+        d["file_size"] = self.file_size
+        return d
+
 # Create a user class
 class User:
+    __slots__ = ("user_id", "name", "role", "password")
+
     def __init__(self, user_id : str, name : str, role : str = "member", password: str = None):
         self.user_id = user_id
         self.name = name
         self.role = role # Admin or member
-        self.password = password
+        # only the salted hash is kept; plaintext (from old files too) is hashed on the way in
+        self.password = password if not password or is_hashed(password) else hash_password(password)
     def __repr__(self):
         return f"{self.name}, role : {self.role}"
-    
+
+    def set_password(self, password : str):
+        self.password = hash_password(password) if password else None
+
+    def check_password(self, password : str) -> bool:
+        """Slow by design; accounts without a password accept anything."""
+        return not self.password or verify_password(self.password, password)
+
+    def to_dict(self) -> dict:
+        return {"user_id": self.user_id, "name": self.name, "role": self.role, "password": self.password}
+
+
+def book_from_dict(b: dict) -> Book:
+    """Rebuild a PrintedBook/EBook/Book from its saved dict, keeping its copies and their availability.
+    Files written before copies existed only carry the borrowed flag of a single copy."""
+    copies = b.get("copies", 1)
+    if "pages" in b:
+        book = PrintedBook(b["isbn"], b["title"], b["author"], b["pages"], copies)
+    elif "file_size" in b:
+        book = EBook(b["isbn"], b["title"], b["author"], b["file_size"], copies)
+    else:
+        book = Book(b["isbn"], b["title"], b["author"], copies)
+    if "available" in b:
+        set_availability(book, b["available"], b.get("free"))
+    else:
+        book.borrowed = b.get("borrowed", False)
+    return book
+
+
+def set_availability(book : Book, available : int, free : List[int] = None):
+    """Restore saved counters; a missing free list means the lowest ids are the ones on the shelf."""
+    if available >= book.copies:
+        book.available, book.free = book.copies, None
+    else:
+        book.available = available
+        book.free = list(free) if free is not None else list(range(available, 0, -1))
 
 
 # craete a library management system class
 class LibraryManagementSystem:
-    def __init__(self):
+    def __init__(self, columnar : bool = False, storage = None):
         self.books : Dict[str, Book] = {}
         self.users : Dict[str,User] = {}
+        # optional storage backend (e.g. SQLiteStorage) that owns books/users and answers searches
+        self.storage = storage
+        if storage is not None:
+            self.books = storage.books
+            self.users = storage.users
+        elif columnar:
+            # keep books in a column store and hand out Book views over it
+            from columnar_store import ColumnarBookStore
+            self.books = ColumnarBookStore()
+        # sessions override current_user per thread, see acting_as()
+        self._local = threading.local()
         self.current_user : User = None
+        self.current_token : str = None
+        # sessions verified by authenticate(), so role checks never rehash a password
+        self.sessions = SessionCache()
+        # plaintext passwords hashed while loading, see load_data()
+        self._migrated_users = 0
+        # borrow/return lock only their ISBN's stripe; add/remove/search/save also take catalog_lock
+        # lock order is always stripe -> catalog_lock -> journal.lock
+        self.book_locks = LockStripes()
+        self.catalog_lock = threading.RLock()
+        # title/author n-gram index kept in step with self.books (the storage backend indexes its own)
+        self.search_index = BookSearchIndex() if storage is None else None
+        # typo-tolerant word index, built by the first fuzzy_search() and kept in step after that
+        self.fuzzy_index : FuzzyIndex = None
+        self.fuzzy_distance = 2
+        # paged console table (widths, kind/borrowed groups), built by the first show_all_books()
+        self.table_view : BookTableView = None
+        # write-ahead journal, only set once open_journal() is called
+        self.journal : LibraryJournal = None
+        # data file shared with other processes, only set once open_shared() is called
+        self.shared = None
+        self.data_file = "library_data.json"
+        self.compact_every = 10000
+        # who holds what and until when
+        self.loans = LoanLedger()
+        self.loan_days = 14
+        # change notifications for views and other listeners, see events.py
+        self.events = ChangeBus()
+        # opt-in instrumentation, see enable_metrics()
+        self.metrics : library_metrics.LibraryMetrics = None
+        if storage is not None:
+            for loan in storage.load_loans():
+                self.loans.add(loan)
 
     def fetch_all_books(self) -> List[Book]:
         """Return a list of all Book objects in the system."""
         return list(self.books.values())
 
-    def show_all_books(self):
-        """Print all books in a simple table format to the console."""
-        books = self.fetch_all_books()
-        if not books:
+    # rows formatted at a time by show_all_books() when it prints everything
+    LISTING_CHUNK = 1000
+
+    def show_all_books(self, page_size : int = None, kind : str = None, borrowed : bool = None,
+                       sort : str = None, reverse : bool = False, more = None):
+        """Print books as a table, page_size rows at a time (all of them by default).
+        kind ("Printed", "EBook", "Book") and borrowed filter the rows, sort is "isbn",
+        "title", "author" or "kind". When given, more() is asked after every page and
+        the listing stops once it returns False."""
+        with self.catalog_lock:
+            if self.table_view is None:
+                view = BookTableView(self.books.__getitem__)
+                view.add_many(self.books.values())
+                self.table_view = view
+            # without a page size the rows still go out in chunks under one header,
+            # so a big catalogue is never formatted into a single list
+            pages = self.table_view.pages(page_size or self.LISTING_CHUNK,
+                                          kind=kind, borrowed=borrowed, sort=sort, reverse=reverse)
+        shown = False
+        while True:
+            # other threads may change the catalogue between pages, but not during one
+            try:
+                with self.catalog_lock:
+                    page = next(pages, None)
+            except RuntimeError as e:
+                print(e)
+                return
+            if page is None:
+                break
+            print("\n".join(page if page_size or not shown else page[2:]))
+            shown = True
+            if more is not None and not more():
+                return
+        if not shown:
             print("No books available.")
-            return
-        # Prepare table rows
-        rows = []
-        for b in books:
-            kind = "Printed" if isinstance(b, PrintedBook) else "EBook" if isinstance(b, EBook) else "Book"
-            extra = ""
-            if isinstance(b, PrintedBook):
-                extra = str(getattr(b, "pages", "-"))
-            elif isinstance(b, EBook):
-                extra = f"{getattr(b, 'file_size', '-')} MB"
-            else:
-                extra = "-"
-            rows.append((b.isbn, b.title, b.author, kind, extra, getattr(b, "borrowed", False)))
 
-        # Compute column widths
-        headers = ("ISBN", "Title", "Author", "Kind", "Pages/Size", "Borrowed")
-        cols = list(zip(*([headers] + rows)))
-        widths = [max(len(str(x)) for x in col) for col in cols]
 
-        # Print header
-        header_line = " | ".join(h.ljust(w) for h, w in zip(headers, widths))
-        sep_line = "-+-".join("-" * w for w in widths)
-        print(header_line)
-        print(sep_line)
-
-        # Print rows
-        for r in rows:
-            print(" | ".join(str(x).ljust(w) for x, w in zip(r, widths)))
-
-
-    def Login(self, user : User):
+    @property
+    def current_user(self) -> User:
+        user = getattr(self._local, "user", None)
+        return user if user is not None else self._current_user
+
+    @current_user.setter
+    def current_user(self, user : User):
+        self._current_user = user
+
+    @property
+    def current_token(self) -> str:
+        if getattr(self._local, "user", None) is not None:
+            return self._local.token
+        return self._current_token
+
+    @current_token.setter
+    def current_token(self, token : str):
+        self._current_token = token
+
+    def authenticate(self, user_id : str, password : str = None) -> str:
+        """Verify user_id's password (the one slow step) and open a session; returns its token."""
+        user = self.users.get(user_id)
+        if user is None or not user.check_password(password):
+            raise PermissionError("Unknown user or wrong password.")
+        if user.password and not is_hashed(user.password):
+            user.set_password(password)
+            self.users[user_id] = user
+        return self.sessions.issue(user_id)
+
+    def Login(self, user : User, token : str = None):
         self.current_user = user
+        self.current_token = token
+
+    def logout(self):
+        self.sessions.revoke(self.current_token)
+        self.current_user = None
+        self.current_token = None
+
+    @contextmanager
+    def acting_as(self, user : User, token : str = None):
+        """Run the enclosed calls as user (with its session token) on this thread only,
+        leaving current_user untouched elsewhere."""
+        previous = (getattr(self._local, "user", None), getattr(self._local, "token", None))
+        self._local.user, self._local.token = user, token
+        try:
+            yield self
+        finally:
+            self._local.user, self._local.token = previous
+
+    def open_session(self, user : User, token : str = None) -> LibrarySession:
+        """Return a per-user session that can be used from its own thread (one per desk terminal)."""
+        return LibrarySession(self, user, token)
+
+    def enable_metrics(self) -> "library_metrics.LibraryMetrics":
+        """Start recording call counts, latencies, errors, search sizes and bytes written."""
+        if self.metrics is None:
+            self.metrics = library_metrics.LibraryMetrics()
+            library_metrics.instrument(self, self.metrics)
+        return self.metrics
+
+    def disable_metrics(self):
+        library_metrics.uninstrument(self)
+        self.metrics = None
+
+    def open_journal(self, filename = "library_data.json", compact_every : int = 10000, fsync : bool = False):
+        """Switch to journal mode: every change is appended to <filename>.journal instead of
+        rewriting the snapshot, and the journal is folded into the snapshot every compact_every records."""
+        if self.shared is not None:
+            raise ValueError("A shared data file is open; close_shared() first.")
+        self.close_journal()
+        self.data_file = filename
+        self.compact_every = compact_every
+        self.journal = LibraryJournal(journal_path(filename), fsync=fsync)
+
+    def close_journal(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def open_shared(self, filename = "library_data.json", progress = None, theirs : bool = True):
+        """Work on filename together with other processes: load it (the file wins over
+        records already in memory, the rest are kept and saved with the next save_data),
+        then let save_data() merge into it and reload_changes() pick up other processes'
+        saves. See shared_file.py.
+
+        With theirs=False a record that differs in memory and in the file is a conflict
+        instead: the rest of the file is merged in, but SaveConflict is raised and the
+        file is left unshared, so nothing can be saved over their version."""
+        from binary_snapshot import SNAPSHOT_SUFFIX
+        from shared_file import SaveConflict, SharedDataFile
+        if self.storage is not None or filename.endswith(SNAPSHOT_SUFFIX):
+            raise ValueError("Only a JSON data file can be shared.")
+        if self.journal is not None:
+            raise ValueError("The journal assumes a single writer; close_journal() first.")
+        self.close_shared()
+        shared = SharedDataFile(self, filename)
+        shared.mark_all()
+        self.shared = shared
+        self.data_file = filename
+        conflicts = shared.reload(theirs=theirs, progress=progress)["conflicts"]
+        if conflicts:
+            self.close_shared()
+            raise SaveConflict(conflicts)
+        if self._migrated_users:
+            # plaintext passwords were hashed in memory; rewrite them so they leave the disk too
+            self._migrated_users = 0
+            shared.dirty.update((("users", user_id), None) for user_id in self.users)
+            shared.save()
+
+    def close_shared(self):
+        if self.shared is not None:
+            self.shared.close()
+            self.shared = None
+
+    def reload_changes(self, theirs : bool = False) -> dict:
+        """Apply what other processes saved to the shared file since this one last synced.
+        Returns {"version", "changed", "conflicts"}; local changes to records they also
+        changed are kept and listed as conflicts, or given up for theirs when theirs=True."""
+        if self.shared is None:
+            raise ValueError("No shared data file is open; call open_shared() first.")
+        return self.shared.reload(theirs=theirs)
+
+    def _is_shared(self, filename : str) -> bool:
+        return self.shared is not None and os.path.abspath(filename) == os.path.abspath(self.shared.filename)
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot and start an empty journal."""
+        self.save_data(self.data_file)
+
+    def _log(self, record : dict):
+        if self.journal is None:
+            return
+        written = self.journal.append(record)
+        if self.metrics is not None:
+            self.metrics.add_bytes("journal", written)
+        if self.compact_every and self.journal.records >= self.compact_every:
+            self.compact()
+
+    def _put_user(self, u : dict):
+        if u.get("password") and not is_hashed(u["password"]):
+            self._migrated_users += 1
+        self.users[u["user_id"]] = User(**u)
+
+    def _put_book(self, book : Book):
+        if self.table_view is not None:
+            old = self.books.get(book.isbn)
+            if old is not None:
+                self.table_view.remove(book.isbn, old)
+            self.table_view.add(book)
+        self.books[book.isbn] = book
+        if self.search_index is not None:
+            self.search_index.add(book)
+        if self.fuzzy_index is not None:
+            self.fuzzy_index.add(book)
+
+    def _drop_book(self, isbn : str) -> Book:
+        """Remove isbn everywhere; returns the book as it was, detached from the store
+        (a column store's view of it goes stale with the delete)."""
+        removed = book_from_dict(self.books[isbn].to_dict())
+        # unindex first: deferred index entries may still read the stored book
+        if self.search_index is not None:
+            self.search_index.remove(isbn)
+        if self.fuzzy_index is not None:
+            self.fuzzy_index.remove(isbn)
+        if self.table_view is not None:
+            self.table_view.remove(isbn, self.books[isbn])
+        del self.books[isbn]
+        # a removed book can no longer be on loan
+        for loan in self.loans.holders(isbn):
+            self.loans.remove(loan.loan_id)
+            if self.storage is not None:
+                self.storage.delete_loan(loan.loan_id)
+        return removed
+
+    def _save_copies(self, book : Book):
+        # a storage backend hands out detached Book objects, so write the counters back
+        if self.storage is not None:
+            self.storage.save_availability(book)
+        if self.table_view is not None:
+            # borrow/return only hold the ISBN's stripe; the view is shared by all of them
+            with self.catalog_lock:
+                self.table_view.update(book)
+
+    def _return_copy(self, book : Book, loan : Loan):
+        if loan is not None:
+            book.put_copy(loan.copy_id)
+        elif not self.loans.holders(book.isbn):
+            # no loan on record (older data): with nobody holding it every copy is back
+            book.borrowed = False
+        self._save_copies(book)
+
+    def _apply_record(self, rec : dict):
+        """Replay one journal record. Every op is idempotent so a journal that was
+        already folded into the snapshot (crash mid-compaction) replays harmlessly."""
+        op = rec["op"]
+        if op == "add_book":
+            self._put_book(book_from_dict(rec["book"]))
+        elif op == "add_books":
+            for b in rec["books"]:
+                self._put_book(book_from_dict(b))
+        elif op == "remove_book":
+            if rec["isbn"] in self.books:
+                self._drop_book(rec["isbn"])
+        elif op == "borrow_book":
+            if rec["isbn"] in self.books:
+                book = self.books[rec["isbn"]]
+                if "loan_id" not in rec:
+                    book.borrowed = True
+                else:
+                    # the loan's copy must be off the shelf, whether or not the loan is already
+                    # known (an add_book record replayed over the snapshot puts every copy back)
+                    loan = self.loans.loans.get(rec["loan_id"])
+                    wanted = loan.copy_id if loan is not None else rec.get("copy_id")
+                    shelf = book.free if book.free is not None else range(1, book.copies + 1)
+                    if wanted in shelf:
+                        copy_id = book.take_copy(wanted)
+                    elif loan is None and book.available > 0:
+                        copy_id = book.take_copy()
+                    else:
+                        copy_id = wanted
+                    if loan is None:
+                        self._open_loan(Loan(rec["loan_id"], rec["isbn"], rec["user_id"], rec["borrowed_at"],
+                                             rec["due_at"], copy_id))
+                self._save_copies(book)
+        elif op == "return_book":
+            if rec["isbn"] in self.books:
+                loan = self._close_loan(rec["isbn"], rec.get("user_id"), rec.get("loan_id"))
+                self._return_copy(self.books[rec["isbn"]], loan)
+        elif op == "set_copies":
+            if rec["isbn"] in self.books:
+                book = self.books[rec["isbn"]]
+                if rec["copies"] > book.copies:
+                    book.add_copies(rec["copies"] - book.copies)
+                    self._save_copies(book)
+        elif op == "add_user":
+            self._put_user(rec["user"])
 
     @required_role("Admin")
     def add_book(self, book : Book):
-        if book.isbn in self.books:
-            raise ValueError("Book already exists in the Library.")
-        self.books[book.isbn] = book
+        # listeners are called once the batch exits, after the locks are released
+        with self.events.batch(), self.book_locks(book.isbn), self.catalog_lock:
+            if book.isbn in self.books:
+                raise ValueError("Book already exists in the Library.")
+            self._put_book(book)
+            self._log({"op": "add_book", "book": book.to_dict()})
+            self.events.publish(BOOK_ADDED, book.isbn, book)
+
+    @required_role("Admin")
+    def add_books(self, books, batch_size : int = 10000) -> dict:
+        """Add many books with a single permission check.
+
+        Duplicate ISBNs (already in the library or repeated in the input) are
+        reported instead of aborting, and the search index, storage and journal
+        are updated once per batch of batch_size books rather than once per book.
+        Returns {"added": count, "duplicates": [isbn, ...]}.
+        """
+        added = 0
+        duplicates = []
+        seen = set()
+        batch = []
+        # listeners get the whole import as one delivery at the end
+        with self.events.batch():
+            for book in books:
+                if book.isbn in seen:
+                    duplicates.append(book.isbn)
+                    continue
+                seen.add(book.isbn)
+                batch.append(book)
+                if len(batch) >= batch_size:
+                    added += self._add_batch(batch, duplicates)
+                    batch = []
+            if batch:
+                added += self._add_batch(batch, duplicates)
+        return {"added": added, "duplicates": duplicates}
+
+    def _add_batch(self, batch : List[Book], duplicates : List[str]) -> int:
+        with self.catalog_lock, (self.storage.transaction() if self.storage is not None else nullcontext()):
+            books = self.books
+            fresh = []
+            for book in batch:
+                if book.isbn in books:
+                    duplicates.append(book.isbn)
+                else:
+                    fresh.append(book)
+            if self.storage is not None:
+                self.storage.put_books(fresh)
+            else:
+                for book in fresh:
+                    books[book.isbn] = book
+                # indexed in one pass on the next search instead of row by row
+                self.search_index.defer(fresh)
+            if self.fuzzy_index is not None:
+                self.fuzzy_index.defer(fresh)
+            if self.table_view is not None:
+                self.table_view.defer(fresh)
+            if self.journal is not None and fresh:
+                self._log({"op": "add_books", "books": [b.to_dict() for b in fresh]})
+            self.events.publish_many(BOOK_ADDED, [(book.isbn, book) for book in fresh])
+        return len(fresh)
 
     @required_role("Admin")
     def remove_book(self, isbn :str):
-        if isbn not in self.books:
-            raise ValueError("Book not found in the Library.")
-        del self.books[isbn]
+        with self.events.batch(), self.book_locks(isbn), self.catalog_lock:
+            if isbn not in self.books:
+                raise ValueError("Book not found in the Library.")
+            book = self._drop_book(isbn)
+            self._log({"op": "remove_book", "isbn": isbn})
+            self.events.publish(BOOK_REMOVED, isbn, book)
 
 
-    def borrow_book(self, isbn : str, user_id : str):
-        if isbn not in self.books:
-            raise ValueError("Book not found in the Library.")
-        book = self.books[isbn]
-        if book.borrowed:
-            raise ValueError("Book is already Borrowed.")
-        book.borrowed = True
+    @required_role("Admin")
+    def add_copies(self, isbn : str, count : int = 1) -> Book:
+        """Add count more copies of an existing title; they go straight onto the shelf."""
+        if count < 1:
+            raise ValueError("count must be at least 1.")
+        with self.events.batch(), self.book_locks(isbn):
+            if isbn not in self.books:
+                raise ValueError("Book not found in the Library.")
+            book = self.books[isbn]
+            book.add_copies(count)
+            self._save_copies(book)
+            # the new total rather than the delta, so replaying the record twice is harmless
+            self._log({"op": "set_copies", "isbn": isbn, "copies": book.copies})
+            self.events.publish(BOOK_UPDATED, isbn, book)
+        return book
+
+    def borrow_book(self, isbn : str, user_id : str, due_at : float = None) -> Loan:
+        """Lend a copy of isbn to user_id until due_at (default: loan_days from now) and return the Loan."""
+        # check-and-take under the ISBN's lock so two terminals cannot borrow the same copy
+        with self.events.batch(), self.book_locks(isbn):
+            if isbn not in self.books:
+                raise ValueError("Book not found in the Library.")
+            if user_id not in self.users:
+                raise ValueError("User not found.")
+            book = self.books[isbn]
+            copy_id = book.take_copy()
+            now = time.time()
+            loan = self.loans.open(isbn, user_id, now, due_at if due_at is not None else now + self.loan_days * 86400,
+                                   copy_id=copy_id)
+            self._save_copies(book)
+            if self.storage is not None:
+                self.storage.put_loan(loan)
+            self._log({"op": "borrow_book", **loan.to_dict()})
+            self.events.publish(BOOK_BORROWED, isbn, loan)
         print(f"Book {book.title} borrowed by {self.users[user_id].name}")
-
-    def return_book(self, isbn : str):
-        if isbn not in self.books:
-            raise KeyError("Book not found in the Library.")
-        book = self.books[isbn]
-        book.borrowed = False
+        return loan
+
+    def return_book(self, isbn : str, user_id : str = None) -> Loan:
+        """Return a copy of isbn (the one user_id holds, if given) and return the closed Loan, if one was open."""
+        with self.events.batch(), self.book_locks(isbn):
+            if isbn not in self.books:
+                raise KeyError("Book not found in the Library.")
+            if user_id is not None and not any(l.user_id == user_id for l in self.loans.holders(isbn)):
+                raise ValueError("Book is not borrowed by this user.")
+            book = self.books[isbn]
+            loan = self._close_loan(isbn, user_id)
+            self._return_copy(book, loan)
+            self._log({"op": "return_book", "isbn": isbn, "user_id": loan.user_id if loan else user_id,
+                       "loan_id": loan.loan_id if loan else None})
+            self.events.publish(BOOK_RETURNED, isbn, loan)
         print(f"{book.title} returned successfully.")
+        return loan
+
+    def _open_loan(self, loan : Loan):
+        self.loans.add(loan)
+        if self.storage is not None:
+            self.storage.put_loan(loan)
+
+    def _close_loan(self, isbn : str, user_id : str = None, loan_id : int = None) -> Loan:
+        # journal records name the exact loan, so a replay closes the same one again
+        loan = self.loans.remove(loan_id) if loan_id is not None else self.loans.close(isbn, user_id)
+        if loan is not None and self.storage is not None:
+            self.storage.delete_loan(loan.loan_id)
+        return loan
+
+    def books_held_by(self, user_id : str) -> List[Loan]:
+        """Active loans of a user."""
+        return self.loans.held_by(user_id)
+
+    def who_holds(self, isbn : str) -> List[Loan]:
+        """Active loans of a book."""
+        return self.loans.holders(isbn)
+
+    def overdue_loans(self, now : float = None) -> List[Loan]:
+        """Loans past their due time as of now, most overdue first."""
+        return self.loans.overdue(now)
 
 
     def search_books(self, keyword : str) -> List[Book]:
-        return [ b for b in self.books.values()  if keyword.lower() in b.title.lower() or keyword.lower() in b.author.lower()]
+        if self.storage is not None:
+            return self.storage.search_books(keyword)
+        with self.catalog_lock:
+            return [self.books[isbn] for isbn in self.search_index.search(keyword)]
     
+    def fuzzy_search(self, keyword : str, max_distance : int = 2, limit : int = 10) -> List[Book]:
+        """Up to limit books whose title/author words match every word of keyword within
+        max_distance typos (fewer for short words), closest first: "tolkein" finds Tolkien."""
+        with self.catalog_lock:
+            if self.fuzzy_index is None:
+                index = FuzzyIndex(max(self.fuzzy_distance, max_distance))
+                # a snapshot-backed catalogue hands out its rows without building every Book
+                rows = getattr(self.books, "index_rows", None)
+                index.add_many(rows() if rows is not None else self.books.values())
+                self.fuzzy_index = index
+            return [self.books[isbn] for _, isbn in self.fuzzy_index.search(keyword, max_distance, limit)]
+
     def add_user(self, user : User):
-        if user.user_id in self.users:
-            raise ValueError("User already exists.")
-        self.users[user.user_id] = user
+        with self.events.batch(), self.catalog_lock:
+            if user.user_id in self.users:
+                raise ValueError("User already exists.")
+            self.users[user.user_id] = user
+            self._log({"op": "add_user", "user": user.to_dict()})
+            self.events.publish(USER_ADDED, user.user_id, user)
 
 # Save library data to a file
     def save_data(self, filename = "library_data.json"):
+        if self._is_shared(filename):
+            # merge into what other processes saved instead of overwriting it
+            self.shared.save()
+            return
+        from shared_file import read_version
+        if os.path.exists(filename) and read_version(filename):
+            # a plain rewrite would drop other processes' records and the version stamps
+            raise ValueError(f"{filename} is shared with other processes; open it with open_shared() "
+                             "to save into it.")
+        # a snapshot of the journal's own data file folds the journal in, so no record
+        # may be appended between taking the snapshot and truncating the journal
+        from binary_snapshot import SNAPSHOT_SUFFIX
+        folds_journal = self.journal is not None and os.path.abspath(filename) == os.path.abspath(self.data_file)
+        with self.catalog_lock, (self.journal.lock if folds_journal else nullcontext()):
+            users = { user_id : user.to_dict() for user_id, user in self.users.items()}
+            loans = { str(loan.loan_id) : loan.to_dict() for loan in list(self.loans.loans.values())}
+            if filename.endswith(SNAPSHOT_SUFFIX):
+                # compact binary format, see binary_snapshot.py
+                from binary_snapshot import write_snapshot
+                write_snapshot(filename, self.books.values(), users, loans)
+            else:
+                data = {
+                    "books" : { isbn : book.to_dict() for isbn, book in self.books.items()},
+                    "users" : users,
+                    "loans" : loans
+                }
+                # write next to the target and rename so a crash never leaves a half-written snapshot
+                tmp = filename + ".tmp"
+                with open(tmp, "w") as f:
+                    json.dump(data, f, indent=2)
+                os.replace(tmp, filename)
+            if self.metrics is not None:
+                self.metrics.add_bytes("snapshot", os.path.getsize(filename))
+            # the snapshot now holds everything the journal recorded
+            if folds_journal:
+                self.journal.truncate()
+
+
+    def _load_snapshot(self, filename : str):
+        from binary_snapshot import SnapshotBookMap
+        snapshot = SnapshotBookMap(filename)
+        if self.storage is None and type(self.books) is dict and not self.books:
+            # nothing to merge into: serve books straight from the mapped file, decoding
+            # each on first use, and index the rows on the first search
+            self.books = snapshot
+            self.search_index.clear()
+            self.search_index.defer(snapshot.index_rows())
+            self.fuzzy_index = None
+            self.table_view = None
+        else:
+            for book in snapshot.values():
+                self._put_book(book)
+        meta = snapshot.meta()
+        if self.books is not snapshot:
+            snapshot.close()
+        for u in meta["users"].values():
+            self._put_user(u)
+        for l in meta["loans"].values():
+            self._open_loan(Loan(**l))
 
-        data = {
-            "books" : { isbn : vars(book) for isbn, book in self.books.items()},
-            "users" : { user_id : vars(user) for user_id, user in self.users.items()}
-        }
-        with open(filename, "w") as f:
-            json.dump(data, f, indent=2)
+# Load library data from a file
+    def load_data(self, filename = "library_data.json", streaming : bool = False, progress = None):
+        """Load the snapshot and replay its journal. With streaming=True (or a progress
+        callback) books are built one record at a time while the file is parsed, so the
+        whole JSON document is never held in memory and early records are usable at once.
+        For the file opened with open_shared() only what changed since the last sync is
+        applied, and its records win over unsaved local changes to them."""
+        if self._is_shared(filename):
+            self.shared.reload(theirs=True, progress=progress)
+            return
+        from binary_snapshot import is_snapshot
+        from shared_file import read_version
+        journal = journal_path(filename)
+        with self.catalog_lock, (self.storage.transaction() if self.storage is not None else nullcontext()):
+            if is_snapshot(filename):
+                self._load_snapshot(filename)
+                if progress is not None:
+                    progress(len(self.books), os.path.getsize(filename), os.path.getsize(filename))
+            elif (streaming or progress is not None) and os.path.exists(filename):
+                stream_load(self, filename, progress)
+            elif os.path.exists(filename) or not os.path.exists(journal):
+                with open(filename, "r") as f:
+                    data = json.load(f)
+                for isbn, b in data["books"].items():
+                    self._put_book(book_from_dict(b))
+                for u in data["users"].values():
+                    self._put_user(u)
+                for l in data.get("loans", {}).values():
+                    self._open_loan(Loan(**l))
+            # replay changes recorded since the snapshot was written
+            if os.path.exists(journal):
+                for rec in read_journal(journal):
+                    self._apply_record(rec)
+        if self._migrated_users and not (os.path.exists(filename) and read_version(filename)):
+            # plaintext passwords were hashed in memory; hash them in the files too, so they
+            # leave the disk (a shared file is rewritten by open_shared() instead)
+            self._migrated_users = 0
+            self._rehash_passwords(filename)
+
+    def _rehash_passwords(self, filename : str):
+        """Replace the plaintext passwords in filename's own user records, and in its journal's,
+        by hashes. Only those records change: what else is in memory (books or users added
+        before the load, or a storage backend's) stays out of the file until save_data()."""
+        from binary_snapshot import is_snapshot
+        # binary snapshots are written from User objects, which never hold plaintext
+        if os.path.exists(filename) and not is_snapshot(filename):
+            with open(filename, "r") as f:
+                data = json.load(f)
+            if _hash_user_records(data["users"].values()):
+                tmp = filename + ".tmp"
+                with open(tmp, "w") as f:
+                    json.dump(data, f, indent=2)
+                os.replace(tmp, filename)
+        journal = journal_path(filename)
+        if not os.path.exists(journal):
+            return
+        # our own journal takes appends meanwhile: hold it still from the read to the rewrite
+        own = self.journal is not None and os.path.abspath(self.journal.filename) == os.path.abspath(journal)
+        with (self.journal.lock if own else nullcontext()):
+            records = list(read_journal(journal))
+            if _hash_user_records(rec["user"] for rec in records if rec.get("op") == "add_user"):
+                if own:
+                    self.journal.rewrite(records)
+                else:
+                    rewrite_journal(journal, records)
 
 
-# Load library data from a file
-    def load_data(self, filename = "library_data.json"):
-        with open(filename, "r") as f:
-            data = json.load(f)
-        for isbn, b in data["books"].items():
-            if "pages" in b:
-                self.books[isbn] = PrintedBook(**b)
-            elif "file_size" in b:
-                self.books[isbn] = EBook(isbn=b['isbn'], title=b['title'], author=b['author'], file_size=b['file_size'])
-            else:
-                self.books[isbn] = Book(**b)
-        for user_id, u in data["users"].items():
-            self.users[user_id] = User(**u)
+def _hash_user_records(users) -> int:
+    """Hash the plaintext passwords of user record dicts in place; returns how many there were."""
+    changed = 0
+    for u in users:
+        if u.get("password") and not is_hashed(u["password"]):
+            u["password"] = hash_password(u["password"])
+            changed += 1
+    return changed
 
 # ====================================== End of Library Management System ======================================
 if __name__ == "__main__":
@@ -173,6 +838,8 @@ if __name__ == "__main__":
 
 
     lib.Login(admin)
+    # other processes may work on the same file; Save merges into it, Load picks up their saves
+    lib.open_shared("library_data.json")
 
     while True:
         print("\n============== Library Menu ==============")
@@ -194,7 +861,8 @@ if __name__ == "__main__":
             if choice == "1":
                 uid = input("Enter User ID: ").strip()
                 if uid in lib.users:
-                    lib.Login(lib.users[uid])
+                    pwd = input("Enter Password: ") if lib.users[uid].password else None
+                    lib.Login(lib.users[uid], lib.authenticate(uid, pwd))
                     print(f"Logged in as {lib.current_user}")
                 else:
                     print("User not found.")
@@ -203,13 +871,14 @@ if __name__ == "__main__":
                 title = input("Enter Title: ").strip()
                 author = input("Enter Author: ").strip()
                 kind = input("Enter Book Kind (printed/ebook): ").strip().lower()
+                copies = int(input("Enter Number of Copies [1]: ").strip() or 1)
                 if kind == "printed":
                     pages = int(input("Enter Number of Pages: "))
-                    lib.add_book(PrintedBook(isbn, title, author, pages))
+                    lib.add_book(PrintedBook(isbn, title, author, pages, copies))
                 
                 else:
                     size = float(input("Enter File Size (MB): "))
-                    lib.add_book(EBook(isbn, title, author, size))
+                    lib.add_book(EBook(isbn, title, author, size, copies))
                 print("Book added successfully.")
             elif choice == "3":
                 isbn = input("Enter ISBN to remove: ").strip()
@@ -221,9 +890,14 @@ if __name__ == "__main__":
                 lib.borrow_book(isbn, uid)
             elif choice == "5":
                 isbn = input("Enter ISBN to return: ").strip()
-                lib.return_book(isbn)
+                uid = input("Enter your User ID: ").strip()
+                lib.return_book(isbn, uid)
             elif choice == "6":
-                lib.show_all_books()
+                kind = input("Kind (printed/ebook, Enter for all): ").strip().lower()
+                kind = {"printed": "Printed", "ebook": "EBook"}.get(kind)
+                sort = input("Sort by (isbn/title/author/kind, Enter for catalogue order): ").strip().lower() or None
+                lib.show_all_books(page_size=20, kind=kind, sort=sort,
+                                   more=lambda: input("-- Enter for more, q to stop -- ").strip().lower() != "q")
             elif choice == "7":
                 keyword = input("Enter keyword to search: ").strip()
                 result = lib.search_books(keyword)
@@ -232,8 +906,8 @@ if __name__ == "__main__":
                 lib.save_data()
                 print("Data saved successfully.")
             elif choice == "9":
-                lib.load_data()
-                print("Data loaded successfully.")
+                result = lib.reload_changes(theirs=True)
+                print(f"Data loaded successfully ({result['changed']} changes).")
             elif choice == "10":
                 print("Exiting the system. Goodbye!")
                 break
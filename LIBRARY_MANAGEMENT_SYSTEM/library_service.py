@@ -0,0 +1,304 @@
+# ====================================== Library HTTP Service ======================================
+# A small asyncio HTTP/1.1 + JSON front end for LibraryManagementSystem (standard library only).
+# Usage: python library_service.py [--port 8080] [--data library_data.json] [--seed-books 100000]
+#
+#   POST   /login                {"user_id": "U1", "password": "..."}  -> {"token": "..."}
+#   POST   /logout
+#   GET    /books/search?q=river&offset=0&limit=50
+#   GET    /books/search?q=tolkein&fuzzy=2&limit=10                   (typo-tolerant, closest first)
+#   POST   /books                {"isbn": ..., "title": ..., "author": ..., "pages": 320, "copies": 2}
+#   POST   /books/bulk           {"books": [{...}, ...]}               (one add_books call)
+#   DELETE /books/<isbn>
+#   POST   /books/<isbn>/borrow  {"due_at": 1700000000}                (optional)
+#   POST   /books/<isbn>/return
+#   POST   /batch                {"requests": [{"method": "POST", "path": "/books/X/borrow", "body": {}}, ...]}
+#   GET    /changes?since=0&limit=1000                                 (change feed; 410 once since is too old)
+#
+# /login checks the password once and hands out a session token; every other call
+# takes "Authorization: Bearer <token>". Connections are kept alive (HTTP/1.1
+# default) and pipelined requests are answered in order.
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import re
+from typing import Dict, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from bulk_import import build_book
+from library_management_system import Book, LibraryManagementSystem, User
+
+REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden", 404: "Not Found",
+           405: "Method Not Allowed", 410: "Gone", 413: "Payload Too Large", 500: "Internal Server Error"}
+MAX_BODY = 64 * 2**20
+MAX_BATCH = 1000
+
+
+class HTTPError(Exception):
+    def __init__(self, status : int, message : str):
+        super().__init__(message)
+        self.status = status
+
+
+class LibraryService:
+    def __init__(self, lib : LibraryManagementSystem):
+        self.lib = lib
+        # borrow/return print receipts for the console menu; a server has no use for them
+        self._quiet = io.StringIO()
+        self.routes = [
+            ("POST", re.compile(r"^/login$"), self.login, False),
+            ("POST", re.compile(r"^/logout$"), self.logout, True),
+            ("GET", re.compile(r"^/books/search$"), self.search, True),
+            ("POST", re.compile(r"^/books/bulk$"), self.add_books, True),
+            ("POST", re.compile(r"^/books$"), self.add_book, True),
+            ("DELETE", re.compile(r"^/books/([^/]+)$"), self.remove_book, True),
+            ("POST", re.compile(r"^/books/([^/]+)/borrow$"), self.borrow, True),
+            ("POST", re.compile(r"^/books/([^/]+)/return$"), self.return_book, True),
+            ("POST", re.compile(r"^/batch$"), self.batch, True),
+            ("GET", re.compile(r"^/changes$"), self.changes, True),
+        ]
+
+    # ---- dispatch ----
+
+    def dispatch(self, method : str, target : str, headers : Dict[str, str], body) -> Tuple[int, object]:
+        """Run one request and return (status, JSON-able body); never raises."""
+        try:
+            url = urlsplit(target)
+            for route_method, pattern, handler, needs_auth in self.routes:
+                match = pattern.match(url.path)
+                if match is None:
+                    continue
+                if method != route_method:
+                    continue
+                token = self._token(headers)
+                user = self._user(token) if needs_auth else None
+                args = [unquote(g) for g in match.groups()]
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                if user is None:
+                    return 200, handler(token, query, body or {}, *args)
+                with self.lib.acting_as(user, token):
+                    return 200, handler(token, query, body or {}, *args)
+            if any(pattern.match(url.path) for _, pattern, _, _ in self.routes):
+                raise HTTPError(405, f"{method} not allowed on {url.path}")
+            raise HTTPError(404, f"No route for {url.path}")
+        except HTTPError as e:
+            return e.status, {"error": str(e)}
+        except PermissionError as e:
+            return 403, {"error": str(e)}
+        except KeyError as e:
+            return 404, {"error": str(e.args[0]) if e.args else "Not found"}
+        except (ValueError, TypeError) as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+    def _token(self, headers : Dict[str, str]) -> str:
+        auth = headers.get("authorization", "")
+        return auth[7:].strip() if auth[:7].lower() == "bearer " else None
+
+    def _user(self, token : str) -> User:
+        # the library's own session cache, so its role checks accept the same token
+        user_id = self.lib.sessions.user_for(token)
+        if user_id is None or user_id not in self.lib.users:
+            raise HTTPError(401, "Missing or expired session token.")
+        return self.lib.users[user_id]
+
+    # ---- handlers: (token, query, body, *path args) -> JSON-able ----
+
+    def login(self, token, query, body):
+        # same rule as the desktop login: accounts with a password must present it
+        try:
+            token = self.lib.authenticate(body.get("user_id"), body.get("password"))
+        except PermissionError as e:
+            raise HTTPError(401, str(e))
+        user = self.lib.users[body["user_id"]]
+        return {"token": token, "user_id": user.user_id, "role": user.role}
+
+    def logout(self, token, query, body):
+        self.lib.sessions.revoke(token)
+        return {"ok": True}
+
+    def search(self, token, query, body):
+        offset = max(0, int(query.get("offset", 0)))
+        limit = min(1000, max(0, int(query.get("limit", 50))))
+        if "fuzzy" in query:
+            books = self.lib.fuzzy_search(query.get("q", ""), int(query["fuzzy"] or 2), offset + limit)
+        else:
+            books = self.lib.search_books(query.get("q", ""))
+        return {"total": len(books), "offset": offset, "books": [b.to_dict() for b in books[offset:offset + limit]]}
+
+    @staticmethod
+    def _book(b : dict) -> Book:
+        # validated like an import row; a new book always starts with every copy on the shelf
+        return build_book(b.get("isbn"), b.get("title"), b.get("author"), b.get("kind"), b.get("pages"),
+                          b.get("file_size"), b.get("copies"))
+
+    def add_book(self, token, query, body):
+        book = self._book(body)
+        self.lib.add_book(book)
+        return book.to_dict()
+
+    def add_books(self, token, query, body):
+        return self.lib.add_books([self._book(b) for b in body.get("books", [])])
+
+    def remove_book(self, token, query, body, isbn):
+        self.lib.remove_book(isbn)
+        return {"ok": True}
+
+    def borrow(self, token, query, body, isbn):
+        user = self.lib.current_user
+        with contextlib.redirect_stdout(self._quiet):
+            loan = self.lib.borrow_book(isbn, user.user_id, body.get("due_at"))
+        self._quiet.seek(0)
+        self._quiet.truncate()
+        return loan.to_dict()
+
+    def return_book(self, token, query, body, isbn):
+        user = self.lib.current_user
+        with contextlib.redirect_stdout(self._quiet):
+            loan = self.lib.return_book(isbn, user.user_id)
+        self._quiet.seek(0)
+        self._quiet.truncate()
+        return loan.to_dict() if loan is not None else {"ok": True}
+
+    def batch(self, token, query, body):
+        """Run many requests in one round trip, in order, each with its own status."""
+        requests = body.get("requests", [])
+        if len(requests) > MAX_BATCH:
+            raise HTTPError(413, f"At most {MAX_BATCH} requests per batch.")
+        headers = {"authorization": f"Bearer {token}"}
+        responses = []
+        for req in requests:
+            path = urlsplit(req.get("path", "")).path
+            if path == "/batch":
+                responses.append({"status": 400, "body": {"error": "Batches cannot nest."}})
+                continue
+            if path == "/login":
+                # would hash passwords on the event loop, see handle_connection()
+                responses.append({"status": 400, "body": {"error": "Log in with POST /login, not in a batch."}})
+                continue
+            status, result = self.dispatch(req.get("method", "GET").upper(), req.get("path", ""), headers,
+                                           req.get("body"))
+            responses.append({"status": status, "body": result})
+        return {"responses": responses}
+
+    def changes(self, token, query, body):
+        """Library changes after version since, so a client view can catch up instead of re-reading."""
+        since = int(query.get("since", 0))
+        limit = min(10000, max(1, int(query.get("limit", 1000))))
+        try:
+            events = self.lib.events.since(since)
+        except LookupError as e:
+            raise HTTPError(410, str(e))
+        page = events[:limit]
+        return {"version": page[-1].version if page else max(since, self.lib.events.version),
+                "more": len(events) > limit,
+                "events": [{"version": e.version, "kind": e.kind, "key": e.key} for e in page]}
+
+    # ---- HTTP/1.1 ----
+
+    async def handle_connection(self, reader : asyncio.StreamReader, writer : asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Malformed request line."}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                length = int(headers.get("content-length", 0) or 0)
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, {"error": "Request body too large."}, False)
+                    break
+                body = None
+                if length:
+                    raw = await reader.readexactly(length)
+                    try:
+                        body = json.loads(raw)
+                    except ValueError:
+                        await self._respond(writer, 400, {"error": "Body is not valid JSON."}, keep_alive)
+                        if keep_alive:
+                            continue
+                        break
+                    if not isinstance(body, dict):
+                        await self._respond(writer, 400, {"error": "Body must be a JSON object."}, keep_alive)
+                        if keep_alive:
+                            continue
+                        break
+                if method.upper() == "POST" and urlsplit(target).path == "/login":
+                    # scrypt takes tens of milliseconds and releases the GIL: run it on a worker
+                    # thread so other connections are served (and other logins hash) meanwhile
+                    status, result = await asyncio.get_running_loop().run_in_executor(
+                        None, self.dispatch, "POST", target, headers, body)
+                else:
+                    status, result = self.dispatch(method.upper(), target, headers, body)
+                await self._respond(writer, status, result, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+    async def _respond(self, writer, status : int, result, keep_alive : bool):
+        payload = json.dumps(result).encode()
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + payload)
+        await writer.drain()
+
+    async def serve(self, host : str = "127.0.0.1", port : int = 8080, backlog : int = 4096):
+        server = await asyncio.start_server(self.handle_connection, host, port, backlog=backlog)
+        print(f"Library service listening on http://{host}:{port}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the library over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--data", default="library_data.json", help="library file to load if it exists (\"\" for none)")
+    parser.add_argument("--seed-books", type=int, default=0, help="add N synthetic books (for load tests)")
+    args = parser.parse_args()
+
+    lib = LibraryManagementSystem()
+    if args.data and os.path.exists(args.data):
+        lib.load_data(args.data)
+    # same default accounts as the desktop UI when the file brings none
+    if "U1" not in lib.users:
+        lib.users["U1"] = User("U1", "Ravindra", role="Admin", password="admin123")
+    if "U2" not in lib.users:
+        lib.users["U2"] = User("U2", "Vinod", role="member")
+    if args.seed_books:
+        from bench_suite import synthetic_books
+        # seeding is local setup, not a client request, so no password round trip
+        with lib.acting_as(lib.users["U1"], lib.sessions.issue("U1")):
+            lib.add_books(synthetic_books(args.seed_books))
+        lib.search_index.flush()
+    try:
+        asyncio.run(LibraryService(lib).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
+
+# ====================================== End of Library HTTP Service ======================================
@@ -0,0 +1,87 @@
+# ====================================== Live Search ======================================
+from typing import Callable, List, Optional, Tuple
+
+# match ranks, best first
+EXACT_ISBN, TITLE_PREFIX, AUTHOR, SUBSTRING = range(4)
+
+
+class LiveSearch:
+    """Ranked search behind the search-as-you-type box.
+
+    Results are ordered exact ISBN first, then title prefix, then author
+    matches, then any other title substring, in catalogue order within each
+    rank; when nothing contains the keyword, typo-tolerant matches from
+    fuzzy_search are offered instead, closest first. The matches of the
+    previous query are kept: when the user extends it, the new keyword can
+    only match a subset of them, so they are filtered instead of searching
+    the whole catalogue again. invalidate() drops them after the catalogue
+    changes.
+
+    search() may run on a worker thread; check() is called every few thousand
+    candidates so a stale query can be abandoned mid-way.
+    """
+
+    CHECK_EVERY = 4096
+    FUZZY_LIMIT = 50
+
+    def __init__(self, lib):
+        self.lib = lib
+        # (lowered keyword, matching isbns in catalogue order) of the last query
+        self.last : Optional[Tuple[str, List[str]]] = None
+
+    def invalidate(self):
+        self.last = None
+
+    def _fields(self, isbn : str) -> Optional[Tuple[str, str]]:
+        index = self.lib.search_index
+        if index is not None:
+            return index.fields.get(isbn)
+        book = self.lib.books.get(isbn)
+        return (book.title.lower(), book.author.lower()) if book is not None else None
+
+    def matches(self, keyword : str, check : Callable[[], None] = None) -> List[str]:
+        """ISBNs whose title or author contains keyword, in catalogue order."""
+        key = keyword.lower()
+        last = self.last
+        if last is not None and last[0] in key:
+            found = []
+            for i, isbn in enumerate(last[1]):
+                if check is not None and i % self.CHECK_EVERY == 0:
+                    check()
+                fields = self._fields(isbn)
+                if fields is not None and (key in fields[0] or key in fields[1]):
+                    found.append(isbn)
+        else:
+            found = [book.isbn for book in self.lib.search_books(keyword)]
+        self.last = (key, found)
+        return found
+
+    def search(self, keyword : str, check : Callable[[], None] = None) -> List[str]:
+        """Ranked ISBNs for keyword; an empty keyword matches nothing."""
+        keyword = keyword.strip()
+        if not keyword:
+            return []
+        key = keyword.lower()
+        ranks : Tuple[List[str], ...] = ([], [], [], [])
+        if keyword in self.lib.books:
+            ranks[EXACT_ISBN].append(keyword)
+        for i, isbn in enumerate(self.matches(keyword, check)):
+            if check is not None and i % self.CHECK_EVERY == 0:
+                check()
+            if isbn == keyword:
+                continue
+            fields = self._fields(isbn)
+            if fields is None:
+                continue
+            if fields[0].startswith(key):
+                ranks[TITLE_PREFIX].append(isbn)
+            elif key in fields[1]:
+                ranks[AUTHOR].append(isbn)
+            else:
+                ranks[SUBSTRING].append(isbn)
+        found = ranks[EXACT_ISBN] + ranks[TITLE_PREFIX] + ranks[AUTHOR] + ranks[SUBSTRING]
+        if not found and len(key) >= 3:
+            found = [book.isbn for book in self.lib.fuzzy_search(keyword, limit=self.FUZZY_LIMIT)]
+        return found
+
+# ====================================== End of Live Search ======================================
@@ -0,0 +1,174 @@
+# ====================================== Library Service Load Test ======================================
+# Drives library_service.py with thousands of concurrent keep-alive clients and
+# reports throughput and latency percentiles.
+# Usage: python load_test.py [--clients 2000] [--duration 10] [--books 20000]
+#        python load_test.py --host 127.0.0.1 --port 8080     (use a service that is already running)
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+from typing import List
+
+from bench_suite import WORDS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class Client:
+    """One keep-alive HTTP/1.1 connection that sends a request and waits for its answer."""
+
+    def __init__(self, host : str, port : int):
+        self.host = host
+        self.port = port
+        self.token = None
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method : str, path : str, body : dict = None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(payload)}\r\n"
+        if self.token:
+            head += f"Authorization: Bearer {self.token}\r\n"
+        self.writer.write(head.encode("latin-1") + b"\r\n" + payload)
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length)) if length else None
+
+    async def login(self, user_id : str, password : str = None):
+        status, body = await self.request("POST", "/login", {"user_id": user_id, "password": password})
+        if status != 200:
+            raise RuntimeError(f"login failed: {body}")
+        self.token = body["token"]
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def run_client(client : Client, isbns : List[str], deadline : float, rnd : random.Random,
+                     latencies : dict, errors : dict):
+    """Loop until deadline over a search-heavy mix: 70% search, 15% borrow, 15% return."""
+    held = []
+    while time.perf_counter() < deadline:
+        roll = rnd.random()
+        if roll < 0.70:
+            op, method, path = "search", "GET", f"/books/search?q={rnd.choice(WORDS)}&limit=20"
+        elif roll < 0.85 or not held:
+            isbn = rnd.choice(isbns)
+            op, method, path = "borrow", "POST", f"/books/{isbn}/borrow"
+        else:
+            isbn = held.pop()
+            op, method, path = "return", "POST", f"/books/{isbn}/return"
+        start = time.perf_counter()
+        status, _ = await client.request(method, path, {} if method == "POST" else None)
+        latencies[op].append(time.perf_counter() - start)
+        if status != 200:
+            # a busy copy is an expected 400, not a failure of the service
+            errors[op] = errors.get(op, 0) + 1
+        elif op == "borrow":
+            held.append(isbn)
+
+
+def percentile(values : List[float], p : float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def load_test(host : str, port : int, clients : int, duration : float, books : int, seed : int) -> dict:
+    rnd = random.Random(seed)
+    isbns = [f"978{i:010d}" for i in range(books)]
+    conns = [Client(host, port) for _ in range(clients)]
+    # connect and log in in waves so the listen backlog is not the thing being measured
+    for i in range(0, clients, 500):
+        wave = conns[i:i + 500]
+        await asyncio.gather(*(c.connect() for c in wave))
+        await asyncio.gather(*(c.login("U2") for c in wave))
+    latencies = {"search": [], "borrow": [], "return": []}
+    errors = {}
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(run_client(c, isbns, deadline, random.Random(rnd.random()), latencies, errors)
+                           for c in conns))
+    elapsed = time.perf_counter() - start
+    for c in conns:
+        c.close()
+    every = [x for values in latencies.values() for x in values]
+    return {
+        "clients": clients,
+        "seconds": round(elapsed, 2),
+        "requests": len(every),
+        "throughput_rps": round(len(every) / elapsed, 1),
+        "p50_ms": round(percentile(every, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(every, 0.99) * 1000, 2),
+        "by_operation": {op: {"requests": len(v), "p50_ms": round(percentile(v, 0.50) * 1000, 2),
+                              "p99_ms": round(percentile(v, 0.99) * 1000, 2), "non_200": errors.get(op, 0)}
+                         for op, v in latencies.items()},
+    }
+
+
+def start_service(port : int, books : int) -> subprocess.Popen:
+    """Launch library_service.py with a synthetic catalogue and wait until it listens."""
+    proc = subprocess.Popen([sys.executable, os.path.join(HERE, "library_service.py"), "--port", str(port),
+                             "--data", "", "--seed-books", str(books)],
+                            stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if "listening" not in line:
+        proc.kill()
+        raise RuntimeError("library service did not start")
+    return proc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the library HTTP service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="existing service to test (default: start one)")
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load after every client is in")
+    parser.add_argument("--books", type=int, default=20000, help="synthetic books to seed a started service with")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default=None, help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    # every client is one socket, on top of whatever else the process has open
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < args.clients + 100:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, args.clients + 100), hard))
+
+    proc = None
+    port = args.port
+    if port is None:
+        port = 8765
+        proc = start_service(port, args.books)
+    try:
+        report = asyncio.run(load_test(args.host, port, args.clients, args.duration, args.books, args.seed))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
+
+# ====================================== End of Library Service Load Test ======================================
@@ -0,0 +1,144 @@
+# ====================================== Loan Ledger ======================================
+import bisect
+import threading
+import time
+from typing import Dict, List, Tuple
+
+
+class Loan:
+    __slots__ = ("loan_id", "isbn", "user_id", "borrowed_at", "due_at", "copy_id")
+
+    def __init__(self, loan_id : int, isbn : str, user_id : str, borrowed_at : float, due_at : float,
+                 copy_id : int = None):
+        self.loan_id = loan_id
+        self.isbn = isbn
+        self.user_id = user_id
+        self.borrowed_at = borrowed_at  # unix timestamps
+        self.due_at = due_at
+        # which copy of the title is out; None for loans recorded before copies had ids
+        self.copy_id = copy_id
+
+    def __repr__(self):
+        due = time.strftime("%Y-%m-%d", time.localtime(self.due_at))
+        copy = f" copy {self.copy_id}" if self.copy_id is not None else ""
+        return f"Loan {self.loan_id}: {self.isbn}{copy} held by {self.user_id}, due {due}"
+
+    def to_dict(self) -> dict:
+        return {"loan_id": self.loan_id, "isbn": self.isbn, "user_id": self.user_id,
+                "borrowed_at": self.borrowed_at, "due_at": self.due_at, "copy_id": self.copy_id}
+
+
+class LoanLedger:
+    """Active loans with secondary indexes by user and by ISBN, plus a list
+    sorted on due date, so holder/holdings lookups are O(1) and the overdue
+    query is a binary search followed by a slice.
+
+    New loans are numbered first_id, first_id + step, ...; ledgers that are
+    merged later (one per shard) use different first_ids with a common step,
+    so their loan ids never collide."""
+
+    def __init__(self, first_id : int = 1, step : int = 1):
+        self.loans : Dict[int, Loan] = {}
+        self.by_user : Dict[str, Dict[int, Loan]] = {}
+        self.by_isbn : Dict[str, Dict[int, Loan]] = {}
+        # (due_at, loan_id), kept sorted
+        self.due : List[Tuple[float, int]] = []
+        self.first_id = first_id
+        self.step = step
+        self.next_id = first_id
+        # borrows on different ISBNs run in parallel, the shared indexes need their own lock
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.loans)
+
+    def open(self, isbn : str, user_id : str, borrowed_at : float, due_at : float, loan_id : int = None,
+             copy_id : int = None) -> Loan:
+        with self.lock:
+            if loan_id is None:
+                loan_id = self.next_id
+            self._advance(loan_id)
+            loan = Loan(loan_id, isbn, user_id, borrowed_at, due_at, copy_id)
+            self._add(loan)
+        return loan
+
+    def _advance(self, loan_id : int):
+        # next id of this ledger's sequence above loan_id
+        if loan_id >= self.next_id:
+            self.next_id = loan_id + 1 + (self.first_id - loan_id - 1) % self.step
+
+    def renumber(self, first_id : int, step : int) -> List[Loan]:
+        """Switch to the sequence first_id, first_id + step, ... and move loans whose ids are
+        outside it onto new ones; returns the moved loans."""
+        with self.lock:
+            self.first_id, self.step, self.next_id = first_id, step, first_id
+            for loan_id in self.loans:
+                self._advance(loan_id)
+            moved = [loan for loan_id, loan in self.loans.items() if (loan_id - first_id) % step]
+            for loan in moved:
+                self._remove(loan.loan_id)
+                loan.loan_id = self.next_id
+                self._add(loan)
+        return moved
+
+    def add(self, loan : Loan):
+        with self.lock:
+            self._add(loan)
+
+    def _add(self, loan : Loan):
+        if loan.loan_id in self.loans:
+            # replaying a journal over a snapshot that already has this loan
+            return
+        self._advance(loan.loan_id)
+        self.loans[loan.loan_id] = loan
+        self.by_user.setdefault(loan.user_id, {})[loan.loan_id] = loan
+        self.by_isbn.setdefault(loan.isbn, {})[loan.loan_id] = loan
+        bisect.insort(self.due, (loan.due_at, loan.loan_id))
+
+    def close(self, isbn : str, user_id : str = None) -> Loan:
+        """End the oldest loan of isbn (held by user_id, if given); returns None when there is none."""
+        with self.lock:
+            for loan in self.by_isbn.get(isbn, {}).values():
+                if user_id is None or loan.user_id == user_id:
+                    return self._remove(loan.loan_id)
+        return None
+
+    def remove(self, loan_id : int) -> Loan:
+        with self.lock:
+            return self._remove(loan_id)
+
+    def _remove(self, loan_id : int) -> Loan:
+        loan = self.loans.pop(loan_id, None)
+        if loan is None:
+            return None
+        for index, key in ((self.by_user, loan.user_id), (self.by_isbn, loan.isbn)):
+            bucket = index[key]
+            del bucket[loan_id]
+            if not bucket:
+                del index[key]
+        i = bisect.bisect_left(self.due, (loan.due_at, loan_id))
+        del self.due[i]
+        return loan
+
+    def held_by(self, user_id : str) -> List[Loan]:
+        return list(self.by_user.get(user_id, {}).values())
+
+    def holders(self, isbn : str) -> List[Loan]:
+        return list(self.by_isbn.get(isbn, {}).values())
+
+    def overdue(self, now : float = None) -> List[Loan]:
+        """Loans whose due time is before now, most overdue first."""
+        if now is None:
+            now = time.time()
+        with self.lock:
+            end = bisect.bisect_left(self.due, (now,))
+            return [self.loans[loan_id] for _, loan_id in self.due[:end]]
+
+    def clear(self):
+        with self.lock:
+            self.loans.clear()
+            self.by_user.clear()
+            self.by_isbn.clear()
+            self.due.clear()
+
+# ====================================== End of Loan Ledger ======================================
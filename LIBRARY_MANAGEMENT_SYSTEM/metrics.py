@@ -0,0 +1,173 @@
+# ====================================== Library Metrics ======================================
+import bisect
+import json
+import threading
+import time
+from functools import wraps
+from typing import Dict, List
+
+# upper bounds in seconds; anything slower lands in the implicit +Inf bucket
+LATENCY_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+RESULT_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 100000)
+
+# public LibraryManagementSystem operations that get instrumented
+OPERATIONS = ("fetch_all_books", "show_all_books", "authenticate", "Login", "add_book", "add_books", "add_copies",
+              "remove_book", "borrow_book", "return_book", "search_books", "fuzzy_search", "add_user", "books_held_by",
+              "who_holds", "overdue_loans", "compact", "save_data", "load_data")
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value : float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        total, out = 0, []
+        for c in self.counts:
+            total += c
+            out.append(total)
+        return out
+
+    def to_dict(self) -> dict:
+        return {"buckets": dict(zip([str(b) for b in self.bounds] + ["+Inf"], self.cumulative())),
+                "sum": self.sum, "count": self.count}
+
+
+class LibraryMetrics:
+    """Call counts, error counts and latency histograms per operation, search result
+    sizes, bytes written by persistence and library changes by kind (fed by the change
+    bus, so bulk imports and borrows count per book). Readable in-process through
+    snapshot(), or dumped with to_prometheus() / to_json()."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls : Dict[str, int] = {}
+        self.errors : Dict[str, int] = {}
+        self.latency : Dict[str, Histogram] = {}
+        self.search_results = Histogram(RESULT_BUCKETS)
+        self.bytes_written : Dict[str, int] = {}
+        self.changes : Dict[str, int] = {}
+
+    def observe_call(self, operation : str, seconds : float, failed : bool):
+        with self.lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            if failed:
+                self.errors[operation] = self.errors.get(operation, 0) + 1
+            hist = self.latency.get(operation)
+            if hist is None:
+                hist = self.latency[operation] = Histogram(LATENCY_BUCKETS)
+            hist.observe(seconds)
+
+    def observe_results(self, count : int):
+        with self.lock:
+            self.search_results.observe(count)
+
+    def add_bytes(self, target : str, count : int):
+        with self.lock:
+            self.bytes_written[target] = self.bytes_written.get(target, 0) + count
+
+    def observe_changes(self, events : list):
+        """Change-bus subscriber: count events by kind."""
+        with self.lock:
+            for event in events:
+                self.changes[event.kind] = self.changes.get(event.kind, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "calls": dict(self.calls),
+                "errors": dict(self.errors),
+                "latency_seconds": {op: h.to_dict() for op, h in self.latency.items()},
+                "search_results": self.search_results.to_dict(),
+                "bytes_written": dict(self.bytes_written),
+                "changes": dict(self.changes),
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Render everything in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines = ["# HELP library_operation_calls_total Calls per library operation.",
+                 "# TYPE library_operation_calls_total counter"]
+        lines += [f'library_operation_calls_total{{operation="{op}"}} {n}' for op, n in snap["calls"].items()]
+        lines += ["# HELP library_operation_errors_total Calls that raised, per library operation.",
+                  "# TYPE library_operation_errors_total counter"]
+        lines += [f'library_operation_errors_total{{operation="{op}"}} {n}' for op, n in snap["errors"].items()]
+        lines += ["# HELP library_operation_seconds Latency of library operations.",
+                  "# TYPE library_operation_seconds histogram"]
+        for op, hist in snap["latency_seconds"].items():
+            lines += _histogram_lines("library_operation_seconds", f'operation="{op}"', hist)
+        lines += ["# HELP library_search_results Number of books returned by search_books.",
+                  "# TYPE library_search_results histogram"]
+        lines += _histogram_lines("library_search_results", "", snap["search_results"])
+        lines += ["# HELP library_bytes_written_total Bytes written by persistence.",
+                  "# TYPE library_bytes_written_total counter"]
+        lines += [f'library_bytes_written_total{{target="{t}"}} {n}' for t, n in snap["bytes_written"].items()]
+        lines += ["# HELP library_changes_total Library changes by kind.",
+                  "# TYPE library_changes_total counter"]
+        lines += [f'library_changes_total{{kind="{k}"}} {n}' for k, n in snap["changes"].items()]
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(name : str, labels : str, hist : dict) -> List[str]:
+    sep = "," if labels else ""
+    lines = [f'{name}_bucket{{{labels}{sep}le="{le}"}} {n}' for le, n in hist["buckets"].items()]
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {hist['sum']}")
+    lines.append(f"{name}_count{suffix} {hist['count']}")
+    return lines
+
+
+def instrument(lib, metrics : LibraryMetrics):
+    """Shadow lib's public operations with timing wrappers on the instance itself.
+
+    Nothing is wrapped at class level, so a library without metrics pays nothing,
+    and uninstrument() restores it by deleting the instance attributes.
+    """
+    for name in OPERATIONS:
+        method = getattr(lib, name, None)
+        if method is None:
+            continue
+        setattr(lib, name, _timed(name, method, metrics))
+    events = getattr(lib, "events", None)
+    if events is not None:
+        lib._metrics_subscription = events.subscribe(metrics.observe_changes)
+
+
+def uninstrument(lib):
+    for name in OPERATIONS:
+        lib.__dict__.pop(name, None)
+    subscription = lib.__dict__.pop("_metrics_subscription", None)
+    if subscription is not None:
+        lib.events.unsubscribe(subscription)
+
+
+def _timed(name : str, method, metrics : LibraryMetrics):
+    counts_results = name == "search_books"
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = method(*args, **kwargs)
+        except BaseException:
+            metrics.observe_call(name, time.perf_counter() - start, True)
+            raise
+        metrics.observe_call(name, time.perf_counter() - start, False)
+        if counts_results:
+            metrics.observe_results(len(result))
+        return result
+    return wrapper
+
+# ====================================== End of Library Metrics ======================================
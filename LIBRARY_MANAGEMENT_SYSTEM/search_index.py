@@ -0,0 +1,160 @@
+# ====================================== Book Search Index ======================================
+from itertools import chain
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+class BookSearchIndex:
+    """Character n-gram index over book titles and authors.
+
+    Every title and author is lowercased and broken into its n-grams (trigrams
+    by default). A keyword of n or more characters intersects the postings of
+    its n-grams and only the surviving candidates get a real substring check.
+    A shorter keyword is answered from the postings of every indexed n-gram
+    that contains it (found through a small map over the n-gram vocabulary),
+    plus the few books whose title or author is itself shorter than n.
+
+    Bulk loads can defer() whole batches; they are indexed in one pass the
+    next time the index is searched or changed.
+    """
+
+    def __init__(self, n: int = 3):
+        self.n = n
+        self.grams: Dict[str, Set[str]] = {}
+        # every substring shorter than n -> the indexed n-grams that contain it
+        self.short: Dict[str, Set[str]] = {}
+        # books with a title or author too short to produce an n-gram
+        self.short_fields: Set[str] = set()
+        # isbn -> (lowered title, lowered author), used to verify candidates
+        self.fields: Dict[str, Tuple[str, str]] = {}
+        # isbn -> insertion sequence so results come back in catalogue order
+        self.order: Dict[str, int] = {}
+        self._seq = 0
+        # batches queued by defer() and not yet indexed
+        self.pending: List = []
+
+    def __len__(self):
+        self.flush()
+        return len(self.fields)
+
+    def __contains__(self, isbn: str):
+        self.flush()
+        return isbn in self.fields
+
+    def _grams_of(self, title: str, author: str) -> Set[str]:
+        n = self.n
+        grams = {title[i:i + n] for i in range(len(title) - n + 1)}
+        grams.update(author[i:i + n] for i in range(len(author) - n + 1))
+        return grams
+
+    def _new_gram(self, gram: str):
+        short = self.short
+        for size in range(1, self.n):
+            for i in range(self.n - size + 1):
+                short.setdefault(gram[i:i + size], set()).add(gram)
+
+    def _drop_gram(self, gram: str):
+        del self.grams[gram]
+        for size in range(1, self.n):
+            for i in range(self.n - size + 1):
+                sub = gram[i:i + size]
+                containing = self.short.get(sub)
+                if containing is not None:
+                    containing.discard(gram)
+                    if not containing:
+                        del self.short[sub]
+
+    def defer(self, books: Iterable):
+        """Queue a batch of books to be indexed on the next search or change.
+        The batch is only iterated then, so it may be a lazy source."""
+        self.pending.append(books)
+
+    def flush(self):
+        if self.pending:
+            pending, self.pending = self.pending, []
+            self.add_many(chain.from_iterable(pending))
+
+    def add(self, book):
+        """Index a single book (re-indexes it if the ISBN is already present)."""
+        self.add_many((book,))
+
+    def add_many(self, books: Iterable):
+        """Index a batch of books in one pass."""
+        self.flush()
+        grams, fields, order, n = self.grams, self.fields, self.order, self.n
+        for book in books:
+            isbn = book.isbn
+            seq = order.get(isbn)
+            if seq is None:
+                seq = self._seq
+                self._seq += 1
+            else:
+                # replacing a dict value keeps its position, so keep the old sequence too
+                self.remove(isbn)
+            title, author = book.title.lower(), book.author.lower()
+            fields[isbn] = (title, author)
+            order[isbn] = seq
+            if len(title) < n or len(author) < n:
+                self.short_fields.add(isbn)
+            for gram in self._grams_of(title, author):
+                posting = grams.get(gram)
+                if posting is None:
+                    grams[gram] = {isbn}
+                    self._new_gram(gram)
+                else:
+                    posting.add(isbn)
+
+    def remove(self, isbn: str):
+        self.flush()
+        fields = self.fields.pop(isbn, None)
+        if fields is None:
+            return
+        del self.order[isbn]
+        self.short_fields.discard(isbn)
+        for gram in self._grams_of(*fields):
+            posting = self.grams.get(gram)
+            if posting is not None:
+                posting.discard(isbn)
+                if not posting:
+                    self._drop_gram(gram)
+
+    def clear(self):
+        self.pending.clear()
+        self.grams.clear()
+        self.short.clear()
+        self.short_fields.clear()
+        self.fields.clear()
+        self.order.clear()
+
+    def search(self, keyword: str) -> List[str]:
+        """Return ISBNs whose title or author contains keyword (case-insensitive)."""
+        self.flush()
+        keyword = keyword.lower()
+        fields = self.fields
+        if not keyword:
+            candidates = fields.keys()
+        elif len(keyword) < self.n:
+            # any n-gram containing the keyword proves a match, no verification needed
+            candidates = set()
+            for gram in self.short.get(keyword, ()):
+                candidates |= self.grams[gram]
+            candidates.update(isbn for isbn in self.short_fields
+                              if keyword in fields[isbn][0] or keyword in fields[isbn][1])
+        else:
+            postings = []
+            for i in range(len(keyword) - self.n + 1):
+                posting = self.grams.get(keyword[i:i + self.n])
+                if not posting:
+                    return []
+                postings.append(posting)
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates &= posting
+                if not candidates:
+                    return []
+            if len(keyword) > self.n:
+                candidates = [isbn for isbn in candidates
+                              if keyword in fields[isbn][0] or keyword in fields[isbn][1]]
+        return sorted(candidates, key=self.order.__getitem__)
+
+# ====================================== End of Book Search Index ======================================
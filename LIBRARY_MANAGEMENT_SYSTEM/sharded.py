@@ -0,0 +1,273 @@
+# ====================================== Sharded Library ======================================
+# Runs N LibraryManagementSystem instances in worker processes, each owning the
+# books whose ISBN hashes to it, so catalogue work is spread over N cores.
+#   with ShardedLibrary(shards=4, data_dir="library_shards") as lib:
+#       lib.Login(lib.users["U1"], lib.authenticate("U1", password))
+#       lib.add_book(PrintedBook(...)); lib.borrow_book(isbn, "U2"); lib.search_books("river")
+#       lib.save_data()          # every shard writes library_shards/shard-NN.json
+import heapq
+import multiprocessing
+import os
+import threading
+import zlib
+from typing import Dict, List
+
+from library_management_system import LibraryManagementSystem, Book, PrintedBook, EBook, User, set_availability
+from journal import journal_path
+from loans import Loan
+
+# operations a shard will run for the router; anything else is refused
+SHARD_OPERATIONS = {"add_book", "add_books", "add_copies", "remove_book", "borrow_book", "return_book",
+                    "search_books", "fetch_all_books", "add_user", "books_held_by", "who_holds",
+                    "overdue_loans", "save_data", "load_data", "compact", "count", "users", "grant"}
+# results that can hold a large share of the catalogue travel as plain tuples, which
+# pickle several times faster than slotted Book objects
+ROW_RESULTS = {"search_books", "fetch_all_books"}
+
+
+def shard_of(isbn : str, shards : int) -> int:
+    """Owning shard of an ISBN. crc32 rather than hash(), which is salted per process."""
+    return zlib.crc32(isbn.encode("utf-8")) % shards
+
+
+def book_to_row(book : Book) -> tuple:
+    kind, extra = ("printed", book.pages) if isinstance(book, PrintedBook) else \
+                  ("ebook", book.file_size) if isinstance(book, EBook) else ("book", None)
+    return (book.isbn, book.title, book.author, kind, extra, book.copies, book.available, book.free)
+
+
+def book_from_row(row : tuple) -> Book:
+    isbn, title, author, kind, extra, copies, available, free = row
+    if kind == "printed":
+        book = PrintedBook(isbn, title, author, extra, copies)
+    elif kind == "ebook":
+        book = EBook(isbn, title, author, extra, copies)
+    else:
+        book = Book(isbn, title, author, copies)
+    set_availability(book, available, free)
+    return book
+
+
+def _serve_shard(conn, data_file : str, journal : bool, index : int, shards : int):
+    """Worker process: one LibraryManagementSystem answering (op, user, args, kwargs) requests."""
+    lib = LibraryManagementSystem()
+    lib.data_file = data_file
+    if os.path.exists(data_file) or os.path.exists(journal_path(data_file)):
+        lib.load_data(data_file)
+    # shard i numbers its loans i+1, i+1+shards, ..., so merged listings never repeat an id
+    if lib.loans.renumber(index + 1, shards):
+        # loans saved before shards had their own numbers: write the new ones out at once,
+        # which also folds in the journal, whose records name the old ones
+        lib.save_data(data_file)
+        if os.path.exists(journal_path(data_file)):
+            open(journal_path(data_file), "w").close()
+    if journal:
+        lib.open_journal(data_file)
+    while True:
+        try:
+            op, user, token, args, kwargs = conn.recv()
+        except (EOFError, OSError):
+            break
+        if op == "close":
+            lib.close_journal()
+            conn.send(("ok", None))
+            break
+        try:
+            if op not in SHARD_OPERATIONS:
+                raise ValueError(f"Unknown shard operation {op!r}.")
+            if op == "count":
+                result = len(lib.books)
+            elif op == "users":
+                result = dict(lib.users)
+            elif op == "grant":
+                # the router already verified the password; open the matching session here
+                result = lib.sessions.issue(args[0])
+            else:
+                with lib.acting_as(user, token):
+                    result = getattr(lib, op)(*args, **kwargs)
+                if op in ROW_RESULTS:
+                    result = [book_to_row(b) for b in result]
+        except Exception as e:
+            conn.send(("error", e))
+        else:
+            conn.send(("ok", result))
+    conn.close()
+
+
+class ShardedLibrary:
+    """LibraryManagementSystem front end whose books are partitioned across worker processes.
+
+    Point operations (add/remove/borrow/return/add_copies/who_holds) go to the
+    shard that owns the ISBN; searches and listings are sent to every shard at
+    once and merged, so shards work in parallel. Users are replicated to every
+    shard, because each one checks roles and borrowers on its own. Each shard
+    loads and saves its own data file in data_dir (and journals to it with
+    journal=True). Books and loans handed back are copies from the worker.
+    """
+
+    def __init__(self, shards : int = 4, data_dir : str = "library_shards", journal : bool = False,
+                 start_method : str = None):
+        self.shards = shards
+        self.data_dir = data_dir
+        os.makedirs(data_dir, exist_ok=True)
+        ctx = multiprocessing.get_context(start_method)
+        self.conns = []
+        self.procs = []
+        # one request/response exchange at a time per pipe
+        self.locks = [threading.Lock() for _ in range(shards)]
+        for i in range(shards):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_serve_shard, args=(child, self.shard_file(i), journal, i, shards),
+                               name=f"library-shard-{i}", daemon=True)
+            proc.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(proc)
+        self.current_user : User = None
+        # one session token per shard, see authenticate()
+        self.current_token : tuple = None
+        # every shard holds the same users; shard 0 speaks for them
+        self.users : Dict[str, User] = self._call(0, "users")
+
+    def shard_file(self, index : int) -> str:
+        return os.path.join(self.data_dir, f"shard-{index:02d}.json")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- transport ----
+
+    def _token(self, index : int) -> str:
+        return self.current_token[index] if self.current_token else None
+
+    def _call(self, index : int, op : str, *args, **kwargs):
+        with self.locks[index]:
+            self.conns[index].send((op, self.current_user, self._token(index), args, kwargs))
+            status, value = self.conns[index].recv()
+        if status == "error":
+            raise value
+        return value
+
+    def _scatter(self, op : str, shard_args : List[tuple], kwargs : dict = None) -> List:
+        """Send op (with each shard's own args) to every shard before waiting on any,
+        then collect the answers in shard order."""
+        for lock in self.locks:
+            lock.acquire()
+        try:
+            for i, (conn, args) in enumerate(zip(self.conns, shard_args)):
+                conn.send((op, self.current_user, self._token(i), args, kwargs or {}))
+            replies = [conn.recv() for conn in self.conns]
+        finally:
+            for lock in self.locks:
+                lock.release()
+        for status, value in replies:
+            if status == "error":
+                raise value
+        return [value for _, value in replies]
+
+    def _broadcast(self, op : str, *args, **kwargs) -> List:
+        return self._scatter(op, [args] * self.shards, kwargs)
+
+    def _route(self, isbn : str, op : str, *args, **kwargs):
+        return self._call(shard_of(isbn, self.shards), op, isbn, *args, **kwargs)
+
+    # ---- library API ----
+
+    def authenticate(self, user_id : str, password : str = None) -> tuple:
+        """Verify the password once here and open a session on every shard;
+        returns the per-shard tokens to pass to Login()."""
+        user = self.users.get(user_id)
+        if user is None or not user.check_password(password):
+            raise PermissionError("Unknown user or wrong password.")
+        return tuple(self._broadcast("grant", user_id))
+
+    def Login(self, user : User, token : tuple = None):
+        self.current_user = user
+        self.current_token = token
+
+    def add_user(self, user : User):
+        self._broadcast("add_user", user)
+        self.users[user.user_id] = user
+
+    def add_book(self, book : Book):
+        return self._call(shard_of(book.isbn, self.shards), "add_book", book)
+
+    def add_books(self, books, batch_size : int = 10000) -> dict:
+        """Partition books by shard and load the partitions in parallel."""
+        parts : List[List[Book]] = [[] for _ in range(self.shards)]
+        for book in books:
+            parts[shard_of(book.isbn, self.shards)].append(book)
+        report = {"added": 0, "duplicates": []}
+        for value in self._scatter("add_books", [(part, batch_size) for part in parts]):
+            report["added"] += value["added"]
+            report["duplicates"] += value["duplicates"]
+        return report
+
+    def remove_book(self, isbn : str):
+        return self._route(isbn, "remove_book")
+
+    def add_copies(self, isbn : str, count : int = 1) -> Book:
+        return self._route(isbn, "add_copies", count)
+
+    def borrow_book(self, isbn : str, user_id : str, due_at : float = None) -> Loan:
+        return self._route(isbn, "borrow_book", user_id, due_at)
+
+    def return_book(self, isbn : str, user_id : str = None) -> Loan:
+        return self._route(isbn, "return_book", user_id)
+
+    def who_holds(self, isbn : str) -> List[Loan]:
+        return self._route(isbn, "who_holds")
+
+    def search_books(self, keyword : str) -> List[Book]:
+        """Matches from every shard, ordered by ISBN (shards share no catalogue order)."""
+        parts = self._broadcast("search_books", keyword)
+        for part in parts:
+            part.sort()
+        return [book_from_row(row) for row in heapq.merge(*parts)]
+
+    def fetch_all_books(self) -> List[Book]:
+        return [book_from_row(row) for part in self._broadcast("fetch_all_books") for row in part]
+
+    def books_held_by(self, user_id : str) -> List[Loan]:
+        return [loan for part in self._broadcast("books_held_by", user_id) for loan in part]
+
+    def overdue_loans(self, now : float = None) -> List[Loan]:
+        """Overdue loans of every shard, most overdue first."""
+        return list(heapq.merge(*self._broadcast("overdue_loans", now), key=lambda l: l.due_at))
+
+    def count(self) -> int:
+        return sum(self._broadcast("count"))
+
+    def __len__(self):
+        return self.count()
+
+    def save_data(self):
+        """Every shard writes its own file, all at the same time."""
+        self._scatter("save_data", [(self.shard_file(i),) for i in range(self.shards)])
+
+    def load_data(self):
+        """Every shard (re)loads its own file; shards also do this when they start."""
+        self._scatter("load_data", [(self.shard_file(i),) for i in range(self.shards)])
+        self.users = self._call(0, "users")
+
+    def compact(self):
+        self._broadcast("compact")
+
+    def close(self):
+        for i, (conn, proc) in enumerate(zip(self.conns, self.procs)):
+            if proc.is_alive():
+                try:
+                    with self.locks[i]:
+                        conn.send(("close", None, None, (), {}))
+                        conn.recv()
+                except (EOFError, OSError):
+                    pass
+            conn.close()
+            proc.join(timeout=5)
+        self.conns = []
+        self.procs = []
+
+# ====================================== End of Sharded Library ======================================
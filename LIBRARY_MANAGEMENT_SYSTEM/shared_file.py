@@ -0,0 +1,366 @@
+# ====================================== Shared Data File ======================================
+# Several processes (two LibraryUI windows, a window and the console menu) working on one JSON file.
+#   lib.open_shared("library_data.json")   # load it and start tracking this process's changes
+#   lib.save_data("library_data.json")     # merges those changes into whatever is on disk now
+#   lib.reload_changes()                   # picks up what the others saved; a stat() when nothing did
+#
+# Saves hold an exclusive fcntl lock on <file>.lock (reads a shared one) and replace the file
+# atomically. Two top-level sections are added, which older readers ignore:
+#   "version":  bumped by every shared save; written first so it can be read without parsing the rest
+#   "versions": {"books": {isbn: v}, "users": {...}, "loans": {...}} the version of the save that last
+#               wrote each record, negative for a record that save deleted (the newest MAX_TOMBSTONES kept)
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: saves stay atomic, but two processes saving at once are not serialised
+    fcntl = None
+
+from events import BOOK_ADDED, BOOK_REMOVED, BOOK_UPDATED, BOOK_BORROWED, BOOK_RETURNED, USER_ADDED
+
+SECTIONS = ("books", "users", "loans")
+MAX_TOMBSTONES = 10000
+VERSION_HEAD = re.compile(rb'^\{\s*"version":\s*(\d+)')
+
+
+class SaveConflict(Exception):
+    """Records this process changed were also changed by another process since it last synced."""
+
+    def __init__(self, keys : List[Tuple[str, str]]):
+        self.keys = keys
+        shown = ", ".join(f"{section[:-1]} {key}" for section, key in keys[:5])
+        more = f" and {len(keys) - 5} more" if len(keys) > 5 else ""
+        super().__init__(f"Changed by another process since the last load: {shown}{more}. "
+                         "Load the data again to take their version.")
+
+
+@contextmanager
+def file_lock(filename : str, exclusive : bool = True):
+    """Advisory lock shared by every process using filename. It is taken on a sidecar
+    file, because the data file itself is replaced (a new inode) on every save."""
+    if fcntl is None:
+        yield
+        return
+    with open(filename + ".lock", "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def read_version(filename : str) -> int:
+    """The shared version of filename from its first bytes; 0 for a file never saved shared."""
+    with open(filename, "rb") as f:
+        match = VERSION_HEAD.match(f.read(64))
+    return int(match.group(1)) if match else 0
+
+
+class SharedDataFile:
+    """Keeps a LibraryManagementSystem in step with a data file other processes also save.
+
+    The library's change bus tells it which records this process changed
+    since it last synced. reload() applies the records another process saved
+    since then (telling listeners through the bus, so views follow) and
+    save() merges this process's records into the file as it is now, so
+    neither side's work is overwritten. A record both sides changed is a
+    conflict: save() refuses with SaveConflict, and reload(theirs=True)
+    resolves it in favour of the file. Loans opened on both sides under the
+    same id are not a conflict; the local one is renumbered.
+    """
+
+    def __init__(self, lib, filename : str):
+        self.lib = lib
+        self.filename = filename
+        # file version this process last synced with, and the file's stat() then
+        self.version = 0
+        self.stat = None
+        # (section, key) of every record changed here since then
+        self.dirty : Dict[Tuple[str, str], None] = {}
+        # keys mark_all() counted as changed without knowing; equal to the file's, they are not
+        self.marked : Set[Tuple[str, str]] = set()
+        # bus versions of the changes reload() applied, which are not local changes
+        self.applied = set()
+        # re-entrant: changes applied under it are delivered back to _track on the same thread
+        self._lock = threading.RLock()
+        self.subscription = lib.events.subscribe(self._track)
+
+    def close(self):
+        self.lib.events.unsubscribe(self.subscription)
+
+    def _track(self, events):
+        with self._lock:
+            for event in events:
+                if event.version in self.applied:
+                    self.applied.discard(event.version)
+                    continue
+                if event.kind == USER_ADDED:
+                    self.dirty[("users", event.key)] = None
+                    continue
+                self.dirty[("books", event.key)] = None
+                if event.kind in (BOOK_BORROWED, BOOK_RETURNED) and event.item is not None:
+                    self.dirty[("loans", str(event.item.loan_id))] = None
+
+    def mark_all(self):
+        """Count every record in memory as changed here, e.g. ones created before sharing began."""
+        lib = self.lib
+        with self._lock:
+            keys = [(section, key) for section, records in (("books", lib.books), ("users", lib.users))
+                    for key in records]
+            keys.extend(("loans", str(loan_id)) for loan_id in lib.loans.loans)
+            self.dirty.update(dict.fromkeys(keys))
+            self.marked.update(keys)
+
+    def _stat(self):
+        try:
+            st = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def changed_on_disk(self) -> bool:
+        """Cheap check (one stat()) whether anyone saved the file since this process synced."""
+        return self._stat() != self.stat
+
+    def _read(self, progress = None) -> dict:
+        if not os.path.exists(self.filename):
+            return {"version": 0, "versions": {}, "books": {}, "users": {}, "loans": {}}
+        total = os.path.getsize(self.filename)
+        chunks = []
+        read = 0
+        with open(self.filename, "r", encoding="utf-8") as f:
+            for chunk in iter(lambda: f.read(1 << 20), ""):
+                chunks.append(chunk)
+                read += len(chunk)
+                if progress is not None:
+                    progress(0, min(read, total), total)
+        data = json.loads("".join(chunks))
+        data.setdefault("version", 0)
+        data.setdefault("versions", {})
+        data.setdefault("loans", {})
+        return data
+
+    def _record(self, section : str, key : str):
+        """The in-memory record as it would be saved, or None when it does not exist here."""
+        lib = self.lib
+        if section == "books":
+            book = lib.books.get(key)
+            return book.to_dict() if book is not None else None
+        if section == "users":
+            user = lib.users.get(key)
+            return user.to_dict() if user is not None else None
+        loan = lib.loans.loans.get(int(key))
+        return loan.to_dict() if loan is not None else None
+
+    def _stamped(self, data : dict) -> bool:
+        # stamps are only trusted from a shared save at or after this process's last sync;
+        # a process that never synced with a stamped file takes every stamped record as news
+        return bool(data["version"]) and data["version"] >= self.version
+
+    def _remote_changes(self, data : dict) -> List[Tuple[str, str]]:
+        """(section, key) of every record saved elsewhere since this process synced."""
+        changed = []
+        if self._stamped(data):
+            for section in SECTIONS:
+                since = self.version
+                changed.extend((section, key) for key, v in data["versions"].get(section, {}).items()
+                               if abs(v) > since)
+        else:
+            # first sync, or written by a plain save_data (or an older library): compare every record
+            for section in SECTIONS:
+                changed.extend((section, key) for key, record in data[section].items()
+                               if self._record(section, key) != record)
+        # deletions whose tombstones were pruned (or never written) show up as keys only this side has
+        lib = self.lib
+        for section, keys in (("books", lib.books.keys()), ("users", lib.users.keys()),
+                              ("loans", (str(loan_id) for loan_id in lib.loans.loans))):
+            records = data[section]
+            changed.extend((section, key) for key in keys
+                           if key not in records and (section, key) not in self.dirty)
+        return list(dict.fromkeys(changed))
+
+    def _apply(self, data : dict, theirs : bool) -> List[Tuple[str, str]]:
+        """Take over the file's changes since the last sync; returns the conflicting keys
+        (resolved for the file when theirs, left alone otherwise)."""
+        conflicts = []
+        renumber = []
+        # a record mark_all() guessed changed is in step if it equals the file's. Only those:
+        # a real change can leave a record equal to the file's too (two borrows of one copy)
+        for section, key in self.marked:
+            record = data[section].get(key)
+            if record is not None and record == self._record(section, key):
+                self.dirty.pop((section, key), None)
+        self.marked.clear()
+        # books whose local changes gave way to the file's; their local loans follow
+        taken = set()
+        changes = self._remote_changes(data)
+        order = {section: i for i, section in enumerate(("users", "books", "loans"))}
+        changes.sort(key=lambda change: order[change[0]])
+        with self.lib.events.batch():
+            for section, key in changes:
+                record = data[section].get(key)
+                if (section, key) in self.dirty:
+                    mine = self._record(section, key)
+                    if section == "loans" and mine != record:
+                        # loans are only ever opened or closed, so a loan id that changed on both
+                        # sides was reused, never edited twice; the book record carries any conflict
+                        if mine is not None and record is not None:
+                            # both sides opened a loan under this id: keep theirs, give ours a new one
+                            renumber.append(int(key))
+                            continue
+                        if mine is not None or not self._stamped(data):
+                            # ours is new and the id is free again, or ours closed the very same loan
+                            continue
+                        # the id now belongs to someone else's loan; ours was closed already
+                        del self.dirty[(section, key)]
+                        self._take(section, key, record)
+                        continue
+                    if mine is None and record is None:
+                        # deleted on both sides. Equal live records still conflict: two borrows
+                        # of the same copy leave identical book records behind
+                        del self.dirty[(section, key)]
+                        continue
+                    if not theirs:
+                        conflicts.append((section, key))
+                        continue
+                    del self.dirty[(section, key)]
+                    if section == "books":
+                        taken.add(key)
+                self._take(section, key, record)
+            if taken:
+                for section, key in [k for k in self.dirty if k[0] == "loans"]:
+                    mine = self.lib.loans.loans.get(int(key))
+                    record = data["loans"].get(key)
+                    isbn = mine.isbn if mine is not None else record["isbn"] if record is not None else None
+                    if isbn in taken:
+                        del self.dirty[(section, key)]
+                        self._take(section, key, record)
+            for loan_id in renumber:
+                if ("loans", str(loan_id)) in self.dirty:
+                    self._renumber(loan_id, data)
+        return conflicts
+
+    def _take(self, section : str, key : str, record):
+        """Make the in-memory record match the file's (None: deleted) and tell the listeners."""
+        from library_management_system import book_from_dict
+        from loans import Loan
+        lib, events, applied = self.lib, self.lib.events, self.applied
+        if section == "users":
+            if record is None:
+                lib.users.pop(key, None)
+            else:
+                new = key not in lib.users
+                lib._put_user(record)
+                if new:
+                    applied.add(events.publish(USER_ADDED, key, lib.users[key]))
+        elif section == "books":
+            if record is None:
+                if key in lib.books:
+                    applied.add(events.publish(BOOK_REMOVED, key, lib._drop_book(key)))
+            else:
+                new = key not in lib.books
+                book = book_from_dict(record)
+                lib._put_book(book)
+                applied.add(events.publish(BOOK_ADDED if new else BOOK_UPDATED, key, book))
+        else:
+            loan = lib.loans.loans.get(int(key))
+            if loan is not None:
+                lib._close_loan(loan.isbn, loan_id=loan.loan_id)
+                applied.add(events.publish(BOOK_RETURNED, loan.isbn, loan))
+            if record is not None:
+                loan = Loan(**record)
+                lib._open_loan(loan)
+                applied.add(events.publish(BOOK_BORROWED, loan.isbn, loan))
+
+    def _renumber(self, loan_id : int, data : dict):
+        ledger = self.lib.loans
+        loan = ledger.remove(loan_id)
+        del self.dirty[("loans", str(loan_id))]
+        taken = max(map(int, data["loans"]), default=0)
+        loan.loan_id = max(taken, ledger.next_id - 1) + 1
+        ledger.add(loan)
+        self.dirty[("loans", str(loan.loan_id))] = None
+        # the file's loan under the old id comes in as a borrow like any other
+        self._take("loans", str(loan_id), data["loans"][str(loan_id)])
+
+    def reload(self, theirs : bool = False, progress = None) -> dict:
+        """Apply what other processes saved since the last sync. Local changes to records
+        they also changed are kept and reported as conflicts, or dropped when theirs."""
+        lib = self.lib
+        with lib.catalog_lock, file_lock(self.filename, exclusive=False):
+            stat = self._stat()
+            if stat == self.stat or stat is None:
+                # a file that is gone leaves the library as it is; the next save writes it all
+                self.stat = stat
+                return {"version": self.version, "changed": 0, "conflicts": []}
+            if stat is not None and self.version and read_version(self.filename) == self.version:
+                # rewritten without changes (or touched): nothing to parse
+                self.stat = stat
+                return {"version": self.version, "changed": 0, "conflicts": []}
+            data = self._read(progress)
+            before = lib.events.version
+            with self._lock:
+                conflicts = self._apply(data, theirs)
+            self.version, self.stat = data["version"], stat
+        return {"version": self.version, "changed": lib.events.version - before, "conflicts": conflicts}
+
+    def save(self):
+        """Merge this process's changes into the file; raises SaveConflict (writing nothing)
+        when another process changed the same records since the last sync."""
+        lib = self.lib
+        with lib.catalog_lock, file_lock(self.filename), self._lock:
+            data = self._read()
+            if not os.path.exists(self.filename):
+                self.mark_all()
+            elif self._stat() != self.stat:
+                conflicts = self._apply(data, theirs=False)
+                if conflicts:
+                    raise SaveConflict(conflicts)
+            version = data["version"] + 1
+            versions = {section: data["versions"].get(section, {}) for section in SECTIONS}
+            removed_books = set()
+            for section, key in self.dirty:
+                record = self._record(section, key)
+                if record is None:
+                    if data[section].pop(key, None) is not None or key in versions[section]:
+                        versions[section][key] = -version
+                    if section == "books":
+                        removed_books.add(key)
+                else:
+                    data[section][key] = record
+                    versions[section][key] = version
+            if removed_books:
+                # their loans went with them (remove_book closes them without a separate event)
+                for key in [k for k, l in data["loans"].items() if l["isbn"] in removed_books]:
+                    del data["loans"][key]
+                    versions["loans"][key] = -version
+            self._prune(versions)
+            out = {"version": version, "versions": versions,
+                   "books": data["books"], "users": data["users"], "loans": data["loans"]}
+            tmp = self.filename + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(out, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.filename)
+            self.dirty.clear()
+            self.marked.clear()
+            self.version, self.stat = version, self._stat()
+        if lib.metrics is not None:
+            lib.metrics.add_bytes("snapshot", self.stat[1])
+
+    @staticmethod
+    def _prune(versions : Dict[str, Dict[str, int]]):
+        tombstones = sorted((v, section, key) for section, records in versions.items()
+                            for key, v in records.items() if v < 0)
+        # most negative = newest deletion; drop the oldest beyond the cap
+        for _, section, key in tombstones[MAX_TOMBSTONES:]:
+            del versions[section][key]
+
+# ====================================== End of Shared Data File ======================================
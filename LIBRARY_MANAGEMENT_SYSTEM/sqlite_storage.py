@@ -0,0 +1,349 @@
+# ====================================== SQLite Storage ======================================
+# Usage (one-shot migration): python sqlite_storage.py library_data.json library.db
+import argparse
+import json
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+from credentials import hash_password
+from library_management_system import Book, PrintedBook, EBook, User, book_from_dict, set_availability
+from loans import Loan
+from streaming_loader import iter_library_records
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    isbn      TEXT PRIMARY KEY,
+    title     TEXT NOT NULL,
+    author    TEXT NOT NULL,
+    kind      TEXT NOT NULL,
+    borrowed  INTEGER NOT NULL DEFAULT 0,
+    pages     INTEGER,
+    file_size REAL,
+    copies    INTEGER NOT NULL DEFAULT 1,
+    available INTEGER NOT NULL DEFAULT 1,
+    free      TEXT
+);
+CREATE INDEX IF NOT EXISTS books_title ON books(title COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS books_author ON books(author COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS users (
+    user_id  TEXT PRIMARY KEY,
+    name     TEXT NOT NULL,
+    role     TEXT NOT NULL,
+    password TEXT
+);
+CREATE TABLE IF NOT EXISTS loans (
+    loan_id     INTEGER PRIMARY KEY,
+    isbn        TEXT NOT NULL,
+    user_id     TEXT NOT NULL,
+    borrowed_at REAL NOT NULL,
+    due_at      REAL NOT NULL,
+    copy_id     INTEGER
+);
+"""
+
+# columns added after the first release, with what older databases need to catch up
+ADDED_COLUMNS = (
+    ("books", "copies", "INTEGER NOT NULL DEFAULT 1", None),
+    ("books", "available", "INTEGER NOT NULL DEFAULT 1", "UPDATE books SET available = 0 WHERE borrowed = 1"),
+    ("books", "free", "TEXT", None),
+    ("loans", "copy_id", "INTEGER", None),
+)
+
+# trigram full-text index kept in sync by triggers, so substring search never scans the table
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+    title, author, content='books', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS books_ai AFTER INSERT ON books BEGIN
+    INSERT INTO books_fts(rowid, title, author) VALUES (new.rowid, new.title, new.author);
+END;
+CREATE TRIGGER IF NOT EXISTS books_ad AFTER DELETE ON books BEGIN
+    INSERT INTO books_fts(books_fts, rowid, title, author) VALUES ('delete', old.rowid, old.title, old.author);
+END;
+CREATE TRIGGER IF NOT EXISTS books_au AFTER UPDATE OF title, author ON books BEGIN
+    INSERT INTO books_fts(books_fts, rowid, title, author) VALUES ('delete', old.rowid, old.title, old.author);
+    INSERT INTO books_fts(rowid, title, author) VALUES (new.rowid, new.title, new.author);
+END;
+"""
+
+BOOK_COLUMNS = "isbn, title, author, kind, borrowed, pages, file_size, copies, available, free"
+
+# every statement is a constant string, so sqlite3's statement cache prepares each one once
+UPSERT_BOOK = (
+    f"INSERT INTO books ({BOOK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(isbn) DO UPDATE SET title=excluded.title, author=excluded.author, kind=excluded.kind, "
+    "borrowed=excluded.borrowed, pages=excluded.pages, file_size=excluded.file_size, "
+    "copies=excluded.copies, available=excluded.available, free=excluded.free"
+)
+UPDATE_AVAILABILITY = "UPDATE books SET borrowed = ?, copies = ?, available = ?, free = ? WHERE isbn = ?"
+SELECT_BOOK = f"SELECT {BOOK_COLUMNS} FROM books WHERE isbn = ?"
+SELECT_ALL_BOOKS = f"SELECT {BOOK_COLUMNS} FROM books ORDER BY rowid"
+SEARCH_FTS = (
+    f"SELECT {BOOK_COLUMNS} FROM books WHERE rowid IN "
+    "(SELECT rowid FROM books_fts WHERE books_fts MATCH ?) ORDER BY rowid"
+)
+SEARCH_LIKE = f"SELECT {BOOK_COLUMNS} FROM books WHERE title LIKE ? ESCAPE '\\' OR author LIKE ? ESCAPE '\\' ORDER BY rowid"
+UPSERT_USER = (
+    "INSERT INTO users (user_id, name, role, password) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(user_id) DO UPDATE SET name=excluded.name, role=excluded.role, password=excluded.password"
+)
+SELECT_USER = "SELECT user_id, name, role, password FROM users WHERE user_id = ?"
+INSERT_LOAN = ("INSERT OR REPLACE INTO loans (loan_id, isbn, user_id, borrowed_at, due_at, copy_id) "
+               "VALUES (?, ?, ?, ?, ?, ?)")
+
+
+def _free_to_text(book : Book):
+    return json.dumps(book.free) if book.free is not None else None
+
+
+def book_to_row(book : Book) -> tuple:
+    copies = (book.copies, book.available, _free_to_text(book))
+    if isinstance(book, PrintedBook):
+        return (book.isbn, book.title, book.author, "printed", int(book.borrowed), book.pages, None) + copies
+    if isinstance(book, EBook):
+        return (book.isbn, book.title, book.author, "ebook", int(book.borrowed), None, book.file_size) + copies
+    return (book.isbn, book.title, book.author, "book", int(book.borrowed), None, None) + copies
+
+
+def book_from_row(row) -> Book:
+    isbn, title, author, kind, borrowed, pages, file_size, copies, available, free = row
+    if kind == "printed":
+        book = PrintedBook(isbn, title, author, pages, copies)
+    elif kind == "ebook":
+        book = EBook(isbn, title, author, file_size, copies)
+    else:
+        book = Book(isbn, title, author, copies)
+    set_availability(book, available, json.loads(free) if free is not None else None)
+    return book
+
+
+class SQLiteBookMap(MutableMapping):
+    """ISBN -> Book mapping that reads and writes the books table directly."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def __getitem__(self, isbn : str) -> Book:
+        row = self.storage.query_one(SELECT_BOOK, (isbn,))
+        if row is None:
+            raise KeyError(isbn)
+        return book_from_row(row)
+
+    def __setitem__(self, isbn : str, book : Book):
+        self.storage.execute(UPSERT_BOOK, book_to_row(book))
+
+    def __delitem__(self, isbn : str):
+        if self.storage.execute("DELETE FROM books WHERE isbn = ?", (isbn,)) == 0:
+            raise KeyError(isbn)
+
+    def __contains__(self, isbn) -> bool:
+        return self.storage.query_one("SELECT 1 FROM books WHERE isbn = ?", (isbn,)) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return (row[0] for row in self.storage.query_all("SELECT isbn FROM books ORDER BY rowid"))
+
+    def __len__(self) -> int:
+        return self.storage.query_one("SELECT COUNT(*) FROM books")[0]
+
+    # one query instead of one per key
+    def values(self) -> List[Book]:
+        return [book_from_row(row) for row in self.storage.query_all(SELECT_ALL_BOOKS)]
+
+    def items(self):
+        return [(book.isbn, book) for book in self.values()]
+
+
+class SQLiteUserMap(MutableMapping):
+    """user_id -> User mapping backed by the users table."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def __getitem__(self, user_id : str) -> User:
+        row = self.storage.query_one(SELECT_USER, (user_id,))
+        if row is None:
+            raise KeyError(user_id)
+        return User(*row)
+
+    def __setitem__(self, user_id : str, user : User):
+        self.storage.execute(UPSERT_USER, (user.user_id, user.name, user.role, user.password))
+
+    def __delitem__(self, user_id : str):
+        if self.storage.execute("DELETE FROM users WHERE user_id = ?", (user_id,)) == 0:
+            raise KeyError(user_id)
+
+    def __contains__(self, user_id) -> bool:
+        return self.storage.query_one("SELECT 1 FROM users WHERE user_id = ?", (user_id,)) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return (row[0] for row in self.storage.query_all("SELECT user_id FROM users ORDER BY rowid"))
+
+    def __len__(self) -> int:
+        return self.storage.query_one("SELECT COUNT(*) FROM users")[0]
+
+    def items(self):
+        return [(row[0], User(*row)) for row in
+                self.storage.query_all("SELECT user_id, name, role, password FROM users ORDER BY rowid")]
+
+
+class SQLiteStorage:
+    """Storage backend that keeps the catalogue in a SQLite database instead of memory.
+
+    Pass it as LibraryManagementSystem(storage=SQLiteStorage("library.db")):
+    books/users become views of the tables, lookups use the primary keys and
+    search_books uses a trigram full-text index. Every write commits on its
+    own unless it runs inside transaction(), which groups a batch into one commit.
+    """
+
+    def __init__(self, path : str = "library.db"):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._add_missing_columns()
+        self._hash_plaintext_passwords()
+        try:
+            had_fts = self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'books_fts'").fetchone()
+            self.conn.executescript(FTS_SCHEMA)
+            if had_fts is None:
+                # the triggers only see later writes; index the books the database already holds
+                self.conn.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite older than 3.34 has no trigram tokenizer; fall back to LIKE
+            self.has_fts = False
+        self.lock = threading.RLock()
+        self._depth = 0
+        self.books = SQLiteBookMap(self)
+        self.users = SQLiteUserMap(self)
+
+    def _add_missing_columns(self):
+        for table, column, decl, backfill in ADDED_COLUMNS:
+            existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+                if backfill:
+                    self.conn.execute(backfill)
+
+    def _hash_plaintext_passwords(self):
+        # databases written before hashing hold plaintext; User() hashes it, so write that back once
+        rows = self.conn.execute("SELECT user_id, password FROM users WHERE password IS NOT NULL "
+                                 "AND password != '' AND password NOT LIKE 'scrypt$%'").fetchall()
+        for user_id, password in rows:
+            self.conn.execute("UPDATE users SET password = ? WHERE user_id = ?", (hash_password(password), user_id))
+
+    @contextmanager
+    def transaction(self):
+        """Group every write inside the block into a single transaction (nesting is allowed)."""
+        with self.lock:
+            if self._depth == 0:
+                self.conn.execute("BEGIN")
+            self._depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.conn.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self.conn.execute("COMMIT")
+
+    def execute(self, sql : str, params : tuple = ()) -> int:
+        with self.lock:
+            return self.conn.execute(sql, params).rowcount
+
+    def executemany(self, sql : str, rows) -> int:
+        with self.lock:
+            return self.conn.executemany(sql, rows).rowcount
+
+    def query_one(self, sql : str, params : tuple = ()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def query_all(self, sql : str, params : tuple = ()) -> List[tuple]:
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def save_availability(self, book : Book):
+        """Write back a book's copy counters and free list after a borrow, return or new copies."""
+        self.execute(UPDATE_AVAILABILITY, (int(book.borrowed), book.copies, book.available, _free_to_text(book), book.isbn))
+
+    def put_loan(self, loan : Loan):
+        self.execute(INSERT_LOAN, (loan.loan_id, loan.isbn, loan.user_id, loan.borrowed_at, loan.due_at, loan.copy_id))
+
+    def delete_loan(self, loan_id : int):
+        self.execute("DELETE FROM loans WHERE loan_id = ?", (loan_id,))
+
+    def load_loans(self) -> List[Loan]:
+        """Active loans are few next to the catalogue, so the ledger keeps them in memory."""
+        return [Loan(*row) for row in self.query_all(
+            "SELECT loan_id, isbn, user_id, borrowed_at, due_at, copy_id FROM loans ORDER BY loan_id")]
+
+    def put_books(self, books) -> int:
+        """Upsert many books in one transaction."""
+        with self.transaction():
+            return self.executemany(UPSERT_BOOK, (book_to_row(b) for b in books))
+
+    def search_books(self, keyword : str) -> List[Book]:
+        """Same results and order as the in-memory search: case-insensitive substring of title or author."""
+        keyword = keyword.lower()
+        if self.has_fts and len(keyword) >= 3:
+            rows = self.query_all(SEARCH_FTS, ('"' + keyword.replace('"', '""') + '"',))
+        else:
+            pattern = "%" + keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            rows = self.query_all(SEARCH_LIKE, (pattern, pattern))
+        books = [book_from_row(row) for row in rows]
+        # the trigram/LIKE match is a superset check; confirm with Python's own lowercasing
+        return [b for b in books if keyword in b.title.lower() or keyword in b.author.lower()]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def migrate_json(json_path : str, db_path : str, batch_size : int = 10000) -> Dict[str, int]:
+    """Import an existing library_data.json into a SQLite database, streaming the file."""
+    storage = SQLiteStorage(db_path)
+    counts = {"books": 0, "users": 0, "loans": 0}
+    batch = []
+    try:
+        with storage.transaction():
+            for section, key, value, _ in iter_library_records(json_path):
+                if section == "books":
+                    batch.append(book_to_row(book_from_dict(value)))
+                    if len(batch) >= batch_size:
+                        storage.executemany(UPSERT_BOOK, batch)
+                        batch.clear()
+                elif section == "users":
+                    storage.users[key] = User(**value)
+                elif section == "loans":
+                    storage.put_loan(Loan(**value))
+                else:
+                    continue
+                counts[section] += 1
+            if batch:
+                storage.executemany(UPSERT_BOOK, batch)
+    finally:
+        storage.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a library_data.json file into a SQLite database.")
+    parser.add_argument("json_path", nargs="?", default="library_data.json")
+    parser.add_argument("db_path", nargs="?", default="library.db")
+    args = parser.parse_args()
+    counts = migrate_json(args.json_path, args.db_path)
+    print(f"Imported {counts['books']} books, {counts['users']} users and {counts['loans']} loans into {args.db_path}")
+
+
+if __name__ == "__main__":
+    main()
+
+# ====================================== End of SQLite Storage ======================================
@@ -0,0 +1,139 @@
+# ====================================== Streaming Loader ======================================
+import codecs
+import json
+import os
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+WHITESPACE = " \t\r\n"
+# sections whose members are yielded one record at a time
+RECORD_SECTIONS = ("books", "users", "loans")
+
+
+class _JSONStream:
+    """Pull-based reader over a JSON file that decodes one value at a time from a small buffer."""
+
+    def __init__(self, f, chunk_size: int = 1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.text = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.bytes_read = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        self.bytes_read += len(chunk)
+        if not chunk:
+            self.eof = True
+            self.buf = self.buf[self.pos:] + self.text.decode(b"", final=True)
+        else:
+            self.buf = self.buf[self.pos:] + self.text.decode(chunk)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it ('' at end of file)."""
+        while True:
+            buf, pos = self.buf, self.pos
+            while pos < len(buf) and buf[pos] in WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, ch: str):
+        found = self.peek()
+        if found != ch:
+            raise ValueError(f"Malformed library file: expected {ch!r}, found {found!r} at byte ~{self.bytes_read}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                # a number cut by the buffer edge still decodes, so only trust values that end early
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except ValueError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def iter_library_records(filename: str, chunk_size: int = 1 << 16) -> Iterator[Tuple[str, Any, Any, int]]:
+    """Yield (section, key, value, bytes_read) while parsing a library_data.json file.
+
+    Members of "books", "users" and "loans" come out one at a time as soon as they are
+    parsed; any other top-level section is yielded whole with key None.
+    """
+    with open(filename, "rb") as f:
+        stream = _JSONStream(f, chunk_size)
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            section = stream.value()
+            stream.expect(":")
+            if section in RECORD_SECTIONS and stream.peek() == "{":
+                stream.pos += 1
+                if stream.peek() == "}":
+                    stream.pos += 1
+                else:
+                    while True:
+                        key = stream.value()
+                        stream.expect(":")
+                        yield section, key, stream.value(), stream.bytes_read
+                        if stream.peek() == ",":
+                            stream.pos += 1
+                            continue
+                        stream.expect("}")
+                        break
+            else:
+                yield section, None, stream.value(), stream.bytes_read
+            if stream.peek() == ",":
+                stream.pos += 1
+                continue
+            stream.expect("}")
+            return
+
+
+def stream_load(lib, filename: str, progress: Callable[[int, int, int], None] = None,
+                progress_every: int = 10000) -> Dict[str, int]:
+    """Build Book/User objects into lib record by record while the file is parsed.
+
+    progress(records_loaded, bytes_read, total_bytes) is called every
+    progress_every records and once more at the end.
+    """
+    from library_management_system import book_from_dict
+    from loans import Loan
+
+    total = os.path.getsize(filename)
+    counts = {"books": 0, "users": 0, "loans": 0}
+    loaded = 0
+    bytes_read = 0
+    for section, key, value, bytes_read in iter_library_records(filename):
+        if section == "books":
+            lib._put_book(book_from_dict(value))
+        elif section == "users":
+            lib._put_user(value)
+        elif section == "loans":
+            lib._open_loan(Loan(**value))
+        else:
+            continue
+        counts[section] += 1
+        loaded += 1
+        if progress is not None and loaded % progress_every == 0:
+            progress(loaded, bytes_read, total)
+    if progress is not None:
+        progress(loaded, total, total)
+    return counts
+
+# ====================================== End of Streaming Loader ======================================
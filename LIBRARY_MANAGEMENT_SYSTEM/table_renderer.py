@@ -0,0 +1,240 @@
+# ====================================== Table Renderer ======================================
+from bisect import bisect_left, insort
+from itertools import chain
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+HEADERS = ("ISBN", "Title", "Author", "Kind", "Pages/Size", "Available")
+SORT_KEYS = ("isbn", "title", "author", "kind")
+
+
+def book_kind(book) -> str:
+    # by attribute rather than isinstance, so this module needs nothing from library_management_system
+    return "Printed" if hasattr(book, "pages") else "EBook" if hasattr(book, "file_size") else "Book"
+
+
+def table_row(book) -> Tuple[str, ...]:
+    """The cells show_all_books prints for book."""
+    kind = book_kind(book)
+    extra = str(book.pages) if kind == "Printed" else f"{book.file_size} MB" if kind == "EBook" else "-"
+    return (book.isbn, book.title, book.author, kind, extra, f"{book.available}/{book.copies}")
+
+
+def _available_width(book) -> int:
+    # widest the Available cell gets for this book ("copies/copies"), so borrowing never widens it
+    return 2 * len(str(book.copies)) + 1
+
+
+class BookTableView:
+    """Console rendering of the catalogue, one page at a time.
+
+    Column widths come from per-column counts of cell lengths that add() and
+    remove() keep up to date, so they are known without looking at every book
+    and a removal can shrink them again. Books are also grouped by kind and the
+    borrowed ones (no copy left) kept apart, so a filtered listing only walks
+    the books it shows; a sort order builds its index the first time it is
+    asked for and keeps it in step after that. pages() yields formatted pages
+    lazily, and no full list of rows is ever built.
+
+    Like the search indexes, bulk loads can defer() batches that are added on
+    the next use or change.
+    """
+
+    def __init__(self, lookup : Callable):
+        # isbn -> Book, used to render the rows of a page
+        self.lookup = lookup
+        # isbn -> insertion sequence; dict order is the catalogue order
+        self.order : Dict[str, int] = {}
+        self._seq = 0
+        self.kinds : Dict[str, Dict[str, None]] = {}
+        self.borrowed : Dict[str, None] = {}
+        # per column: number of books by cell length (list index), and the cached maximum
+        self.lengths : List[List[int]] = [[] for _ in HEADERS]
+        self.longest = [0] * len(HEADERS)
+        # Available widths other than the usual 3 ("1/1" .. "9/9"), needed to uncount them
+        self.wide : Dict[str, int] = {}
+        # sort key -> sorted [(key, isbn)], built on first use
+        self.sorted : Dict[str, List[Tuple[str, str]]] = {}
+        # bumped on every change, so a paused listing can tell it went stale
+        self.version = 0
+        self.pending : List = []
+
+    def __len__(self):
+        self.flush()
+        return len(self.order)
+
+    def defer(self, books : Iterable):
+        self.pending.append(books)
+
+    def flush(self):
+        if self.pending:
+            pending, self.pending = self.pending, []
+            self.add_many(chain.from_iterable(pending))
+
+    @staticmethod
+    def _sort_key(key : str, book) -> str:
+        return book.isbn if key == "isbn" else getattr(book, key).casefold()
+
+    @staticmethod
+    def _bump(counts : List[int], size : int):
+        try:
+            counts[size] += 1
+        except IndexError:
+            counts.extend([0] * (size + 1 - len(counts)))
+            counts[size] = 1
+
+    def _count_cell(self, column : int, size : int, step : int):
+        counts = self.lengths[column]
+        if step > 0:
+            self._bump(counts, size)
+            if size > self.longest[column]:
+                self.longest[column] = size
+        else:
+            counts[size] -= 1
+            if not counts[size] and size == self.longest[column]:
+                while counts and not counts[-1]:
+                    counts.pop()
+                self.longest[column] = len(counts) - 1 if counts else 0
+
+    def _uncount(self, book, available_width : int):
+        for column, cell in enumerate(table_row(book)[:5]):
+            self._count_cell(column, len(cell), -1)
+        self._count_cell(5, available_width, -1)
+
+    def add(self, book):
+        self.add_many((book,))
+
+    def add_many(self, books : Iterable):
+        """Add books not in the view yet; replace a book by remove()-ing the old one first."""
+        self.flush()
+        order, kinds, borrowed, wide, sorted_by = self.order, self.kinds, self.borrowed, self.wide, self.sorted
+        lengths, bump = self.lengths, self._bump
+        for book in books:
+            isbn = book.isbn
+            order[isbn] = self._seq
+            self._seq += 1
+            _, title, author, kind, extra, _ = table_row(book)
+            kinds.setdefault(kind, {})[isbn] = None
+            if book.borrowed:
+                borrowed[isbn] = None
+            width = _available_width(book)
+            if width != 3:
+                wide[isbn] = width
+            # the maxima are brought up to date once at the end
+            for counts, size in zip(lengths, (len(isbn), len(title), len(author), len(kind), len(extra), width)):
+                try:
+                    counts[size] += 1
+                except IndexError:
+                    bump(counts, size)
+            for key, index in sorted_by.items():
+                insort(index, (self._sort_key(key, book), isbn))
+        self.longest = [len(counts) - 1 if counts else 0 for counts in lengths]
+        self.version += 1
+
+    def remove(self, isbn : str, book):
+        """Forget book (still needed to uncount its cells); call it before the book is dropped."""
+        self.flush()
+        if self.order.pop(isbn, None) is None:
+            return
+        kind = book_kind(book)
+        members = self.kinds[kind]
+        del members[isbn]
+        if not members:
+            del self.kinds[kind]
+        self.borrowed.pop(isbn, None)
+        for key, index in self.sorted.items():
+            i = bisect_left(index, (self._sort_key(key, book), isbn))
+            if i < len(index) and index[i][1] == isbn:
+                del index[i]
+        self._uncount(book, self.wide.pop(isbn, 3))
+        self.version += 1
+
+    def update(self, book):
+        """Refresh book after a borrow, a return or new copies."""
+        self.flush()
+        isbn = book.isbn
+        if isbn not in self.order:
+            return
+        if book.borrowed:
+            self.borrowed[isbn] = None
+        else:
+            self.borrowed.pop(isbn, None)
+        width = _available_width(book)
+        old = self.wide.pop(isbn, 3)
+        if width != 3:
+            self.wide[isbn] = width
+        if width != old:
+            self._count_cell(5, width, 1)
+            self._count_cell(5, old, -1)
+        self.version += 1
+
+    def widths(self) -> List[int]:
+        """Column widths for the whole catalogue, so columns line up across pages and filters."""
+        self.flush()
+        return [max(len(header), longest) for header, longest in zip(HEADERS, self.longest)]
+
+    def _sorted(self, key : str) -> List[Tuple[str, str]]:
+        index = self.sorted.get(key)
+        if index is None:
+            lookup = self.lookup
+            index = self.sorted[key] = sorted((self._sort_key(key, lookup(isbn)), isbn) for isbn in self.order)
+        return index
+
+    def isbns(self, kind : str = None, borrowed : bool = None, sort : str = None,
+              reverse : bool = False) -> Iterator[str]:
+        """ISBNs to list, lazily: only books of kind ("Printed", "EBook", "Book") and with the
+        given borrowed status when set, in catalogue order or sorted by one of SORT_KEYS."""
+        self.flush()
+        if sort is not None and sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}.")
+        if kind is not None and kind not in self.kinds:
+            return iter(())
+        members = self.kinds[kind] if kind is not None else None
+        flagged = self.borrowed
+        if borrowed and sort is None:
+            # usually the smallest group, so order just it instead of walking the catalogue
+            chosen = flagged if members is None or len(flagged) <= len(members) else members
+            other = members if chosen is flagged else flagged
+            return iter(sorted((isbn for isbn in chosen if other is None or isbn in other),
+                               key=self.order.__getitem__, reverse=reverse))
+        if sort == "kind":
+            names = [kind] if kind is not None else sorted(self.kinds, reverse=reverse)
+            source = chain.from_iterable(reversed(self.kinds[name]) if reverse else self.kinds[name]
+                                         for name in names)
+        elif sort is not None:
+            index = self._sorted(sort)
+            source = (isbn for _, isbn in (reversed(index) if reverse else index))
+            if members is not None:
+                source = (isbn for isbn in source if isbn in members)
+        else:
+            base = members if members is not None else self.order
+            source = reversed(base) if reverse else iter(base)
+        if borrowed is not None:
+            source = (isbn for isbn in source if (isbn in flagged) == borrowed)
+        return source
+
+    def pages(self, page_size : int = 50, **filters) -> Iterator[List[str]]:
+        """Formatted pages of at most page_size rows, each led by the header and separator
+        lines; takes the filters of isbns(). Raises RuntimeError when the catalogue changes
+        while the listing is paused between pages."""
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1.")
+        widths = self.widths()
+        header = [" | ".join(h.ljust(w) for h, w in zip(HEADERS, widths)), "-+-".join("-" * w for w in widths)]
+        version = self.version
+        source = self.isbns(**filters)
+        lookup = self.lookup
+        while True:
+            if self.version != version:
+                raise RuntimeError("The catalogue changed while it was being listed; list it again.")
+            lines = []
+            for isbn in source:
+                lines.append(" | ".join(cell.ljust(w) for cell, w in zip(table_row(lookup(isbn)), widths)))
+                if len(lines) == page_size:
+                    break
+            if not lines:
+                return
+            yield header + lines
+            if len(lines) < page_size:
+                return
+
+# ====================================== End of Table Renderer ======================================
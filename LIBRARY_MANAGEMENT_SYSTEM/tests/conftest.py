@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# the package modules import each other by their flat names
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from library_management_system import LibraryManagementSystem, User
+
+
+@pytest.fixture
+def make_library():
+    """Build libraries with an admin "A" (password "pw") logged in; keyword arguments
+    go to LibraryManagementSystem (columnar=True, storage=...)."""
+    def make(**kwargs):
+        lib = LibraryManagementSystem(**kwargs)
+        admin = User("A", "admin", "Admin", "pw")
+        lib.add_user(admin)
+        lib.Login(admin, lib.authenticate("A", "pw"))
+        return lib
+    return make
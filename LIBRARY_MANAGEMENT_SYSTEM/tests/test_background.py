@@ -0,0 +1,18 @@
+import pytest
+
+from background import Task, TaskCancelled
+
+
+def test_a_committed_task_can_no_longer_be_cancelled():
+    task = Task(None, "save")
+    task.check()
+    task.commit()
+    task.cancel()
+    task.check()
+    assert not task.cancelled.is_set()
+
+    task = Task(None, "save")
+    task.cancel()
+    with pytest.raises(TaskCancelled):
+        task.commit()
+    assert not task.committed
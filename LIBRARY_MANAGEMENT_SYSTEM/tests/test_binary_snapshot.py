@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from binary_snapshot import MAGIC, SnapshotBookMap, is_snapshot, write_snapshot
+from library_management_system import EBook, LibraryManagementSystem, PrintedBook, User
+
+
+def test_snapshot_round_trip(tmp_path, make_library):
+    path = str(tmp_path / "library.snap")
+    lib = make_library()
+    lib.add_user(User("U2", "member"))
+    lib.add_books([PrintedBook("9", "Zebra Tales", "Ann", 120, 3), EBook("1", "Águas", "Ann", 2.5),
+                   PrintedBook("5", "Middle", "Bob", 80)])
+    lib.borrow_book("9", "U2")
+    lib.save_data(path)
+    assert is_snapshot(path)
+
+    loaded = LibraryManagementSystem()
+    loaded.load_data(path)
+    # catalogue order survives, although records are stored sorted by ISBN
+    assert list(loaded.books) == ["9", "1", "5"]
+    for isbn, book in lib.books.items():
+        assert loaded.books[isbn].to_dict() == book.to_dict()
+    assert [loan.to_dict() for loan in loaded.loans.holders("9")] == [loan.to_dict() for loan in lib.loans.holders("9")]
+    assert set(loaded.users) == {"A", "U2"}
+    assert [b.isbn for b in loaded.search_books("águas")] == ["1"]
+
+    # changes after loading stay in memory next to the mapped file
+    loaded.Login(loaded.users["A"], loaded.authenticate("A", "pw"))
+    loaded.remove_book("5")
+    loaded.add_book(PrintedBook("7", "New", "Cy", 10))
+    assert list(loaded.books) == ["9", "1", "7"]
+
+
+def test_saving_over_the_mapped_snapshot(tmp_path, make_library):
+    path = str(tmp_path / "library.snap")
+    lib = make_library()
+    lib.add_user(User("U2", "member"))
+    lib.add_books([PrintedBook(str(i), f"Title {i}", "Author", 100, 2) for i in range(30)])
+    lib.save_data(path)
+
+    loaded = LibraryManagementSystem()
+    loaded.load_data(path)
+    loaded.Login(loaded.users["A"], loaded.authenticate("A", "pw"))
+    loaded.borrow_book("4", "U2")
+    loaded.remove_book("7")
+    loaded.add_book(EBook("7", "Back again", "Writer", 1.0))
+    loaded.add_book(PrintedBook("new", "Latest", "Writer", 10))
+    assert [b.isbn for b in loaded.fuzzy_search("bakc")] == ["7"]
+    expected = [book.to_dict() for book in loaded.books.values()]
+    # the books still being served from the file are read before it is replaced
+    loaded.save_data(path)
+
+    again = LibraryManagementSystem()
+    again.load_data(path)
+    assert [book.to_dict() for book in again.books.values()] == expected
+    assert list(again.books)[-2:] == ["7", "new"]
+    assert [loan.user_id for loan in again.loans.holders("4")] == ["U2"]
+
+
+def test_json_and_snapshot_convert_both_ways(tmp_path, make_library):
+    json_path, snap_path, back_path = (str(tmp_path / name) for name in ("a.json", "b.snap", "c.json"))
+    lib = make_library()
+    lib.add_books([PrintedBook("2", "Two", "Ann", 20), EBook("1", "One", "Bob", 0.5, 3)])
+    lib.borrow_book("1", "A")
+    lib.save_data(json_path)
+    for source, target in ((json_path, snap_path), (snap_path, back_path)):
+        converted = LibraryManagementSystem()
+        converted.load_data(source)
+        converted.save_data(target)
+    with open(json_path) as a, open(back_path) as c:
+        assert json.load(a) == json.load(c)
+
+
+def test_other_versions_are_refused(tmp_path):
+    path = tmp_path / "library.snap"
+    write_snapshot(str(path), [], {}, {})
+    data = bytearray(path.read_bytes())
+    data[len(MAGIC)] += 1
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        SnapshotBookMap(str(path))
@@ -0,0 +1,88 @@
+import json
+import sys
+
+import pytest
+
+import bulk_import
+from bulk_import import build_book, import_file, iter_books
+from library_management_system import EBook, PrintedBook
+
+
+def test_build_book_infers_the_kind_and_validates():
+    assert isinstance(build_book("1", "T", "A", "", "120", ""), PrintedBook)
+    book = build_book("2", "T", "A", None, None, "2.5", "3")
+    assert isinstance(book, EBook) and book.file_size == 2.5 and book.copies == 3
+    for row in (("", "T", "A", "printed", "1", ""), ("3", "T", "A", "audio", "", ""),
+                ("3", "T", "A", "printed", "many", ""), ("3", "T", "A", "", "", ""),
+                ("3", "T", "A", "ebook", "", "1", "0")):
+        with pytest.raises(ValueError):
+            build_book(*row)
+
+
+def test_csv_rows_in_any_column_order(tmp_path):
+    path = tmp_path / "catalogue.csv"
+    path.write_text('Title, ISBN ,author,pages,file_size,kind\n'
+                    '"Comma, Inc.",1,Ann,300,,\n'
+                    'Short row,2,Bob,\n'
+                    'E,3,Cy,,1.25,EBOOK\n', encoding="utf-8")
+    errors = []
+    books = list(iter_books(str(path), errors))
+    assert [(b.isbn, b.title, type(b).__name__) for b in books] == [("1", "Comma, Inc.", "PrintedBook"),
+                                                                   ("3", "E", "EBook")]
+    # the short row is padded, then fails for having neither pages nor file_size
+    assert [line for line, _ in errors] == [3]
+
+
+def test_csv_without_the_required_columns(tmp_path):
+    path = tmp_path / "catalogue.csv"
+    path.write_text("isbn,title\n1,T\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="author"):
+        list(iter_books(str(path), []))
+
+
+def test_jsonl_rows_report_their_line(tmp_path):
+    path = tmp_path / "catalogue.jsonl"
+    path.write_text("\n".join([json.dumps({"isbn": 1, "title": "T", "author": "A", "pages": 10, "copies": 2}),
+                               "",
+                               "[1, 2]",
+                               "{not json",
+                               json.dumps({"isbn": "e", "title": "T", "author": "A", "file_size": 3})]),
+                    encoding="utf-8")
+    errors = []
+    books = list(iter_books(str(path), errors))
+    assert [(b.isbn, b.copies) for b in books] == [("1", 2), ("e", 1)]
+    assert [line for line, _ in errors] == [3, 4]
+
+
+def test_import_reports_duplicates_across_batches(tmp_path, make_library):
+    lib = make_library()
+    lib.add_book(PrintedBook("0", "Already here", "A", 10))
+    path = tmp_path / "catalogue.jsonl"
+    rows = [{"isbn": str(i % 7), "title": f"T{i}", "author": "A", "pages": 10} for i in range(10)]
+    path.write_text("\n".join(map(json.dumps, rows)) + "\nnot json\n", encoding="utf-8")
+
+    report = import_file(lib, str(path), batch_size=3)
+    # "0" was in the library; 7, 8 and 9 repeat 0, 1 and 2 of the same file
+    assert report["added"] == 6
+    assert sorted(report["duplicates"]) == ["0", "0", "1", "2"]
+    assert [line for line, _ in report["errors"]] == [11]
+    assert lib.books["1"].title == "T1" and lib.books["0"].title == "Already here"
+    assert [b.isbn for b in lib.search_books("t5")] == ["5"]
+
+
+def test_the_command_line_merges_into_a_shared_file(tmp_path, make_library, monkeypatch):
+    data = str(tmp_path / "library_data.json")
+    gui = make_library()
+    gui.open_shared(data)
+    gui.add_book(PrintedBook("G1", "Saved by the GUI", "A", 10))
+    gui.save_data(data)
+    catalogue = tmp_path / "catalogue.csv"
+    catalogue.write_text("isbn,title,author,pages\nC1,Imported,B,20\nG1,Clash,B,30\n", encoding="utf-8")
+
+    monkeypatch.setattr(sys, "argv", ["bulk_import.py", str(catalogue), "--user", "A", "--password", "pw",
+                                      "--data", data])
+    bulk_import.main()
+    with open(data) as f:
+        assert set(json.load(f)["books"]) == {"G1", "C1"}
+    gui.reload_changes()
+    assert gui.books["C1"].title == "Imported" and gui.books["G1"].title == "Saved by the GUI"
@@ -0,0 +1,53 @@
+import pytest
+
+from columnar_store import ColumnarBookStore
+from library_management_system import Book, EBook, PrintedBook, User
+
+
+def test_entries_read_and_write_through_the_columns():
+    store = ColumnarBookStore()
+    store["1"] = PrintedBook("1", "Title", "Author", 320, 2)
+    store["2"] = EBook("2", "Other", "Author", 1.5)
+    store["3"] = Book("3", "Plain", "Someone")
+    book = store["1"]
+    assert isinstance(book, PrintedBook) and book.pages == 320
+    assert isinstance(store["2"], EBook) and store["2"].file_size == 1.5
+    assert isinstance(store["3"], Book) and not isinstance(store["3"], (PrintedBook, EBook))
+
+    copy = book.take_copy()
+    assert store["1"].available == 1 and store["1"].free == [2] and copy == 1
+    assert store["1"].to_dict() == {"isbn": "1", "title": "Title", "author": "Author", "borrowed": False,
+                                    "copies": 2, "available": 1, "free": [2], "pages": 320}
+    # authors are stored once
+    assert store["1"].author is store["2"].author
+    assert list(store) == ["1", "2", "3"] and len(store) == 3
+
+
+def test_removed_rows_are_reused_and_old_views_go_stale():
+    store = ColumnarBookStore()
+    store["1"] = PrintedBook("1", "First", "A", 10)
+    store["2"] = PrintedBook("2", "Second", "B", 20)
+    old = store["1"]
+    del store["1"]
+    store["3"] = EBook("3", "Third", "C", 2.0)
+    # the new book took the freed row, without growing the columns
+    assert len(store.isbns) == 2
+    assert store["3"].title == "Third" and "1" not in store
+    with pytest.raises(RuntimeError):
+        old.title
+    with pytest.raises(RuntimeError):
+        old.available = 0
+    assert store["3"].available == 1
+
+
+def test_library_on_a_columnar_store(make_library):
+    lib = make_library(columnar=True)
+    lib.add_user(User("U2", "member"))
+    lib.add_books([PrintedBook(str(i), f"Title {i}", "Author", 100, 2) for i in range(20)])
+    lib.borrow_book("3", "U2")
+    for isbn in map(str, range(0, 20, 2)):
+        lib.remove_book(isbn)
+    lib.add_book(EBook("new", "Fresh", "Writer", 1.0))
+    assert lib.books["3"].available == 1
+    assert [b.isbn for b in lib.search_books("fresh")] == ["new"]
+    assert len(lib.books) == 11
@@ -0,0 +1,71 @@
+import json
+
+from credentials import is_hashed
+from journal import read_journal
+from library_management_system import LibraryManagementSystem, PrintedBook, User
+from sqlite_storage import SQLiteStorage
+
+# written before passwords were hashed
+LEGACY = {
+    "books": {"1": {"isbn": "1", "title": "Old", "author": "Author", "borrowed": False, "pages": 10}},
+    "users": {"U1": {"user_id": "U1", "name": "Old admin", "role": "Admin", "password": "secret"},
+              "U2": {"user_id": "U2", "name": "Reader", "role": "member", "password": None}},
+}
+LEGACY_JOURNAL = {"op": "add_user", "user": {"user_id": "U3", "name": "Late", "role": "member", "password": "pw3"}}
+
+
+def _write_legacy(tmp_path):
+    path = tmp_path / "library_data.json"
+    path.write_text(json.dumps(LEGACY))
+    (tmp_path / "library_data.journal").write_text(json.dumps(LEGACY_JOURNAL) + "\n")
+    return str(path)
+
+
+def test_loading_hashes_only_the_files_own_passwords(tmp_path, make_library):
+    path = _write_legacy(tmp_path)
+    lib = make_library()
+    lib.add_book(PrintedBook("mine", "Not in the file", "Me", 10))
+    lib.load_data(path)
+    assert lib.authenticate("U1", "secret") and lib.authenticate("U3", "pw3")
+
+    with open(path) as f:
+        data = json.load(f)
+    # the records the file had, and nothing the library held before the load
+    assert set(data["books"]) == {"1"} and set(data["users"]) == {"U1", "U2"}
+    assert is_hashed(data["users"]["U1"]["password"]) and data["users"]["U2"]["password"] is None
+    assert data["books"] == LEGACY["books"]
+    records = list(read_journal(str(tmp_path / "library_data.journal")))
+    assert len(records) == 1 and is_hashed(records[0]["user"]["password"])
+
+    fresh = LibraryManagementSystem()
+    fresh.load_data(path)
+    assert fresh.authenticate("U1", "secret") and fresh.authenticate("U3", "pw3")
+    assert set(fresh.books) == {"1"} and set(fresh.users) == {"U1", "U2", "U3"}
+
+
+def test_loading_into_storage_leaves_its_records_out_of_the_file(tmp_path, make_library):
+    path = _write_legacy(tmp_path)
+    storage = SQLiteStorage(str(tmp_path / "library.db"))
+    lib = make_library(storage=storage)
+    lib.add_book(PrintedBook("db", "Only in the database", "Me", 10))
+    lib.load_data(path)
+    assert set(lib.books) == {"db", "1"}
+    storage.close()
+
+    with open(path) as f:
+        data = json.load(f)
+    assert set(data["books"]) == {"1"} and set(data["users"]) == {"U1", "U2"}
+    assert is_hashed(data["users"]["U1"]["password"])
+
+
+def test_an_open_journal_keeps_taking_records(tmp_path, make_library):
+    path = _write_legacy(tmp_path)
+    lib = make_library()
+    lib.open_journal(path)
+    lib.load_data(path)
+    lib.add_user(User("U4", "New"))
+    lib.close_journal()
+
+    records = list(read_journal(str(tmp_path / "library_data.journal")))
+    assert [rec["user"]["user_id"] for rec in records] == ["U3", "U4"]
+    assert is_hashed(records[0]["user"]["password"])
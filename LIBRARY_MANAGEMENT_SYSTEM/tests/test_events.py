@@ -0,0 +1,67 @@
+import logging
+
+import pytest
+
+from events import BOOK_ADDED, BOOK_BORROWED, BOOK_REMOVED, BOOK_RETURNED, ChangeBus
+from library_management_system import PrintedBook, User
+
+
+def test_batches_deliver_once_and_since_resumes_anywhere():
+    bus = ChangeBus(history=5)
+    deliveries = []
+    bus.subscribe(deliveries.append)
+    added = []
+    bus.subscribe(added.append, kinds=[BOOK_ADDED])
+    with bus.batch():
+        bus.publish(BOOK_ADDED, "1")
+        with bus.batch():
+            bus.publish_many(BOOK_ADDED, [("2", None), ("3", None)])
+        assert deliveries == []
+        bus.publish(BOOK_REMOVED, "1")
+    assert [[(e.version, e.kind, e.key) for e in d] for d in deliveries] == [
+        [(1, BOOK_ADDED, "1"), (2, BOOK_ADDED, "2"), (3, BOOK_ADDED, "3"), (4, BOOK_REMOVED, "1")]]
+    assert [[e.key for e in d] for d in added] == [["1", "2", "3"]]
+
+    bus.publish_many(BOOK_ADDED, [(str(i), None) for i in range(4, 7)])
+    assert bus.version == 7
+    # a cursor inside a run gets the rest of it
+    assert [e.version for e in bus.since(5)] == [6, 7]
+    assert bus.since(7) == []
+    # history=5 keeps whole runs while the rest still covers the last five changes
+    assert [e.version for e in bus.since(2)] == [3, 4, 5, 6, 7]
+    bus.publish(BOOK_ADDED, "8")
+    with pytest.raises(LookupError):
+        bus.since(2)
+    with pytest.raises(ValueError):
+        bus.subscribe(print, kinds=["book_lost"])
+
+
+def test_a_failing_subscriber_is_logged_and_skipped(make_library, caplog):
+    lib = make_library()
+    lib.add_user(User("U2", "member"))
+    seen = []
+
+    def broken(events):
+        raise RuntimeError("listener bug")
+
+    lib.events.subscribe(broken)
+    lib.events.subscribe(seen.extend)
+    with caplog.at_level(logging.ERROR, logger="events"):
+        lib.add_book(PrintedBook("1", "Title", "Author", 10))
+        lib.borrow_book("1", "U2")
+        lib.return_book("1", "U2")
+    assert [e.kind for e in seen] == [BOOK_ADDED, BOOK_BORROWED, BOOK_RETURNED]
+    assert lib.books["1"].available == 1
+    assert len([r for r in caplog.records if "listener bug" in (r.exc_text or "")]) == 3
+
+
+def test_a_removed_book_is_published_detached(make_library):
+    lib = make_library(columnar=True)
+    lib.add_books([PrintedBook("1", "Gone", "Author", 10), PrintedBook("2", "Kept", "Author", 20)])
+    removed = []
+    lib.events.subscribe(removed.extend, kinds=[BOOK_REMOVED])
+    lib.remove_book("1")
+    # the freed row is reused by the next book
+    lib.add_book(PrintedBook("3", "Newcomer", "Author", 30))
+    assert [(e.key, e.item.title, e.item.pages) for e in removed] == [("1", "Gone", 10)]
+    assert [e.item.title for e in lib.events.since(0) if e.kind == BOOK_REMOVED] == ["Gone"]
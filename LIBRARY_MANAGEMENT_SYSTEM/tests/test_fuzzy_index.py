@@ -0,0 +1,96 @@
+import random
+
+import pytest
+
+from fuzzy_index import TOKEN, FuzzyIndex, allowed_distance, edit_distance
+from library_management_system import PrintedBook
+
+WORDS = ["river", "rivers", "shadow", "garden", "history", "ocean", "stone", "star", "stars", "tolkien",
+         "night", "light", "winter", "water", "mountain", "ash", "sea", "kingdom", "kingdoms", "silver"]
+
+
+def _catalogue(count):
+    rnd = random.Random(7)
+    return [PrintedBook(str(i), " ".join(rnd.sample(WORDS, 3)).title(), rnd.choice(WORDS).title() + " Smith", 100)
+            for i in range(count)]
+
+
+def _brute_force(books, index, keyword, max_distance, limit):
+    """The same ranking by comparing every query word with every word of every book."""
+    query = list(dict.fromkeys(TOKEN.findall(keyword.lower())))
+    scored = []
+    for book in books:
+        words = set(TOKEN.findall(f"{book.title} {book.author}".lower()))
+        score = 0
+        for q in query:
+            allowed = allowed_distance(q, max_distance)
+            best = min(edit_distance(q, w, allowed) for w in words)
+            if best > allowed:
+                break
+            score += best
+        else:
+            scored.append((score, index.order[book.isbn], book.isbn))
+    return [(score, isbn) for score, _, isbn in sorted(scored)[:limit]]
+
+
+def _typo(word, rnd):
+    letters = list(word)
+    i = rnd.randrange(len(letters))
+    edit = rnd.randrange(4)
+    if edit == 0:
+        letters[i] = "q"
+    elif edit == 1 and len(letters) > 1:
+        del letters[i]
+    elif edit == 2 and i + 1 < len(letters):
+        letters[i], letters[i + 1] = letters[i + 1], letters[i]
+    else:
+        letters.insert(i, "z")
+    return "".join(letters)
+
+
+def test_edit_distance_counts_a_swap_as_one_edit():
+    assert edit_distance("tolkein", "tolkien", 2) == 1
+    assert edit_distance("kitten", "sitting", 3) == 3
+    assert edit_distance("kitten", "sitting", 2) == 3
+    assert edit_distance("a", "abcd", 2) == 3
+
+
+def test_search_matches_a_brute_force_ranking():
+    books = _catalogue(400)
+    index = FuzzyIndex()
+    index.add_many(books)
+    rnd = random.Random(3)
+    queries = ["tolkein", "shadw garden", "histroy ocaen", "xyzzy", "sea", "se"]
+    queries += [_typo(rnd.choice(WORDS), rnd) for _ in range(60)]
+    queries += [_typo(rnd.choice(WORDS), rnd) + " " + rnd.choice(WORDS) for _ in range(30)]
+    for keyword in queries:
+        for max_distance, limit in ((2, 10), (1, 5), (0, 400)):
+            assert index.search(keyword, max_distance, limit) == _brute_force(books, index, keyword,
+                                                                              max_distance, limit), keyword
+
+
+def test_removed_and_reindexed_books():
+    books = _catalogue(200)
+    index = FuzzyIndex()
+    index.defer(books)
+    for book in books[:50]:
+        index.remove(book.isbn)
+    # a changed title is indexed again and moves behind the others
+    books[60].title = "Rivver Song"
+    index.add(books[60])
+    live = books[50:60] + books[61:] + [books[60]]
+    assert len(index) == 150
+    for keyword in ("river", "song", "kingdom smith", "sylver"):
+        assert index.search(keyword, limit=200) == _brute_force(live, index, keyword, 2, 200)
+    with pytest.raises(ValueError):
+        index.search("river", max_distance=3)
+
+
+def test_library_fuzzy_search_follows_changes(make_library):
+    lib = make_library()
+    lib.add_books(_catalogue(50))
+    lib.add_book(PrintedBook("lotr", "The Lord of the Rings", "J. R. R. Tolkien", 1000))
+    assert [b.isbn for b in lib.fuzzy_search("tolkein rngs")] == ["lotr"]
+    lib.remove_book("lotr")
+    assert lib.fuzzy_search("tolkein rngs") == []
+    assert lib.fuzzy_search("rngs") == []
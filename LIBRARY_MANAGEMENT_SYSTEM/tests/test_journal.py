@@ -0,0 +1,56 @@
+from journal import LibraryJournal, read_journal
+from library_management_system import LibraryManagementSystem, PrintedBook, User
+
+
+def test_records_after_a_torn_write_survive_a_reload(tmp_path, make_library):
+    data = str(tmp_path / "library_data.json")
+    lib = make_library()
+    lib.open_journal(data)
+    lib.add_book(PrintedBook("1", "One", "Author", 10))
+    lib.close_journal()
+    # a crash in the middle of appending the next record
+    with open(tmp_path / "library_data.journal", "a") as f:
+        f.write('{"op":"add_book","book":{"isbn":"2"')
+
+    lib.open_journal(data)
+    lib.add_book(PrintedBook("3", "Three", "Author", 10))
+    lib.close_journal()
+
+    reloaded = LibraryManagementSystem()
+    reloaded.load_data(data)
+    assert sorted(reloaded.books) == ["1", "3"]
+
+
+def test_reopening_cuts_off_the_torn_tail(tmp_path):
+    path = str(tmp_path / "x.journal")
+    with open(path, "w") as f:
+        f.write('{"op":"a"}\n{"op":"b"}\nnot json\n{"op":"c"}')
+    journal = LibraryJournal(path)
+    assert journal.records == 2
+    journal.append({"op": "d"})
+    journal.close()
+    assert [r["op"] for r in read_journal(path)] == ["a", "b", "d"]
+
+
+def test_replaying_a_folded_journal_changes_nothing(tmp_path, make_library):
+    # a crash between writing the snapshot and truncating the journal replays it over itself
+    data = str(tmp_path / "library_data.json")
+    lib = make_library()
+    lib.open_journal(data)
+    lib.add_user(User("U2", "member"))
+    lib.add_book(PrintedBook("1", "One", "Author", 10, 2))
+    lib.add_book(PrintedBook("2", "Two", "Author", 10))
+    lib.borrow_book("1", "U2")
+    lib.remove_book("2")
+    with open(tmp_path / "library_data.journal") as f:
+        journal = f.read()
+    lib.save_data(data)
+    lib.close_journal()
+    with open(tmp_path / "library_data.journal", "w") as f:
+        f.write(journal)
+
+    reloaded = LibraryManagementSystem()
+    reloaded.load_data(data)
+    assert sorted(reloaded.books) == ["1"]
+    assert reloaded.books["1"].available == 1
+    assert [loan.user_id for loan in reloaded.loans.holders("1")] == ["U2"]
@@ -0,0 +1,54 @@
+import asyncio
+import json
+import threading
+
+from library_management_system import LibraryManagementSystem, User
+from library_service import LibraryService
+
+
+async def _post(port, path, body):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode()
+    writer.write(f"POST {path} HTTP/1.1\r\nContent-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode()
+                 + payload)
+    status = int((await reader.readline()).split()[1])
+    response = json.loads((await reader.read()).split(b"\r\n\r\n", 1)[1])
+    writer.close()
+    return status, response
+
+
+def test_login_hashes_off_the_event_loop():
+    lib = LibraryManagementSystem()
+    lib.add_user(User("U1", "member", password="secret"))
+    service = LibraryService(lib)
+    threads = []
+    authenticate = lib.authenticate
+
+    def recording(*args):
+        threads.append(threading.current_thread())
+        return authenticate(*args)
+    lib.authenticate = recording
+
+    async def run():
+        server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            ok = await _post(port, "/login", {"user_id": "U1", "password": "secret"})
+            wrong = await _post(port, "/login", {"user_id": "U1", "password": "nope"})
+        return ok, wrong
+
+    (status, body), (wrong_status, _) = asyncio.run(run())
+    assert status == 200 and lib.sessions.user_for(body["token"]) == "U1"
+    assert wrong_status == 401
+    assert threads and threading.main_thread() not in threads
+
+
+def test_batch_refuses_logins():
+    lib = LibraryManagementSystem()
+    lib.add_user(User("U1", "member", password="secret"))
+    service = LibraryService(lib)
+    token = lib.authenticate("U1", "secret")
+    status, body = service.dispatch("POST", "/batch", {"authorization": f"Bearer {token}"},
+                                    {"requests": [{"method": "POST", "path": "/login",
+                                                   "body": {"user_id": "U1", "password": "secret"}}]})
+    assert status == 200 and body["responses"][0]["status"] == 400
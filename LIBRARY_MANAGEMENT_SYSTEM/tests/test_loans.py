@@ -0,0 +1,13 @@
+from library_management_system import PrintedBook, User
+
+
+def test_return_closes_the_returning_members_loan(make_library):
+    lib = make_library()
+    lib.add_user(User("U1", "one"))
+    lib.add_user(User("U2", "two"))
+    lib.add_book(PrintedBook("B", "Book", "Author", 10, 2))
+    first = lib.borrow_book("B", "U1")
+    second = lib.borrow_book("B", "U2")
+
+    assert lib.return_book("B", "U2").loan_id == second.loan_id
+    assert [loan.loan_id for loan in lib.loans.holders("B")] == [first.loan_id]
@@ -0,0 +1,12 @@
+from library_management_system import PrintedBook
+
+
+def test_fuzzy_search_and_logins_are_timed(make_library):
+    lib = make_library()
+    lib.add_book(PrintedBook("1", "The Hobbit", "Tolkien", 300))
+    metrics = lib.enable_metrics()
+    lib.authenticate("A", "pw")
+    assert [b.isbn for b in lib.fuzzy_search("tolkein")] == ["1"]
+    text = metrics.to_prometheus()
+    assert 'operation="fuzzy_search"' in text
+    assert 'operation="authenticate"' in text
@@ -0,0 +1,52 @@
+import random
+
+from library_management_system import EBook, PrintedBook
+from search_index import BookSearchIndex
+
+WORDS = ["river", "Rivet", "garden", "shade", "a", "of", "Ab", "tolkien", "Émile", "x"]
+KEYWORDS = ["", "r", "RI", "riv", "river", "ver ga", "a", "ab", "of", "é", "émile", "en", "zzz", "x", "shade garden"]
+
+
+def _books(count, seed=7):
+    rng = random.Random(seed)
+    books = []
+    for i in range(count):
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+        author = rng.choice(WORDS)
+        books.append(PrintedBook(f"{i:05d}", title, author, 100) if i % 2 else EBook(f"{i:05d}", title, author, 1.0))
+    return books
+
+
+def _scan(books, keyword):
+    keyword = keyword.lower()
+    return [b.isbn for b in books if keyword in b.title.lower() or keyword in b.author.lower()]
+
+
+def test_search_matches_a_linear_scan(make_library):
+    lib = make_library()
+    books = _books(600)
+    lib.add_books(books[:300])
+    for book in books[300:]:
+        lib.add_book(book)
+    for isbn in [b.isbn for b in books[::7]]:
+        lib.remove_book(isbn)
+    left = [b for b in books if b.isbn in lib.books]
+    for keyword in KEYWORDS:
+        assert [b.isbn for b in lib.search_books(keyword)] == _scan(left, keyword), keyword
+
+
+def test_reindexing_keeps_the_catalogue_position():
+    index = BookSearchIndex()
+    first, second = PrintedBook("1", "Old title", "A", 1), PrintedBook("2", "Title", "B", 1)
+    index.add_many([first, second])
+    index.add(PrintedBook("1", "New title", "A", 1))
+    assert index.search("title") == ["1", "2"]
+    assert index.search("old") == []
+
+
+def test_deferred_batches_are_indexed_on_first_search():
+    index = BookSearchIndex()
+    index.defer(iter(_books(50)))
+    assert index.pending
+    assert index.search("river") == _scan(_books(50), "river")
+    assert not index.pending
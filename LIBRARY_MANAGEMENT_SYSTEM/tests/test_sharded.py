@@ -0,0 +1,51 @@
+import json
+
+from library_management_system import PrintedBook, User
+from loans import LoanLedger
+from sharded import ShardedLibrary, shard_of
+
+
+def _isbn_on(shard, shards):
+    return next(isbn for isbn in map(str, range(1000)) if shard_of(isbn, shards) == shard)
+
+
+def test_ledger_sequence_and_renumber():
+    ledger = LoanLedger(first_id=2, step=3)
+    assert [ledger.open("B", "U", 0, 1).loan_id for _ in range(3)] == [2, 5, 8]
+    ledger.add(ledger.open("C", "U", 0, 1, loan_id=9))
+    assert ledger.next_id == 11
+    moved = ledger.renumber(1, 2)
+    # 5 and 9 fit the odd sequence; 2 and 8 move above the highest id
+    assert sorted(ledger.loans) == [5, 9, 11, 13]
+    assert sorted(loan.loan_id for loan in moved) == [11, 13]
+
+
+def test_loan_ids_are_unique_across_shards(tmp_path):
+    shards = 2
+    isbns = [_isbn_on(i, shards) for i in range(shards)]
+    with ShardedLibrary(shards, str(tmp_path)) as lib:
+        lib.add_user(User("U1", "admin", role="Admin"))
+        lib.add_user(User("U2", "member"))
+        lib.Login(lib.users["U1"])
+        for isbn in isbns:
+            lib.add_book(PrintedBook(isbn, "Title", "Author", 10, 2))
+            lib.borrow_book(isbn, "U2", due_at=1)
+        held = [loan.loan_id for loan in lib.books_held_by("U2")]
+        assert len(set(held)) == len(held) == 2
+        assert sorted(loan.loan_id for loan in lib.overdue_loans()) == sorted(held)
+        lib.save_data()
+
+    # a shard file from before the per-shard numbering, with a clashing loan id
+    path = tmp_path / "shard-01.json"
+    data = json.loads(path.read_text())
+    (loan,) = data["loans"].values()
+    loan["loan_id"] = 1
+    data["loans"] = {"1": loan}
+    path.write_text(json.dumps(data))
+
+    with ShardedLibrary(shards, str(tmp_path)) as lib:
+        lib.Login(lib.users["U1"])
+        held = [loan.loan_id for loan in lib.books_held_by("U2")]
+        assert len(set(held)) == 2
+        # the renumbered loan was saved in shard 1's sequence (2, 4, ...)
+        assert [int(loan_id) % shards for loan_id in json.loads(path.read_text())["loans"]] == [0]
@@ -0,0 +1,131 @@
+import json
+
+import pytest
+
+from events import BOOK_ADDED
+from library_management_system import EBook, PrintedBook, User
+from shared_file import SaveConflict, read_version
+
+
+@pytest.fixture
+def shared(tmp_path, make_library):
+    """Two libraries, A and B, sharing one data file that already holds book L1."""
+    path = str(tmp_path / "library_data.json")
+    legacy = make_library()
+    legacy.add_user(User("U2", "member"))
+    legacy.add_book(PrintedBook("L1", "Legacy", "Author", 10, 2))
+    legacy.save_data(path)
+
+    def open_one():
+        lib = make_library()
+        lib.open_shared(path)
+        return lib
+    return path, open_one(), open_one()
+
+
+def _file(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def test_saves_merge_instead_of_overwriting(shared):
+    path, a, b = shared
+    a.add_book(PrintedBook("A1", "From A", "Author", 10))
+    b.add_book(EBook("B1", "From B", "Author", 1.0))
+    a.save_data(path)
+    b.save_data(path)
+
+    data = _file(path)
+    assert set(data["books"]) == {"L1", "A1", "B1"}
+    assert read_version(path) == data["version"] == 2
+    # B took A's book while merging; A picks B's up on reload and tells its listeners
+    assert "A1" in b.books and "B1" not in a.books
+    seen = []
+    a.events.subscribe(seen.extend)
+    assert a.reload_changes()["changed"] == 1
+    assert [(e.kind, e.key) for e in seen] == [(BOOK_ADDED, "B1")]
+    assert ("books", "B1") not in a.shared.dirty
+    assert a.reload_changes()["changed"] == 0
+
+
+def test_both_sides_changing_a_record_is_a_conflict(shared):
+    path, a, b = shared
+    a.borrow_book("L1", "A")
+    b.borrow_book("L1", "U2")
+    a.save_data(path)
+    with pytest.raises(SaveConflict) as conflict:
+        b.save_data(path)
+    assert ("books", "L1") in conflict.value.keys
+
+    # taking theirs gives up B's borrow, book and loan together
+    b.load_data(path)
+    assert b.books["L1"].available == 1
+    assert [loan.user_id for loan in b.who_holds("L1")] == ["A"]
+    b.save_data(path)
+    assert [loan["user_id"] for loan in _file(path)["loans"].values()] == ["A"]
+
+
+def test_clashing_loan_ids_are_renumbered(shared):
+    path, a, b = shared
+    a.add_book(PrintedBook("A1", "From A", "Author", 10))
+    a.save_data(path)
+    b.reload_changes()
+    mine = a.borrow_book("A1", "U2")
+    theirs = b.borrow_book("L1", "U2")
+    assert mine.loan_id == theirs.loan_id
+    a.save_data(path)
+    b.save_data(path)
+
+    loans = _file(path)["loans"]
+    assert sorted(loan["isbn"] for loan in loans.values()) == ["A1", "L1"]
+    assert all(int(key) == loan["loan_id"] for key, loan in loans.items())
+    a.reload_changes()
+    assert len(a.loans) == 2 and a.books["L1"].available == 1
+
+
+def test_removals_reach_the_other_process(shared):
+    path, a, b = shared
+    b.remove_book("L1")
+    b.save_data(path)
+    assert _file(path)["versions"]["books"]["L1"] < 0
+    a.reload_changes()
+    assert "L1" not in a.books
+
+
+def test_plain_save_refuses_to_overwrite_a_shared_file(shared, make_library):
+    path, a, b = shared
+    a.add_book(PrintedBook("A1", "From A", "Author", 10))
+    a.save_data(path)
+    plain = make_library()
+    plain.load_data(path)
+    with pytest.raises(ValueError):
+        plain.save_data(path)
+    assert set(_file(path)["books"]) == {"L1", "A1"}
+
+
+def test_a_first_save_merges_and_reports_conflicts(shared, make_library):
+    path, a, b = shared
+    late = make_library()
+    late.load_data(path)
+    a.add_book(PrintedBook("A1", "From A", "Author", 10))
+    a.add_copies("L1", 1)
+    a.save_data(path)
+    before = _file(path)
+
+    # edited here before the file was ever shared, and in the file meanwhile
+    late.add_copies("L1", 3)
+    late.add_book(EBook("N1", "Only here", "Author", 1.0))
+    with pytest.raises(SaveConflict) as conflict:
+        late.open_shared(path, theirs=False)
+    assert conflict.value.keys == [("books", "L1")]
+    assert late.shared is None and _file(path) == before
+    # the rest of the file was merged in, and the local edits are still there
+    assert "A1" in late.books and "N1" in late.books
+    assert late.books["L1"].copies == 5
+
+    # taking their version makes the save go through
+    late.open_shared(path)
+    late.save_data(path)
+    data = _file(path)
+    assert set(data["books"]) == {"L1", "A1", "N1"}
+    assert data["books"]["L1"]["copies"] == 3
@@ -0,0 +1,76 @@
+import sqlite3
+
+from library_management_system import EBook, LibraryManagementSystem, PrintedBook, User
+from sqlite_storage import SQLiteStorage, migrate_json
+
+
+def test_library_on_sqlite_matches_one_in_memory(tmp_path, make_library):
+    storage = SQLiteStorage(str(tmp_path / "library.db"))
+    on_disk = make_library(storage=storage)
+    in_memory = make_library()
+    books = [PrintedBook(f"P{i}", f"Title {i}", "Ann Author", 100 + i, 2) if i % 2 else
+             EBook(f"E{i}", f"Ebook {i}", "Bo_b 100%", 1.5 + i) for i in range(40)]
+    for lib in (on_disk, in_memory):
+        lib.add_user(User("U2", "member"))
+        lib.add_books(books)
+        lib.borrow_book("P1", "U2")
+        lib.borrow_book("P3", "A")
+        lib.return_book("P3", "A")
+        lib.remove_book("E0")
+
+    assert [b.to_dict() for b in on_disk.books.values()] == [b.to_dict() for b in in_memory.books.values()]
+    # FTS for three characters and more, LIKE (with its wildcards escaped) below that
+    for keyword in ("title 1", "AUTHOR", "_b", "0%", "ebook 2", "zz"):
+        assert [b.isbn for b in on_disk.search_books(keyword)] == [b.isbn for b in in_memory.search_books(keyword)]
+    storage.close()
+
+    # books, users and loans are all in the file
+    storage = SQLiteStorage(str(tmp_path / "library.db"))
+    reopened = LibraryManagementSystem(storage=storage)
+    assert len(reopened.books) == 39 and reopened.books["P1"].available == 1
+    assert reopened.authenticate("A", "pw") is not None
+    assert [loan.user_id for loan in reopened.loans.holders("P1")] == ["U2"]
+    storage.close()
+
+
+def test_migrate_json_copies_every_record(tmp_path, make_library):
+    json_path, db_path = str(tmp_path / "library_data.json"), str(tmp_path / "library.db")
+    lib = make_library()
+    lib.add_user(User("U2", "member"))
+    lib.add_books([PrintedBook(str(i), f"Title {i}", "Author", 100, 3) for i in range(25)])
+    lib.borrow_book("7", "U2")
+    lib.save_data(json_path)
+
+    assert migrate_json(json_path, db_path, batch_size=10) == {"books": 25, "users": 2, "loans": 1}
+    storage = SQLiteStorage(db_path)
+    migrated = LibraryManagementSystem(storage=storage)
+    assert [b.to_dict() for b in migrated.books.values()] == [b.to_dict() for b in lib.books.values()]
+    assert [loan.user_id for loan in migrated.loans.holders("7")] == ["U2"]
+    storage.close()
+
+
+def test_old_databases_are_brought_up_to_date(tmp_path):
+    db_path = str(tmp_path / "library.db")
+    # the first release's schema, with a plaintext password
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE books (isbn TEXT PRIMARY KEY, title TEXT NOT NULL, author TEXT NOT NULL, kind TEXT NOT NULL,
+                            borrowed INTEGER NOT NULL DEFAULT 0, pages INTEGER, file_size REAL);
+        CREATE TABLE users (user_id TEXT PRIMARY KEY, name TEXT NOT NULL, role TEXT NOT NULL, password TEXT);
+        CREATE TABLE loans (loan_id INTEGER PRIMARY KEY, isbn TEXT NOT NULL, user_id TEXT NOT NULL,
+                            borrowed_at REAL NOT NULL, due_at REAL NOT NULL);
+        INSERT INTO books VALUES ('1', 'Lent', 'Author', 'printed', 1, 100, NULL);
+        INSERT INTO books VALUES ('2', 'Shelved', 'Author', 'ebook', 0, NULL, 2.5);
+        INSERT INTO users VALUES ('A', 'Admin', 'admin', 'secret');
+    """)
+    conn.commit()
+    conn.close()
+
+    storage = SQLiteStorage(db_path)
+    lib = LibraryManagementSystem(storage=storage)
+    assert (lib.books["1"].copies, lib.books["1"].available) == (1, 0)
+    assert (lib.books["2"].copies, lib.books["2"].available) == (1, 1)
+    assert storage.query_one("SELECT password FROM users")[0].startswith("scrypt$")
+    assert lib.authenticate("A", "secret") is not None
+    assert [b.isbn for b in lib.search_books("shelv")] == ["2"]
+    storage.close()
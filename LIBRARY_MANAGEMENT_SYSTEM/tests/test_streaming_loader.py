@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from library_management_system import EBook, LibraryManagementSystem, PrintedBook, User
+from streaming_loader import iter_library_records
+
+
+@pytest.fixture
+def saved(tmp_path, make_library):
+    path = str(tmp_path / "library_data.json")
+    lib = make_library()
+    lib.add_user(User("U2", "Zoë"))
+    lib.add_books([PrintedBook(f"P{i}", f"Título {i}", "Autor", 100 + i, 2) if i % 3 else
+                   EBook(f"E{i}", f"Ebook {i}", "Writer", 1.5 + i) for i in range(600)])
+    lib.borrow_book("P1", "U2")
+    lib.save_data(path)
+    return path, lib
+
+
+def test_streaming_load_matches_a_plain_load(saved):
+    path, lib = saved
+    calls = []
+    streamed = LibraryManagementSystem()
+    streamed.load_data(path, progress=lambda *args: calls.append(args))
+    plain = LibraryManagementSystem()
+    plain.load_data(path)
+
+    assert list(streamed.books) == list(plain.books) == list(lib.books)
+    assert all(streamed.books[isbn].to_dict() == plain.books[isbn].to_dict() for isbn in plain.books)
+    assert set(streamed.users) == {"A", "U2"}
+    assert [loan.user_id for loan in streamed.loans.holders("P1")] == ["U2"]
+    # the last progress call counts every record (books, users, loan) and the whole file
+    assert calls[-1] == (600 + 2 + 1, calls[-1][2], calls[-1][2])
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_records_survive_any_buffer_edge(saved, chunk_size):
+    path, _ = saved
+    with open(path) as f:
+        data = json.load(f)
+    records = {(section, key): value for section, key, value, _ in iter_library_records(path, chunk_size)}
+    assert records == {(section, key): value for section in ("books", "users", "loans")
+                       for key, value in data[section].items()}
+
+
+def test_truncated_file_raises(saved, tmp_path):
+    path, _ = saved
+    with open(path, "rb") as f:
+        content = f.read()
+    cut = str(tmp_path / "cut.json")
+    with open(cut, "wb") as f:
+        f.write(content[:len(content) // 2])
+    with pytest.raises(ValueError):
+        LibraryManagementSystem().load_data(cut, streaming=True)
@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from library_management_system import EBook, LibraryManagementSystem, PrintedBook
+from table_renderer import HEADERS, BookTableView, table_row
+
+
+def test_full_listing_streams_chunks_under_one_header(make_library, capsys, monkeypatch):
+    lib = make_library()
+    lib.add_books([PrintedBook(f"{i:04d}", f"Title {i}", "Author", 100) for i in range(25)])
+    monkeypatch.setattr(LibraryManagementSystem, "LISTING_CHUNK", 10)
+    pages = []
+    # the first listing builds the view; count the page sizes the second one asks for
+    lib.show_all_books()
+    view_pages = lib.table_view.pages
+    monkeypatch.setattr(lib.table_view, "pages", lambda size, **f: pages.append(size) or view_pages(size, **f))
+    capsys.readouterr()
+    lib.show_all_books()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert pages == [10]
+    assert sum(line.startswith("ISBN") for line in lines) == 1
+    assert [line.split()[0] for line in lines[2:]] == [f"{i:04d}" for i in range(25)]
+
+
+def test_paged_listing_repeats_the_header(make_library, capsys):
+    lib = make_library()
+    lib.add_books([PrintedBook(str(i), "Title", "Author", 100) for i in range(5)])
+    lib.show_all_books(page_size=2)
+    assert sum(line.startswith("ISBN") for line in capsys.readouterr().out.splitlines()) == 3
+
+
+def _expected_widths(books):
+    widths = [len(h) for h in HEADERS]
+    for book in books:
+        cells = table_row(book)
+        sizes = [len(cell) for cell in cells[:5]] + [2 * len(str(book.copies)) + 1]
+        widths = [max(w, size) for w, size in zip(widths, sizes)]
+    return widths
+
+
+def test_widths_and_filters_follow_every_change():
+    rnd = random.Random(5)
+    books = {}
+    view = BookTableView(books.__getitem__)
+    for step in range(600):
+        action = rnd.random()
+        if action < 0.45 or not books:
+            isbn = str(rnd.randrange(10 ** rnd.randrange(1, 6)))
+            title = "T" * rnd.randrange(1, 40)
+            book = (PrintedBook(isbn, title, "A" * rnd.randrange(1, 20), rnd.randrange(1, 10 ** 5))
+                    if rnd.random() < 0.5 else EBook(isbn, title, "B", rnd.randrange(1, 999) / 10))
+            if isbn in books:
+                # replaced the way _put_book does it, which lists the book last
+                view.remove(isbn, books.pop(isbn))
+            books[isbn] = book
+            view.add(book)
+        elif action < 0.7:
+            isbn = rnd.choice(list(books))
+            view.remove(isbn, books.pop(isbn))
+        else:
+            book = books[rnd.choice(list(books))]
+            if action < 0.8:
+                book.add_copies(rnd.choice((1, 9, 120)))
+            elif action < 0.9 and book.available:
+                book.take_copy()
+            else:
+                book.put_copy()
+            view.update(book)
+        assert view.widths() == _expected_widths(books.values()), step
+
+    assert list(view.isbns()) == list(books)
+    assert list(view.isbns(kind="EBook", borrowed=False)) == [
+        isbn for isbn, b in books.items() if isinstance(b, EBook) and not b.borrowed]
+    assert list(view.isbns(borrowed=True, reverse=True)) == [isbn for isbn, b in reversed(books.items()) if b.borrowed]
+    assert list(view.isbns(sort="title")) == [isbn for _, isbn in sorted((b.title.casefold(), isbn)
+                                                                          for isbn, b in books.items())]
+    rows = [line for page in view.pages(page_size=7) for line in page[2:]]
+    assert len(rows) == len(books) and all(len(row) == len(rows[0]) for row in rows)
+
+
+def test_a_paused_listing_goes_stale(make_library):
+    lib = make_library()
+    lib.add_books([PrintedBook(str(i), "Title", "Author", 100) for i in range(10)])
+    lib.show_all_books(page_size=3)
+    pages = lib.table_view.pages(page_size=3)
+    next(pages)
+    lib.remove_book("5")
+    with pytest.raises(RuntimeError):
+        next(pages)
+    # a new listing sees the change
+    assert len([line for page in lib.table_view.pages(page_size=3) for line in page[2:]]) == 9
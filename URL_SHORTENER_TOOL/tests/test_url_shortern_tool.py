@@ -0,0 +1,64 @@
+import sqlite3
+
+import pytest
+
+from url_shortern_tool import UrlStore, decode_base62, encode_base62, normalize_url
+
+
+@pytest.mark.parametrize("a, b", [
+    ("HTTP://Example.COM:80/", "http://example.com"),
+    ("https://a.b:443/x/", "https://a.b/x"),
+    ("http://[::1]:80/p", "http://[::1]/p"),
+    ("Example.com", "example.com"),
+    ("Example.COM/Path/", "example.com/Path"),
+    ("Example.com:8080/a", "example.com:8080/a"),
+])
+def test_equivalent_urls_normalise_alike(a, b):
+    assert normalize_url(a) == normalize_url(b)
+
+
+@pytest.mark.parametrize("a, b", [
+    ("http://example.com/Path", "http://example.com/path"),
+    ("http://example.com:8080", "http://example.com"),
+    ("https://example.com", "http://example.com"),
+    ("mailto:Someone@Example.com", "mailto:someone@example.com"),
+])
+def test_different_urls_stay_apart(a, b):
+    assert normalize_url(a) != normalize_url(b)
+
+
+def test_base62_round_trip():
+    for number in (1, 61, 62, 3843, 3844, 10**12):
+        assert decode_base62(encode_base62(number)) == number
+    with pytest.raises(ValueError):
+        decode_base62("01")
+
+
+def test_store_dedupes_and_survives_a_restart(tmp_path):
+    path = str(tmp_path / "urls.db")
+    store = UrlStore(path)
+    slug, created = store.add("example.com")
+    assert created
+    assert store.add("Example.com/") == (slug, False)
+    assert store.add("http://example.com")[1]
+    store.close()
+
+    store = UrlStore(path)
+    assert store.get(slug) == "example.com"
+    assert store.find("EXAMPLE.com") == slug
+    assert store.get("zz") is None and store.get("0" + slug) is None
+    store.close()
+
+
+def test_older_stores_get_their_forms_recomputed(tmp_path):
+    path = str(tmp_path / "urls.db")
+    # as left by the version that split "Example.com" as a path
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE urls (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL, normalized TEXT)")
+    db.execute("INSERT INTO urls (url, normalized) VALUES ('Example.com', 'Example.com')")
+    db.commit()
+    db.close()
+
+    store = UrlStore(path)
+    assert store.add("example.com") == ("1", False)
+    store.close()
@@ -1,25 +1,164 @@
-import uuid
-import hashlib
-url_store  = {}
+import re
+import sqlite3
+import string
+from typing import Tuple
+from urllib.parse import urlsplit, urlunsplit
 
-def generate_slug(url : str) -> str:
-    unique_str = url + str(uuid.uuid4())
-    slug = hashlib.sha256(unique_str.encode()).hexdigest()[:8]
-    return slug
+DB_FILE = "url_store.db"
+# base62: a slug is the URL's row number written with these digits
+ALPHABET = string.digits + string.ascii_letters
+DEFAULT_PORTS = {"http": "80", "https": "443", "ftp": "21"}
+# bumped whenever normalize_url() changes, so stores recompute the forms they keep
+NORMAL_FORM = 1
+# "scheme:" not followed by a port number: "mailto:a@b" has a scheme, "localhost:8080" is a host
+SCHEME = re.compile(r"[A-Za-z][A-Za-z0-9+.-]*:(?://|(?!\d+(?:[/?#]|$)))")
+
+
+def encode_base62(number : int) -> str:
+    digits = []
+    while True:
+        number, digit = divmod(number, 62)
+        digits.append(ALPHABET[digit])
+        if not number:
+            return "".join(reversed(digits))
+
+
+def decode_base62(slug : str) -> int:
+    """Row number of slug; ValueError if it is not a slug encode_base62() could produce."""
+    number = 0
+    for char in slug:
+        digit = ALPHABET.find(char)
+        if digit < 0:
+            raise ValueError(f"not a base62 slug: {slug!r}")
+        number = number * 62 + digit
+    # "0a" would decode like "a"; only the canonical spelling is a slug
+    if not slug or encode_base62(number) != slug:
+        raise ValueError(f"not a base62 slug: {slug!r}")
+    return number
+
+
+def normalize_url(url : str) -> str:
+    """The form URLs are compared in: scheme and host lowercased, a default port
+    dropped and trailing slashes of the path removed (path, query and fragment
+    otherwise kept, they are case-sensitive). Input without a scheme, such as
+    "Example.com/a", starts with the host."""
+    url = url.strip()
+    if not SCHEME.match(url):
+        # urlsplit would take all of it for a path
+        url = "//" + url
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    userinfo, at, hostport = parts.netloc.rpartition("@")
+    host, colon, port = hostport.rpartition(":")
+    # "[::1]" has colons but no port; "host:" has an empty one, which means the default
+    if not colon or not (port.isdigit() or not port):
+        host, port = hostport, ""
+    if port == DEFAULT_PORTS.get(scheme):
+        port = ""
+    netloc = userinfo + at + host.lower() + (":" + port if port else "")
+    return urlunsplit((scheme, netloc, parts.path.rstrip("/"), parts.query, parts.fragment))
+
+
+class UrlStore:
+    """slug -> URL mappings kept in a SQLite file, so they survive restarts.
+
+    Every URL gets the next row number of the table and its slug is that
+    number in base62, so slugs are unique without any collision check (also
+    between processes sharing the file: SQLite hands out the row numbers) and
+    stay short: 5 characters cover 916 million URLs. A lookup decodes the slug
+    back to the row number and reads that one row by primary key, no matter
+    how many mappings there are.
+
+    Next to each URL the table keeps its normalize_url() form, indexed, so
+    finding the slug of a URL (or of an equivalent spelling of it) is one
+    index lookup too. It is written by the same INSERT as the URL, so the
+    two directions can never disagree.
+    """
+
+    def __init__(self, filename : str = DB_FILE):
+        self.filename = filename
+        self.db = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # opened on first use, so importing the module creates no file
+        if self.db is None:
+            db = sqlite3.connect(self.filename)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.create_function("normalize_url", 1, normalize_url, deterministic=True)
+            db.execute("CREATE TABLE IF NOT EXISTS urls (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL,"
+                       " normalized TEXT)")
+            if "normalized" not in [column[1] for column in db.execute("PRAGMA table_info(urls)")]:
+                # a store written before the reverse index existed
+                db.execute("ALTER TABLE urls ADD COLUMN normalized TEXT")
+            if db.execute("PRAGMA user_version").fetchone()[0] < NORMAL_FORM:
+                # forms missing or made by an older normalize_url(): redo them all, once
+                db.execute("UPDATE urls SET normalized = normalize_url(url)")
+                db.execute(f"PRAGMA user_version = {NORMAL_FORM}")
+            db.execute("CREATE INDEX IF NOT EXISTS urls_by_normalized ON urls (normalized)")
+            db.commit()
+            self.db = db
+        return self.db
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def add(self, url : str) -> Tuple[str, bool]:
+        """Store url under a new slug unless it (or an equivalent URL) already has one.
+        Returns (slug, True if it is new)."""
+        normalized = normalize_url(url)
+        db = self._connect()
+        # write-locked from the lookup on, so two processes cannot both add the same URL
+        db.execute("BEGIN IMMEDIATE")
+        with db:
+            row = db.execute("SELECT id FROM urls WHERE normalized = ? ORDER BY id LIMIT 1", (normalized,)).fetchone()
+            if row is not None:
+                return encode_base62(row[0]), False
+            row_id = db.execute("INSERT INTO urls (url, normalized) VALUES (?, ?)", (url, normalized)).lastrowid
+        return encode_base62(row_id), True
+
+    def find(self, url : str):
+        """Slug of url or of an equivalent URL, or None."""
+        row = self._connect().execute("SELECT id FROM urls WHERE normalized = ? ORDER BY id LIMIT 1",
+                                      (normalize_url(url),)).fetchone()
+        return encode_base62(row[0]) if row is not None else None
+
+    def get(self, slug : str, default = None):
+        try:
+            row_id = decode_base62(slug)
+        except ValueError:
+            return default
+        row = self._connect().execute("SELECT url FROM urls WHERE id = ?", (row_id,)).fetchone()
+        return row[0] if row is not None else default
+
+    def __contains__(self, slug : str) -> bool:
+        return self.get(slug) is not None
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+    def items(self):
+        """(slug, url) pairs, oldest first, streamed from the file."""
+        for row_id, url in self._connect().execute("SELECT id, url FROM urls ORDER BY id"):
+            yield encode_base62(row_id), url
+
+    def values(self):
+        return (url for _, url in self.items())
+
+
+url_store = UrlStore()
 
 def shorten_url(url : str) -> str:
     if not url.strip():
         return "❌ Error : URL connot be empty"
-    if url in url_store.values():
-        for slug, stored_url in url_store.items():
-            if stored_url == url:
-                return f" Already shortened : {slug}"
-    slug = generate_slug(url)
-    url_store[slug] = url
+    slug, created = url_store.add(url.strip())
+    if not created:
+        return f" Already shortened : {slug}"
     return f" Short URL created : {slug}"
 
 def retrieve_url(slug : str) -> str:
-    return url_store.get(slug, "❌ Error : Slug not found")
+    return url_store.get(slug.strip(), "❌ Error : Slug not found")
 
 def menu():
     while True:
@@ -36,10 +175,11 @@ def menu():
             print(retrieve_url(slug))
         elif choice == "3":
             print("Exiting...")
+            url_store.close()
             break
         else:
             print("❌ Invalid choice. Try again.")
 if __name__ == "__main__":
     menu()
 
-        
+